@@ -1,12 +1,12 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
+import services.report as report_service
 from api.shared.mixins import RepoPropertyMixin
 from api.shared.permissions import RepositoryArtifactPermissions
-from api.shared.report.serializers import TreeSerializer
+from api.shared.report.serializers import tree_max_depth, tree_response
 from services.path import ReportPaths
 
 
@@ -32,11 +32,12 @@ class CoverageViewSet(viewsets.ViewSet, RepoPropertyMixin):
                 404,
             )
 
-        report = commit.full_report
-        if report is None:
+        # the tree only needs file totals so we don't build the full report
+        files_table = report_service.build_files_table(commit)
+        if files_table is None:
             raise NotFound(f"Coverage report for {commit_sha} not found")
 
-        return report
+        return files_table
 
     @action(
         detail=False,
@@ -44,7 +45,9 @@ class CoverageViewSet(viewsets.ViewSet, RepoPropertyMixin):
         url_path="tree",
     )
     def tree(self, request, *args, **kwargs):
-        report = self.get_object()
-        paths = ReportPaths(report)
-        serializer = TreeSerializer(paths.single_directory(), many=True)
-        return Response(serializer.data)
+        files_table = self.get_object()
+        max_depth = tree_max_depth(request, "max_depth")
+        paths = ReportPaths(files_table)
+        return tree_response(
+            request, paths.lazy_single_directory(max_depth=max_depth), max_depth, self
+        )
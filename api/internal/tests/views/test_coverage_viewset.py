@@ -8,6 +8,7 @@ from shared.utils.sessions import Session
 
 from codecov_auth.tests.factories import OwnerFactory
 from core.tests.factories import BranchFactory, CommitFactory, RepositoryFactory
+from services.report import FileSummaryTable
 from utils.test_utils import Client
 
 
@@ -79,9 +80,11 @@ class CoverageViewSetTests(APITestCase):
         self.client = Client()
         self.client.force_login_owner(self.current_owner)
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree(self, build_report_from_commit):
-        build_report_from_commit.return_value = sample_report()
+    @patch("services.report.build_files_table")
+    def test_tree(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
 
         res = self._tree()
         assert res.status_code == 200
@@ -137,11 +140,13 @@ class CoverageViewSetTests(APITestCase):
             },
         ]
 
-        build_report_from_commit.assert_called_once_with(self.commit1)
+        build_files_table.assert_called_once_with(self.commit1)
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree_sha(self, build_report_from_commit):
-        build_report_from_commit.return_value = sample_report()
+    @patch("services.report.build_files_table")
+    def test_tree_sha(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
 
         res = self._tree(sha=self.commit2.commitid)
         assert res.status_code == 200
@@ -197,18 +202,22 @@ class CoverageViewSetTests(APITestCase):
             },
         ]
 
-        build_report_from_commit.assert_called_once_with(self.commit2)
+        build_files_table.assert_called_once_with(self.commit2)
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree_missing_sha(self, build_report_from_commit):
-        build_report_from_commit.return_value = sample_report()
+    @patch("services.report.build_files_table")
+    def test_tree_missing_sha(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
 
         res = self._tree(sha="wrong")
         assert res.status_code == 404
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree_branch(self, build_report_from_commit):
-        build_report_from_commit.return_value = sample_report()
+    @patch("services.report.build_files_table")
+    def test_tree_branch(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
 
         res = self._tree(branch="test-branch")
         assert res.status_code == 200
@@ -264,18 +273,92 @@ class CoverageViewSetTests(APITestCase):
             },
         ]
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_files_table.assert_called_once_with(self.commit3)
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree_missing_branch(self, build_report_from_commit):
-        build_report_from_commit.return_value = sample_report()
+    @patch("services.report.build_files_table")
+    def test_tree_missing_branch(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
 
         res = self._tree(branch="wrong-branch")
         assert res.status_code == 404
 
-    @patch("services.report.build_report_from_commit")
-    def test_tree_missing_report(self, build_report_from_commit):
-        build_report_from_commit.return_value = None
+    @patch("services.report.build_files_table")
+    def test_tree_missing_report(self, build_files_table):
+        build_files_table.return_value = None
 
         res = self._tree()
         assert res.status_code == 404
+
+    @patch("services.report.build_files_table")
+    def test_tree_invalid_max_depth(self, build_files_table):
+        build_files_table.return_value = FileSummaryTable.from_files(
+            sample_report()._files
+        )
+
+        res = self._tree(max_depth="abc")
+        assert res.status_code == 400
+        assert "max_depth" in res.json()
+
+        res = self._tree(max_depth=0)
+        assert res.status_code == 400
+
+    @patch("services.report._new_report_builder_enabled")
+    def test_tree_legacy_report(self, new_report_builder_enabled):
+        new_report_builder_enabled.return_value = False
+        commit = CommitFactory(
+            author=self.current_owner,
+            repository=self.repo,
+            _report={
+                "files": {
+                    "foo/file1.py": [
+                        0,
+                        [0, 8, 5, 3, 0, "62.50000", 0, 0, 0, 0, 0, 0, 0],
+                        [[0, 8, 5, 3, 0, "62.50000", 0, 0, 0, 0, 0, 0, 0]],
+                        None,
+                    ],
+                    "file3.py": [
+                        1,
+                        [0, 1, 1, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0],
+                        [[0, 1, 1, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0]],
+                        None,
+                    ],
+                },
+                "sessions": {},
+            },
+        )
+
+        res = self._tree(sha=commit.commitid)
+        assert res.status_code == 200
+        assert res.json() == [
+            {
+                "name": "foo",
+                "full_path": "foo",
+                "coverage": 62.5,
+                "lines": 8,
+                "hits": 5,
+                "partials": 0,
+                "misses": 3,
+                "children": [
+                    {
+                        "name": "file1.py",
+                        "full_path": "foo/file1.py",
+                        "coverage": 62.5,
+                        "lines": 8,
+                        "hits": 5,
+                        "partials": 0,
+                        "misses": 3,
+                    }
+                ],
+            },
+            {
+                "name": "file3.py",
+                "full_path": "file3.py",
+                "coverage": 100.0,
+                "lines": 1,
+                "hits": 1,
+                "partials": 0,
+                "misses": 0,
+            },
+        ]
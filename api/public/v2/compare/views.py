@@ -14,7 +14,11 @@ from api.shared.compare.serializers import (
     FlagComparisonSerializer,
 )
 from core.models import Commit
-from services.components import ComponentComparison, commit_components
+from services.components import (
+    ComponentComparison,
+    ComponentsTotals,
+    commit_components,
+)
 from services.decorators import torngit_safe
 
 from .serializers import ComparisonSerializer, ComponentComparisonSerializer
@@ -119,8 +123,11 @@ class CompareViewSet(
         """
         comparison = self.get_object()
         components = commit_components(comparison.head_commit, request.user)
+        # the totals of all the components are computed together
+        components_totals = ComponentsTotals(comparison, components)
         component_comparisons = [
-            ComponentComparison(comparison, component) for component in components
+            ComponentComparison(comparison, component, components_totals)
+            for component in components
         ]
 
         serializer = ComponentComparisonSerializer(component_comparisons, many=True)
@@ -10,6 +10,7 @@ from rest_framework.response import Response
 from shared.reports.resources import Report
 from shared.utils.match import match
 
+import services.report as report_service
 from api.public.v2.report.serializers import (
     CoverageReportSerializer,
     FileReportSerializer,
@@ -17,7 +18,11 @@ from api.public.v2.report.serializers import (
 from api.public.v2.schema import repo_parameters
 from api.shared.mixins import RepoPropertyMixin
 from api.shared.permissions import RepositoryArtifactPermissions, SuperTokenPermissions
-from api.shared.report.serializers import TreeSerializer
+from api.shared.report.serializers import (
+    TreeSerializer,
+    tree_max_depth,
+    tree_response,
+)
 from codecov_auth.authentication import (
     SuperTokenAuthentication,
     UserTokenAuthentication,
@@ -231,6 +236,18 @@ class ReportViewSet(BaseReportViewSet):
                 OpenApiParameter.QUERY,
                 description="starting path of the traversal (default is root path)",
             ),
+            OpenApiParameter(
+                "page_size",
+                OpenApiTypes.INT,
+                OpenApiParameter.QUERY,
+                description="paginate the top-level entries with this many entries per page",
+            ),
+            OpenApiParameter(
+                "page",
+                OpenApiTypes.INT,
+                OpenApiParameter.QUERY,
+                description="page of top-level entries to return when `page_size` is given",
+            ),
         ],
         responses={200: TreeSerializer},
     )
@@ -249,18 +266,15 @@ class ReportViewSet(BaseReportViewSet):
 
         * `depth` - how deep in the tree to traverse (default=1)
         * `path` - path in the tree from which to start the traversal (default is the root)
+        * `page_size` - paginate the top-level entries (the response is then a paginated list)
         """
         report = self.get_object()
         path = request.query_params.get("path")
+        max_depth = tree_max_depth(request, "depth", default=1)
         paths = ReportPaths(report, path=path)
-        serializer = TreeSerializer(
-            paths.single_directory(),
-            many=True,
-            context={
-                "max_depth": int(request.query_params.get("depth", 1)),
-            },
+        return tree_response(
+            request, paths.lazy_single_directory(max_depth=max_depth), max_depth, self
         )
-        return Response(serializer.data)
 
 
 @extend_schema(
@@ -310,7 +324,7 @@ class FileReportViewSet(
             raise ValidationError("walk_back must be <= 20")
 
         self.commit = self.get_commit()
-        report = self.commit.full_report
+        report = self._file_report(self.commit)
 
         oldest_sha = self.request.query_params.get("oldest_sha")
 
@@ -330,7 +344,7 @@ class FileReportViewSet(
                 if not self.commit:
                     report = None
                     break
-                report = self.commit.full_report
+                report = self._file_report(self.commit)
 
                 if oldest_sha and oldest_sha == self.commit.commitid:
                     break
@@ -340,6 +354,12 @@ class FileReportViewSet(
 
         return report.get(self.path)
 
+    def _file_report(self, commit: Commit) -> Optional[Report]:
+        # only a single file is looked at so avoid downloading every file's chunk
+        return report_service.build_report_from_commit(
+            commit, report_class=report_service.RangedChunksReport
+        )
+
     def get_serializer_context(self, *args, **kwargs):
         context = super().get_serializer_context(*args, **kwargs)
         context.update(
@@ -13,6 +13,7 @@ from codecov_auth.tests.factories import OwnerFactory, UserTokenFactory
 from core.models import Branch
 from core.tests.factories import BranchFactory, CommitFactory, RepositoryFactory
 from services.components import Component
+from services.report import RangedChunksReport
 from utils.test_utils import APIClient
 
 
@@ -129,7 +130,9 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_report_from_commit.assert_called_once_with(
+            self.commit3, report_class=RangedChunksReport
+        )
 
     @patch("services.report.build_report_from_commit")
     def test_file_report_no_walk_back(
@@ -141,7 +144,9 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="foo/file1.py")
         assert res.status_code == 404
 
-        build_report_from_commit.assert_called_once_with(self.commit3)
+        build_report_from_commit.assert_called_once_with(
+            self.commit3, report_class=RangedChunksReport
+        )
 
     @patch("services.report.build_report_from_commit")
     def test_file_report_not_enough_walk_back(
@@ -154,7 +159,10 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 404
 
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -199,7 +207,11 @@ class FileReportViewSetTestCase(TestCase):
         }
 
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+                call(self.commit1, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -216,7 +228,10 @@ class FileReportViewSetTestCase(TestCase):
 
         # does not walk back to commit1
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -240,7 +255,11 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 404
 
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+                call(self.commit1, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -256,7 +275,9 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="foo/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_from_commit.assert_has_calls(
+            [call(self.commit3, report_class=RangedChunksReport)]
+        )
 
     @patch("services.report.build_report_from_commit")
     def test_file_report_walk_back_commit_not_complete(
@@ -307,7 +328,9 @@ class FileReportViewSetTestCase(TestCase):
             "commit_file_url": f"{settings.CODECOV_DASHBOARD_URL}/{self.service}/{self.username}/{self.repo_name}/commit/{self.commit3.commitid}/blob/foo/file1.py",
         }
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_from_commit.assert_has_calls(
+            [call(self.commit3, report_class=RangedChunksReport)]
+        )
 
     @patch("services.report.build_report_from_commit")
     def test_file_report_walk_back_found(
@@ -320,7 +343,10 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 200
 
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -338,7 +364,11 @@ class FileReportViewSetTestCase(TestCase):
         assert res.status_code == 404
 
         build_report_from_commit.assert_has_calls(
-            [call(self.commit3), call(self.commit2), call(self.commit1)]
+            [
+                call(self.commit3, report_class=RangedChunksReport),
+                call(self.commit2, report_class=RangedChunksReport),
+                call(self.commit1, report_class=RangedChunksReport),
+            ]
         )
 
     @patch("services.report.build_report_from_commit")
@@ -358,4 +388,6 @@ class FileReportViewSetTestCase(TestCase):
         res = self._request_file_report(path="bar/file1.py", walk_back=20)
         assert res.status_code == 404
 
-        build_report_from_commit.assert_has_calls([call(self.commit3)])
+        build_report_from_commit.assert_has_calls(
+            [call(self.commit3, report_class=RangedChunksReport)]
+        )
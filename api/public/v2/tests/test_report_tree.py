@@ -103,6 +103,29 @@ class ReportTreeTests(APITestCase):
 
         build_report_from_commit.assert_called_once_with(self.commit)
 
+    @patch("services.report.build_report_from_commit")
+    def test_tree_paginated(self, build_report_from_commit):
+        build_report_from_commit.return_value = sample_report()
+
+        res = self._tree(page_size=2, page=2)
+        assert res.status_code == 200
+        data = res.json()
+        assert data["count"] == 3
+        assert data["total_pages"] == 2
+        assert data["next"] is None
+        assert data["previous"] is not None
+        assert data["results"] == [
+            {
+                "name": "file3.py",
+                "full_path": "file3.py",
+                "coverage": 100.0,
+                "lines": 1,
+                "hits": 1,
+                "partials": 0,
+                "misses": 0,
+            },
+        ]
+
     @patch("services.report.build_report_from_commit")
     def test_tree_depth(self, build_report_from_commit):
         build_report_from_commit.return_value = sample_report()
@@ -163,6 +186,13 @@ class ReportTreeTests(APITestCase):
 
         build_report_from_commit.assert_called_once_with(self.commit)
 
+    @patch("services.report.build_report_from_commit")
+    def test_tree_invalid_depth(self, build_report_from_commit):
+        build_report_from_commit.return_value = sample_report()
+
+        res = self._tree(depth="abc")
+        assert res.status_code == 400
+
     @patch("services.report.build_report_from_commit")
     def test_tree_path(self, build_report_from_commit):
         build_report_from_commit.return_value = sample_report()
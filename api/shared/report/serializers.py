@@ -1,8 +1,12 @@
 import math
+from typing import Optional, Sequence, Union
 
 from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from services.path import Dir
+from api.shared.pagination import StandardPageNumberPagination
+from services.path import Dir, File
 
 
 class TreeSerializer(serializers.Serializer):
@@ -29,3 +33,42 @@ class TreeSerializer(serializers.Serializer):
                     },
                 ).data
         return res
+
+
+def tree_max_depth(
+    request: Request, param: str, default: Optional[int] = None
+) -> Optional[int]:
+    """
+    Validates the tree depth query param, a non-integer or non-positive
+    value results in a 400 response.
+    """
+    value = request.query_params.get(param)
+    if not value:
+        return default
+    try:
+        return serializers.IntegerField(min_value=1).run_validation(value)
+    except serializers.ValidationError as e:
+        raise serializers.ValidationError({param: e.detail})
+
+
+def tree_response(
+    request: Request,
+    items: Sequence[Union[File, Dir]],
+    max_depth: Optional[int],
+    view=None,
+) -> Response:
+    """
+    Serializes a tree (up to `max_depth` levels deep).  When the `page_size`
+    query param is given the top-level entries are paginated and only the
+    entries in the requested page are materialized.
+    """
+    context = {"max_depth": max_depth if max_depth is not None else math.inf}
+
+    if "page_size" not in request.query_params:
+        return Response(TreeSerializer(items, many=True, context=context).data)
+
+    paginator = StandardPageNumberPagination()
+    page = paginator.paginate_queryset(items, request, view=view)
+    return paginator.get_paginated_response(
+        TreeSerializer(page, many=True, context=context).data
+    )
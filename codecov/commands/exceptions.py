@@ -18,3 +18,7 @@ class Unauthorized(BaseException):
 
 class NotFound(BaseException):
     message = "Cant find the requested resource"
+
+
+class TooManyRequests(BaseException):
+    message = "Too many requests, try again later"
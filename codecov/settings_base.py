@@ -448,6 +448,39 @@ CORS_ALLOWED_ORIGINS = []
 
 GRAPHQL_PLAYGROUND = False
 
+# in-process cache of the parsed and validated GraphQL query documents
+# (bounded by the total size of the query texts)
+GRAPHQL_QUERY_CACHE_MAX_BYTES = get_config(
+    "setup", "graphql", "query_cache_max_bytes", default=8 * 1024 * 1024
+)
+# Apollo automatic persisted queries (the query texts are stored in redis)
+GRAPHQL_PERSISTED_QUERIES_ENABLED = get_config(
+    "setup", "graphql", "persisted_queries_enabled", default=False
+)
+GRAPHQL_PERSISTED_QUERIES_TTL = get_config(
+    "setup", "graphql", "persisted_queries_ttl", default=7 * 24 * 60 * 60
+)
+# estimated cost above which GraphQL queries are rejected before execution
+# (see `graphql_api.query_cost`), unlimited by default
+GRAPHQL_QUERY_MAX_COST = get_config("setup", "graphql", "query_max_cost", default=None)
+# token bucket limiting the total cost of the queries of each owner
+GRAPHQL_QUERY_COST_BUDGET_ENABLED = get_config(
+    "setup", "graphql", "query_cost_budget_enabled", default=False
+)
+GRAPHQL_QUERY_COST_BUDGET_CAPACITY = get_config(
+    "setup", "graphql", "query_cost_budget_capacity", default=50000
+)
+# cost refilled per second
+GRAPHQL_QUERY_COST_BUDGET_REFILL_RATE = get_config(
+    "setup", "graphql", "query_cost_budget_refill_rate", default=500
+)
+# number of trusted proxies (e.g. the load balancer) appending to X-Forwarded-For
+# in front of the API, anonymous queries are budgeted by the client IP they
+# recorded (with 0 they are budgeted by `REMOTE_ADDR`)
+GRAPHQL_QUERY_COST_TRUSTED_PROXIES = get_config(
+    "setup", "graphql", "query_cost_trusted_proxies", default=0
+)
+
 UPLOAD_THROTTLING_ENABLED = True
 
 CANNY_SSO_PRIVATE_TOKEN = get_config("canny", "sso_private_token", default="")
@@ -469,6 +502,63 @@ SENTRY_OAUTH_CLIENT_SECRET = get_config("sentry", "client_secret") or get_config
 # TODO: we can eventually get rid of this once it's confirmed working well for many repos
 REPORT_BUILDER_REPO_IDS = get_config("setup", "report_builder", "repo_ids", default=[])
 
+# two-tier (in-process + redis) cache for the data needed to build a commit's report
+REPORT_CACHE_ENABLED = get_config("setup", "report_cache", "enabled", default=False)
+REPORT_CACHE_MEMORY_MAX_BYTES = get_config(
+    "setup", "report_cache", "memory_max_bytes", default=256 * 1024 * 1024
+)
+REPORT_CACHE_REDIS_TTL = get_config(
+    "setup", "report_cache", "redis_ttl", default=24 * 60 * 60
+)
+REPORT_CACHE_REDIS_MAX_BYTES = get_config(
+    "setup", "report_cache", "redis_max_bytes", default=32 * 1024 * 1024
+)
+
+# walk the lines of reports with chunks larger than the threshold (to compute
+# flag and component totals) in a process pool
+REPORT_PARSE_PROCESS_POOL_ENABLED = get_config(
+    "setup", "report_parsing", "process_pool_enabled", default=False
+)
+REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES = get_config(
+    "setup", "report_parsing", "threshold_bytes", default=20 * 1024 * 1024
+)
+REPORT_PARSE_PROCESS_POOL_WORKERS = get_config(
+    "setup", "report_parsing", "workers", default=2
+)
+
+# how long (in seconds) to wait for another worker building the same report
+REPORT_BUILD_LOCK_TIMEOUT = get_config(
+    "setup", "report_cache", "build_lock_timeout", default=30
+)
+
+# redis cache for immutable provider data (e.g. the diff between two commits)
+PROVIDER_CACHE_ENABLED = get_config("setup", "provider_cache", "enabled", default=False)
+PROVIDER_CACHE_COMPARISON_TTL = get_config(
+    "setup", "provider_cache", "comparison_ttl", default=30 * 24 * 60 * 60
+)
+PROVIDER_CACHE_MAX_BYTES = get_config(
+    "setup", "provider_cache", "max_bytes", default=8 * 1024 * 1024
+)
+PROVIDER_CACHE_SOURCE_TTL = get_config(
+    "setup", "provider_cache", "source_ttl", default=7 * 24 * 60 * 60
+)
+# sources larger than this (compressed) are not cached
+PROVIDER_CACHE_SOURCE_MAX_OBJECT_BYTES = get_config(
+    "setup", "provider_cache", "source_max_object_bytes", default=1024 * 1024
+)
+# total (compressed) size of the cached sources
+PROVIDER_CACHE_SOURCE_MAX_BYTES = get_config(
+    "setup", "provider_cache", "source_max_bytes", default=512 * 1024 * 1024
+)
+# max concurrent source fetches when prefetching the sources of many files
+PROVIDER_SOURCE_FETCH_CONCURRENCY = get_config(
+    "setup", "provider_cache", "source_fetch_concurrency", default=8
+)
+# how long (in seconds) to wait for another worker fetching the same data
+PROVIDER_CACHE_LOCK_TIMEOUT = get_config(
+    "setup", "provider_cache", "lock_timeout", default=15
+)
+
 SENTRY_ENV = os.environ.get("CODECOV_ENV", False)
 SENTRY_DSN = os.environ.get("SERVICES__SENTRY__SERVER_DSN", None)
 if SENTRY_DSN is not None:
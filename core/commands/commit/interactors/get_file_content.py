@@ -1,6 +1,7 @@
 import logging
 
 from codecov.commands.base import BaseInteractor
+from services.provider_cache import fetch_source
 from services.repo_providers import RepoProviderService
 
 log = logging.getLogger(__name__)
@@ -12,8 +13,10 @@ class GetFileContentInteractor(BaseInteractor):
             repository_service = RepoProviderService().get_adapter(
                 owner=self.current_owner, repo=commit.repository
             )
-            content = await repository_service.get_source(path, commit.commitid)
-            return content.get("content").decode("utf-8")
+            content = await fetch_source(
+                repository_service, commit.repository_id, commit.commitid, path
+            )
+            return content.decode("utf-8")
         # TODO raise this to the API so we can handle it.
         except Exception as e:
             log.info(
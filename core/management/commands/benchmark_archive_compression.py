@@ -0,0 +1,104 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from services.archive import ArchiveEncoding, compress, decompress, zstandard
+from services.report import build_report
+
+END_OF_CHUNK = "\n<<<<< end_of_chunk >>>>>\n"
+
+
+def synthetic_report(num_files: int, lines_per_file: int, num_sessions: int):
+    """
+    Generates chunks and a files dictionary that look like what the worker
+    writes for a large report.
+    """
+    rand = random.Random(0)
+    chunks = []
+    files = {}
+    for file_index in range(num_files):
+        lines = ["{}"]
+        hits = misses = 0
+        for _ in range(lines_per_file):
+            if rand.random() < 0.3:
+                # lines without coverage info are empty in the chunks
+                lines.append("")
+                continue
+            coverage = rand.choice([0, 1, 1, 1])
+            hits += coverage
+            misses += 1 - coverage
+            sessions = ", ".join(
+                f"[{sid}, {coverage}]" for sid in range(rand.randint(1, num_sessions))
+            )
+            lines.append(f"[{coverage}, null, [{sessions}]]")
+        chunks.append("\n".join(lines))
+
+        totals = [0, hits + misses, hits, misses, 0, "0", 0, 0, 0, 0, 0, 0, 0]
+        files[f"src/module_{file_index // 100}/file_{file_index}.py"] = [
+            file_index,
+            totals,
+            [totals],
+            None,
+        ]
+    return END_OF_CHUNK.join(chunks), files
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the size and read latency of report chunks and JSON archive "
+        "data stored uncompressed, gzip-compressed and zstd-compressed."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--files", type=int, default=5000)
+        parser.add_argument("--lines", type=int, default=200)
+        parser.add_argument("--sessions", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        chunks, files = synthetic_report(
+            options["files"], options["lines"], options["sessions"]
+        )
+        files_json = json.dumps(files)
+
+        encodings = [None, ArchiveEncoding.gzip]
+        if zstandard is not None:
+            encodings.append(ArchiveEncoding.zstd)
+
+        self.stdout.write(
+            f"{'encoding':<10}{'chunks bytes':>16}{'json bytes':>14}"
+            f"{'write ms':>12}{'parse ms':>12}"
+        )
+        for encoding in encodings:
+            start = time.perf_counter()
+            stored_chunks = compress(chunks.encode(), encoding)
+            stored_files = compress(files_json.encode(), encoding)
+            write_ms = (time.perf_counter() - start) * 1000
+
+            parse_ms = min(
+                self._parse(stored_chunks, stored_files)
+                for _ in range(options["repeat"])
+            )
+            self.stdout.write(
+                f"{encoding.value if encoding else 'none':<10}"
+                f"{len(stored_chunks):>16}{len(stored_files):>14}"
+                f"{write_ms:>12.1f}{parse_ms:>12.1f}"
+            )
+
+    def _parse(self, stored_chunks: bytes, stored_files: bytes) -> float:
+        """
+        Time (in ms) to go from stored bytes to a report with every line parsed.
+        """
+        start = time.perf_counter()
+        report = build_report(
+            chunks=decompress(stored_chunks).decode(),
+            files=json.loads(decompress(stored_files)),
+            sessions={},
+            totals=None,
+        )
+        for file_report in report.file_reports():
+            for _ in file_report.lines:
+                pass
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,196 @@
+import copy
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from services.comparison import (
+    FileComparisonTraverseManager,
+    _is_added,
+    _is_removed,
+)
+
+
+def synthetic_diff(num_lines: int, hunk_lines: int, changed_ratio: float = 0.5):
+    """
+    Generates the segments and head source of a diff over a file with (about)
+    `num_lines` lines.  Hunks are `hunk_lines` long and roughly `changed_ratio`
+    of the file is inside a hunk - a `hunk_lines` of `num_lines` (and a
+    `changed_ratio` of 1) gives a single hunk covering the whole file, like a
+    regenerated file would.
+    """
+    rand = random.Random(0)
+    segments = []
+    src = []
+    base_ln = head_ln = 1
+    while head_ln <= num_lines:
+        if rand.random() >= changed_ratio:
+            for _ in range(hunk_lines):
+                src.append("unchanged line")
+                base_ln += 1
+                head_ln += 1
+            continue
+
+        base_start, head_start = base_ln, head_ln
+        lines = []
+        for _ in range(hunk_lines):
+            kind = rand.choice("+- ")
+            if kind == "+":
+                lines.append("+added line")
+                src.append("added line")
+                head_ln += 1
+            elif kind == "-":
+                lines.append("-removed line")
+                base_ln += 1
+            else:
+                lines.append(" context line")
+                src.append("context line")
+                base_ln += 1
+                head_ln += 1
+        segments.append(
+            {
+                "header": [
+                    str(base_start),
+                    str(base_ln - base_start),
+                    str(head_start),
+                    str(head_ln - head_start),
+                ],
+                "lines": lines,
+            }
+        )
+    return segments, src, base_ln, head_ln
+
+
+class LegacyFileComparisonTraverseManager(FileComparisonTraverseManager):
+    """
+    The previous traversal: copies the segments and pops visited lines (and
+    segments) off the head of their lists, re-parsing the hunk header of the
+    current segment for every line.  Kept as the benchmark's baseline.
+    """
+
+    def __init__(self, head_file_eof=0, base_file_eof=0, segments=[], src=[]):
+        self.head_file_eof = head_file_eof
+        self.base_file_eof = base_file_eof
+        self.segments = copy.deepcopy(segments)
+        self.src = src
+
+        if self.segments:
+            self.base_ln = min(1, int(self.segments[0]["header"][0]))
+            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+        else:
+            self.base_ln, self.head_ln = 1, 1
+
+    def traverse_finished(self):
+        if self.segments:
+            return False
+        if self.src:
+            return self.head_ln > len(self.src)
+        return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
+
+    def traversing_diff(self):
+        if self.segments == []:
+            return False
+
+        base_ln_within_offset = (
+            int(self.segments[0]["header"][0])
+            <= self.base_ln
+            < int(self.segments[0]["header"][0])
+            + int(self.segments[0]["header"][1] or 1)
+        )
+        head_ln_within_offset = (
+            int(self.segments[0]["header"][2])
+            <= self.head_ln
+            < int(self.segments[0]["header"][2])
+            + int(self.segments[0]["header"][3] or 1)
+        )
+        return base_ln_within_offset or head_ln_within_offset
+
+    def pop_line(self):
+        if self.traversing_diff():
+            return self.segments[0]["lines"].pop(0)
+
+        if self.src:
+            return self.src[self.head_ln - 1]
+
+    def apply(self, visitors):
+        while not self.traverse_finished():
+            line_value = self.pop_line()
+            is_diff = self.traversing_diff()
+
+            for visitor in visitors:
+                visitor(
+                    None if is_diff and _is_added(line_value) else self.base_ln,
+                    None if is_diff and _is_removed(line_value) else self.head_ln,
+                    line_value,
+                    is_diff,
+                )
+
+            if is_diff and _is_added(line_value):
+                self.head_ln += 1
+            elif is_diff and _is_removed(line_value):
+                self.base_ln += 1
+            else:
+                self.head_ln += 1
+                self.base_ln += 1
+
+            if self.segments and not self.segments[0]["lines"]:
+                self.segments.pop(0)
+
+
+def traverse(manager_class, segments, src, base_file_eof, head_file_eof) -> list:
+    calls = []
+    manager_class(
+        head_file_eof=head_file_eof,
+        base_file_eof=base_file_eof,
+        segments=segments,
+        src=src,
+    ).apply([lambda *args: calls.append(args)])
+    return calls
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the time FileComparisonTraverseManager takes to traverse large "
+        "synthetic diffs against the previous (list-popping) implementation."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--lines", type=int, nargs="+", default=[10000, 50000, 100000, 200000]
+        )
+        parser.add_argument("--hunk-lines", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'lines':>8}{'hunks':>8}{'legacy ms':>12}{'new ms':>10}{'speedup':>10}"
+        )
+        for num_lines in options["lines"]:
+            # many small hunks, then a single hunk over the whole file
+            for hunk_lines, changed_ratio in [
+                (options["hunk_lines"], 0.5),
+                (num_lines, 1.0),
+            ]:
+                diff = synthetic_diff(num_lines, hunk_lines, changed_ratio)
+                legacy_ms = self._time(
+                    LegacyFileComparisonTraverseManager, diff, options["repeat"]
+                )
+                new_ms = self._time(
+                    FileComparisonTraverseManager, diff, options["repeat"]
+                )
+                assert traverse(FileComparisonTraverseManager, *diff) == traverse(
+                    LegacyFileComparisonTraverseManager, *diff
+                ), "visitor callbacks differ"
+
+                self.stdout.write(
+                    f"{num_lines:>8}{len(diff[0]):>8}{legacy_ms:>12.1f}"
+                    f"{new_ms:>10.1f}{legacy_ms / new_ms:>9.1f}x"
+                )
+
+    def _time(self, manager_class, diff, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            traverse(manager_class, *diff)
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
@@ -0,0 +1,67 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandParser
+from shared.reports.resources import ReportFile
+
+from core.management.commands.benchmark_diff_traversal import synthetic_diff
+from services.comparison import FileComparison
+
+
+def synthetic_report_file(num_lines: int, num_sessions: int) -> ReportFile:
+    rand = random.Random(0)
+    lines = []
+    for _ in range(num_lines):
+        coverage = rand.choice([0, 1, 1, "1/2"])
+        sessions = [[sid, coverage, None, None, None] for sid in range(num_sessions)]
+        lines.append([coverage, None, sessions, None, None])
+    return ReportFile("file.py", lines=lines)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time, peak memory and number of live allocations needed "
+        "to build the segments of a large file comparison (as the impacted file "
+        "segments resolver does)."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--lines", type=int, nargs="+", default=[10000, 50000, 200000]
+        )
+        parser.add_argument("--sessions", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'lines':>8}{'segments':>10}{'ms':>10}{'peak MB':>10}"
+            f"{'live MB':>10}{'live blocks':>13}"
+        )
+        for num_lines in options["lines"]:
+            segments, src, _, _ = synthetic_diff(num_lines, 100, 0.3)
+            # report lines past the end of the diff are never read
+            base_file = synthetic_report_file(num_lines * 2, options["sessions"])
+            head_file = synthetic_report_file(num_lines * 2, options["sessions"])
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            file_comparison = FileComparison(
+                base_file,
+                head_file,
+                diff_data={"segments": segments},
+                src=src,
+                bypass_max_diff=True,
+            )
+            num_segments = len(file_comparison.segments)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            live, peak = tracemalloc.get_traced_memory()
+            live_blocks = sum(
+                stat.count
+                for stat in tracemalloc.take_snapshot().statistics("filename")
+            )
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{num_lines:>8}{num_segments:>10}{elapsed_ms:>10.0f}"
+                f"{peak / 1e6:>10.1f}{live / 1e6:>10.1f}{live_blocks:>13}"
+            )
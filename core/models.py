@@ -16,7 +16,7 @@ from shared.reports.resources import Report
 
 from codecov.models import BaseCodecovModel
 from utils.config import should_write_data_to_storage_config_check
-from utils.model_utils import ArchiveField
+from utils.model_utils import ArchiveField, ArchiveFieldQuerySet
 
 from .encoders import ReportJSONEncoder
 from .managers import RepositoryManager
@@ -315,6 +315,8 @@ class Commit(models.Model):
         default_value_class=dict,
     )
 
+    objects = ArchiveFieldQuerySet.as_manager()
+
 
 class PullStates(models.TextChoices):
     OPEN = "open"
@@ -399,6 +401,8 @@ class Pull(models.Model):
         should_write_to_storage_fn=should_write_to_storage, default_value_class=dict
     )
 
+    objects = ArchiveFieldQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         self.updatestamp = timezone.now()
         super().save(*args, **kwargs)
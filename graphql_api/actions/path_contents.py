@@ -1,7 +1,10 @@
-from typing import Iterable, Union
+import base64
+from collections.abc import Sequence
+from typing import Iterable, Optional, Union
 
+from codecov.commands.exceptions import ValidationError
 from graphql_api.types.enums import PathContentDisplayType
-from services.path import Dir, File
+from services.path import Dir, File, LazyPathNodes
 
 
 def partition_list_into_files_and_directories(
@@ -36,16 +39,85 @@ def sort_path_contents(
     if filter_parameter and filter_direction:
         parameter_value = filter_parameter.value
         direction_value = filter_direction.value
+        display_type = filters.get("display_type", {})
+        directories_first = (
+            parameter_value == "name"
+            and display_type is not PathContentDisplayType.LIST
+        )
+
+        if isinstance(items, LazyPathNodes):
+            # sort the entries so that only the requested page is built
+            items = items.sorted(
+                key=lambda entry: getattr(entry, parameter_value),
+                reverse=direction_value == "descending",
+            )
+            if directories_first:
+                items = items.sorted(key=lambda entry: not entry.is_dir)
+            return items
+
         items = sorted(
             items,
             key=lambda item: getattr(item, parameter_value),
             reverse=direction_value == "descending",
         )
-        display_type = filters.get("display_type", {})
-        if (
-            parameter_value == "name"
-            and display_type is not PathContentDisplayType.LIST
-        ):
+        if directories_first:
             items = sort_list_by_directory(items=items)
 
     return items
+
+
+def encode_path_contents_cursor(index: int) -> str:
+    return base64.b64encode(f"index:{index}".encode()).decode()
+
+
+def decode_path_contents_cursor(cursor: str) -> int:
+    try:
+        prefix, index = base64.b64decode(cursor.encode()).decode().split(":")
+        assert prefix == "index"
+        return int(index)
+    except (ValueError, AssertionError, UnicodeDecodeError):
+        raise ValidationError("Invalid cursor")
+
+
+def paginate_path_contents(
+    items: Sequence[Union[File, Dir]],
+    first: Optional[int] = None,
+    after: Optional[str] = None,
+) -> dict:
+    """
+    Returns the page of `items` after the `after` cursor (all remaining items
+    unless `first` is given).  Only the items in the page (and the one after it)
+    are accessed, so lazy sequences from `ReportPaths` only materialize the page.
+    The total count is resolved lazily since counting search results means
+    checking every file.
+    """
+    if first is not None and first < 0:
+        raise ValidationError("first must be a positive integer")
+
+    start = decode_path_contents_cursor(after) + 1 if after else 0
+    if first is None:
+        results = list(items[start:])
+        has_next_page = False
+    else:
+        # one extra item tells us whether there's a next page
+        results = list(items[start : start + first + 1])
+        has_next_page = len(results) > first
+        results = results[:first]
+
+    def total_count(*args, **kwargs) -> int:
+        return len(items)
+
+    return {
+        "results": results,
+        "total_count": total_count,
+        "page_info": {
+            "has_next_page": has_next_page,
+            "has_previous_page": start > 0,
+            "start_cursor": encode_path_contents_cursor(start) if results else None,
+            "end_cursor": (
+                encode_path_contents_cursor(start + len(results) - 1)
+                if results
+                else None
+            ),
+        },
+    }
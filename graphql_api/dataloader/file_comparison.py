@@ -0,0 +1,44 @@
+from codecov.db import sync_to_async
+from services.comparison import Comparison, MissingComparisonReport
+
+from .loader import BaseLoader
+
+
+class FileComparisonLoader(BaseLoader):
+    """
+    Loads the file comparisons (with their sources and segments) of the
+    request's comparison, keyed by head path.
+
+    All the paths loaded in the same tick (e.g. the segments of every impacted
+    file of a pull) are handled in a single batch: their sources are fetched
+    from the provider concurrently (see `Comparison.prefetch_sources`) and the
+    segments are then computed in one pass.
+    """
+
+    def __init__(self, info, *args, **kwargs):
+        self.comparison: Comparison = info.context["comparison"]
+        return super().__init__(info, *args, **kwargs)
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        try:
+            self.comparison.validate()
+        except MissingComparisonReport:
+            return [None] * len(keys)
+
+        # fetched together by the first `get_file_comparison` call below
+        self.comparison.prefetch_sources(keys)
+
+        results = []
+        for path in keys:
+            try:
+                file_comparison = self.comparison.get_file_comparison(
+                    path, with_src=True, bypass_max_diff=True
+                )
+                file_comparison.segments
+            except Exception as e:
+                # only fails the load of this path
+                results.append(e)
+            else:
+                results.append(file_comparison)
+        return results
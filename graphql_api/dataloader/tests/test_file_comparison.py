@@ -0,0 +1,65 @@
+from unittest.mock import MagicMock
+
+import pytest
+from asgiref.sync import async_to_sync
+from shared.torngit.exceptions import TorngitObjectNotFoundError
+
+from graphql_api.dataloader.file_comparison import FileComparisonLoader
+from services.comparison import MissingComparisonReport
+
+
+class GraphQLResolveInfo:
+    def __init__(self, comparison):
+        self.context = {"comparison": comparison}
+
+
+async def load_file_comparisons(comparison, paths):
+    info = GraphQLResolveInfo(comparison)
+    loader = FileComparisonLoader.loader(info)
+    return await loader.load_many(paths)
+
+
+def get_file_comparison(path, with_src, bypass_max_diff):
+    if path == "missing.py":
+        raise TorngitObjectNotFoundError(response_data=404, message="not found")
+    return MagicMock(name=path)
+
+
+def test_file_comparison_loader():
+    comparison = MagicMock()
+    comparison.get_file_comparison.side_effect = get_file_comparison
+
+    results = async_to_sync(load_file_comparisons)(comparison, ["a.py", "b.py"])
+
+    assert len(results) == 2
+    # all the sources are fetched together
+    comparison.prefetch_sources.assert_called_once_with(["a.py", "b.py"])
+    assert [call.args[0] for call in comparison.get_file_comparison.call_args_list] == [
+        "a.py",
+        "b.py",
+    ]
+
+
+def test_file_comparison_loader_error():
+    comparison = MagicMock()
+    comparison.get_file_comparison.side_effect = get_file_comparison
+
+    async def load():
+        loader = FileComparisonLoader.loader(GraphQLResolveInfo(comparison))
+        found = loader.load("a.py")
+        with pytest.raises(TorngitObjectNotFoundError):
+            await loader.load("missing.py")
+        return await found
+
+    assert async_to_sync(load)() is not None
+    comparison.prefetch_sources.assert_called_once_with(["a.py", "missing.py"])
+
+
+def test_file_comparison_loader_missing_comparison_report():
+    comparison = MagicMock()
+    comparison.validate.side_effect = MissingComparisonReport()
+
+    results = async_to_sync(load_file_comparisons)(comparison, ["a.py", "b.py"])
+
+    assert results == [None, None]
+    comparison.get_file_comparison.assert_not_called()
@@ -0,0 +1,24 @@
+from graphql.type.definition import GraphQLResolveInfo
+
+from services.comparison import ComparisonReportBatch
+from services.report import ReportRegistry
+
+
+def report_registry(info: GraphQLResolveInfo) -> ReportRegistry:
+    """
+    The reports built while resolving the current request (shared by all of
+    its resolvers).
+    """
+    if "reports" not in info.context:
+        info.context["reports"] = ReportRegistry()
+    return info.context["reports"]
+
+
+def comparison_report_batch(info: GraphQLResolveInfo) -> ComparisonReportBatch:
+    """
+    The comparison reports of the current request, whose raw data is read
+    from storage in batches.
+    """
+    if "comparison_reports" not in info.context:
+        info.context["comparison_reports"] = ComparisonReportBatch()
+    return info.context["comparison_reports"]
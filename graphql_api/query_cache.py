@@ -0,0 +1,191 @@
+import hashlib
+import logging
+from typing import Any, List, NamedTuple, Optional
+
+from ariadne.graphql import validate_query
+from ariadne.types import ValidationRules
+from django.conf import settings
+from graphql import DocumentNode, GraphQLError, GraphQLSchema, parse
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+from services.report_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+
+class ParsedQuery(NamedTuple):
+    """
+    A query document parsed and validated against a schema.
+    """
+
+    query: str
+    document: DocumentNode
+    validation_errors: List[GraphQLError]
+
+
+class PersistedQueryError(Exception):
+    """
+    Error handling an Apollo automatic persisted query (formatted like Apollo
+    Server does, so that clients know to retry with the full query).
+    """
+
+    def __init__(self, message: str, code: Optional[str] = None, status: int = 200):
+        self.message = message
+        self.code = code
+        self.status = status
+
+    def formatted(self) -> dict:
+        error = {"message": self.message}
+        if self.code:
+            error["extensions"] = {"code": self.code}
+        return {"errors": [error]}
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def persisted_query_hash(data: dict) -> Optional[str]:
+    """
+    The sha256 hash sent along an Apollo automatic persisted query, if any.
+    """
+    extensions = data.get("extensions")
+    if not isinstance(extensions, dict):
+        return None
+    persisted_query = extensions.get("persistedQuery")
+    if not isinstance(persisted_query, dict):
+        return None
+    if persisted_query.get("version") != 1:
+        raise PersistedQueryError("Unsupported persisted query version", status=400)
+    return persisted_query.get("sha256Hash")
+
+
+class QueryCache:
+    """
+    In-process LRU cache of the parsed query documents, keyed by the schema and
+    the sha256 hash of the query - the frontend sends the same few documents
+    over and over again.  Validation results are cached separately, keyed by
+    the validation rules (and whether introspection is enabled) as well.
+
+    The query text of automatic persisted queries is also stored in redis so
+    that any worker can parse a query registered by another one.
+    """
+
+    metrics_prefix = "graphql_api.query_cache"
+
+    def __init__(self):
+        self._documents = LRUCache(
+            max_bytes=settings.GRAPHQL_QUERY_CACHE_MAX_BYTES,
+            metrics_prefix=self.metrics_prefix,
+        )
+        self._validation_errors = LRUCache(
+            max_bytes=settings.GRAPHQL_QUERY_CACHE_MAX_BYTES,
+            metrics_prefix=f"{self.metrics_prefix}.validation",
+        )
+
+    def persisted_query_key(self, sha256_hash: str) -> str:
+        return f"graphql/persisted_query/{sha256_hash}"
+
+    def get(
+        self,
+        schema: GraphQLSchema,
+        data: dict,
+        introspection: bool = True,
+        validation_rules: Optional[ValidationRules] = None,
+        context_value: Optional[Any] = None,
+    ) -> ParsedQuery:
+        """
+        Returns the parsed query of the request `data`, parsing and validating
+        it on a cache miss.  Requests carrying only the hash of an automatic
+        persisted query are resolved from the caches.
+
+        `validation_rules` are the custom rules to validate the query with (on
+        top of the rules from the spec).  Like in `ariadne.graphql.graphql` they
+        can be a callable, called with `context_value`, the document and `data`.
+
+        Raises `PersistedQueryError` for persisted queries that can't be
+        resolved and `GraphQLError` for queries that can't be parsed.
+        """
+        query = data.get("query")
+        if query is not None and not isinstance(query, str):
+            raise GraphQLError("The query must be a string.")
+
+        sha256_hash = persisted_query_hash(data)
+        persisted = sha256_hash is not None
+        if persisted:
+            if not settings.GRAPHQL_PERSISTED_QUERIES_ENABLED:
+                raise PersistedQueryError(
+                    "PersistedQueryNotSupported", "PERSISTED_QUERY_NOT_SUPPORTED"
+                )
+            if query and query_hash(query) != sha256_hash:
+                raise PersistedQueryError(
+                    "provided sha does not match query", status=400
+                )
+        elif not query:
+            raise GraphQLError("The query must be a string.")
+        else:
+            sha256_hash = query_hash(query)
+
+        key = (schema, sha256_hash)
+        cached = self._documents.get(key)
+        if cached is not None:
+            query, document = cached
+        else:
+            if not query:
+                query = self._get_persisted_query(sha256_hash)
+                if query is None:
+                    raise PersistedQueryError(
+                        "PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND"
+                    )
+            elif persisted:
+                self._set_persisted_query(sha256_hash, query)
+
+            document = parse(query)
+            # the size of the query text stands in for the size of its document
+            self._documents.set(key, (query, document), len(query))
+
+        if callable(validation_rules):
+            validation_rules = validation_rules(context_value, document, data)
+        validation_rules = tuple(validation_rules or ())
+
+        validation_key = (schema, introspection, validation_rules, sha256_hash)
+        validation_errors = self._validation_errors.get(validation_key)
+        if validation_errors is None:
+            validation_errors = validate_query(
+                schema,
+                document,
+                validation_rules or None,
+                enable_introspection=introspection,
+            )
+            self._validation_errors.set(
+                validation_key,
+                validation_errors,
+                len(sha256_hash)
+                + sum(len(error.message) for error in validation_errors),
+            )
+
+        return ParsedQuery(
+            query=query, document=document, validation_errors=validation_errors
+        )
+
+    def _get_persisted_query(self, sha256_hash: str) -> Optional[str]:
+        try:
+            query = get_redis_connection().get(self.persisted_query_key(sha256_hash))
+        except (RedisError, OSError) as e:
+            log.warning("Error reading persisted query", extra=dict(error=e))
+            return None
+        return query.decode() if query is not None else None
+
+    def _set_persisted_query(self, sha256_hash: str, query: str):
+        try:
+            get_redis_connection().set(
+                self.persisted_query_key(sha256_hash),
+                query,
+                ex=settings.GRAPHQL_PERSISTED_QUERIES_TTL,
+            )
+        except (RedisError, OSError) as e:
+            log.warning("Error writing persisted query", extra=dict(error=e))
+
+
+query_cache = QueryCache()
@@ -0,0 +1,269 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLField,
+    GraphQLSchema,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type,
+)
+from graphql.type.definition import GraphQLNamedType
+from redis.exceptions import RedisError
+
+from codecov.commands.exceptions import TooManyRequests, ValidationError
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+# page size of connections fetched without `first` or `last`
+# (see `graphql_api.helpers.connection.queryset_to_connection`)
+DEFAULT_CONNECTION_SIZE = 25
+
+# assumed length of the other (unpaginated) lists
+DEFAULT_LIST_SIZE = 25
+
+# fields returning an object cost 1 and scalars are free, except for these
+# fields which build reports or call the git provider
+FIELD_COSTS = {
+    "Commit.coverageFile": 10,
+    "Commit.pathContents": 10,
+    "Commit.flagNames": 5,
+    "Commit.components": 5,
+    "Commit.criticalFiles": 5,
+    "Commit.compareWithParent": 5,
+    "Commit.yaml": 2,
+    "Pull.compareWithBase": 5,
+    "Repository.criticalFiles": 5,
+    "ImpactedFile.segments": 5,
+}
+
+
+class QueryCostEstimator:
+    """
+    Estimates the cost of executing a (validated) query document before
+    running it: every selected field adds its cost, and the cost of the
+    selections under a list is multiplied by the list's expected length -
+    the `first`/`last` argument of connections.
+    """
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        document: DocumentNode,
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ):
+        self.schema = schema
+        self.document = document
+        self.variables = variables or {}
+        self.operation_name = operation_name
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+
+    def cost(self) -> int:
+        operation = self._operation()
+        if operation is None:
+            return 0
+
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is None:
+            return 0
+
+        self._variable_defaults = {
+            definition.variable.name.value: definition.default_value
+            for definition in operation.variable_definitions or []
+        }
+        return self._selection_set_cost(operation.selection_set, root_type)
+
+    def _operation(self) -> Optional[OperationDefinitionNode]:
+        operations = [
+            definition
+            for definition in self.document.definitions
+            if isinstance(definition, OperationDefinitionNode)
+        ]
+        if self.operation_name is None:
+            return operations[0] if len(operations) == 1 else None
+        for operation in operations:
+            if operation.name and operation.name.value == self.operation_name:
+                return operation
+        return None
+
+    def _selection_set_cost(
+        self, selection_set: Optional[SelectionSetNode], parent_type: GraphQLNamedType
+    ) -> int:
+        if selection_set is None:
+            return 0
+
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost += self._field_cost(selection, parent_type)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    cost += self._selection_set_cost(
+                        fragment.selection_set,
+                        self.schema.get_type(fragment.type_condition.name.value),
+                    )
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = (
+                    self.schema.get_type(selection.type_condition.name.value)
+                    if selection.type_condition
+                    else parent_type
+                )
+                cost += self._selection_set_cost(selection.selection_set, fragment_type)
+        return cost
+
+    def _field_cost(self, node: FieldNode, parent_type: GraphQLNamedType) -> int:
+        fields = getattr(parent_type, "fields", None) or {}
+        field = fields.get(node.name.value)
+        if field is None:
+            # e.g. `__typename`
+            return 0
+
+        field_type = get_nullable_type(field.type)
+        named_type = get_named_type(field_type)
+        cost = FIELD_COSTS.get(
+            f"{parent_type.name}.{node.name.value}",
+            1 if is_composite_type(named_type) else 0,
+        )
+        if node.selection_set is None:
+            return cost
+
+        children_cost = self._selection_set_cost(node.selection_set, named_type)
+        return cost + self._multiplier(node, field) * children_cost
+
+    def _multiplier(self, node: FieldNode, field: GraphQLField) -> int:
+        if "first" in field.args or "last" in field.args:
+            arguments = {
+                argument.name.value: argument.value for argument in node.arguments
+            }
+            size = self._int_argument(arguments.get("first"))
+            if size is None:
+                size = self._int_argument(arguments.get("last"))
+            return size if size is not None else DEFAULT_CONNECTION_SIZE
+        if node.name.value == "edges":
+            # already counted by the connection's `first`/`last`
+            return 1
+        if is_list_type(get_nullable_type(field.type)):
+            return DEFAULT_LIST_SIZE
+        return 1
+
+    def _int_argument(self, value) -> Optional[int]:
+        if isinstance(value, VariableNode):
+            name = value.name.value
+            if self.variables.get(name) is not None:
+                value = self.variables[name]
+            else:
+                value = self._variable_defaults.get(name)
+        if isinstance(value, IntValueNode):
+            value = int(value.value)
+        if isinstance(value, int):
+            return max(value, 0)
+        return None
+
+
+def query_cost(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+) -> int:
+    return QueryCostEstimator(schema, document, variables, operation_name).cost()
+
+
+class QueryCostBudget:
+    """
+    Token bucket (in redis) limiting the total cost of the queries run on
+    behalf of each owner: the bucket holds up to
+    `GRAPHQL_QUERY_COST_BUDGET_CAPACITY` and refills at
+    `GRAPHQL_QUERY_COST_BUDGET_REFILL_RATE` per second.
+    """
+
+    # refills the bucket for the time elapsed since it was last used and
+    # takes the cost out of it, if there's enough left
+    script = """
+        local capacity = tonumber(ARGV[1])
+        local refill_rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local cost = tonumber(ARGV[4])
+
+        local bucket = redis.call("HMGET", KEYS[1], "tokens", "timestamp")
+        local tokens = tonumber(bucket[1]) or capacity
+        local timestamp = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - timestamp) * refill_rate)
+
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+
+        redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "timestamp", tostring(now))
+        redis.call("EXPIRE", KEYS[1], math.ceil(capacity / refill_rate) + 1)
+        return allowed
+    """
+
+    def key(self, owner_key: str) -> str:
+        return f"graphql/query_cost_budget/{owner_key}"
+
+    def consume(self, owner_key: str, cost: int) -> bool:
+        """
+        Takes `cost` out of the owner's budget.  Returns whether there was
+        enough budget left (if redis is unavailable the query is let through).
+        """
+        try:
+            redis = get_redis_connection()
+            allowed = redis.eval(
+                self.script,
+                1,
+                self.key(owner_key),
+                settings.GRAPHQL_QUERY_COST_BUDGET_CAPACITY,
+                settings.GRAPHQL_QUERY_COST_BUDGET_REFILL_RATE,
+                time.time(),
+                cost,
+            )
+        except (RedisError, OSError) as e:
+            log.warning("Error checking the query cost budget", extra=dict(error=e))
+            return True
+        return bool(allowed)
+
+
+query_cost_budget = QueryCostBudget()
+
+
+def check_query_cost(owner_key: str, cost: int):
+    """
+    Raises if a query of the given `cost` shouldn't be executed: because it
+    exceeds `GRAPHQL_QUERY_MAX_COST` or the owner's cost budget.
+    """
+    max_cost = settings.GRAPHQL_QUERY_MAX_COST
+    if max_cost is not None and cost > max_cost:
+        raise ValidationError(
+            f"Query is too expensive (cost {cost}, maximum {max_cost})"
+        )
+
+    if settings.GRAPHQL_QUERY_COST_BUDGET_ENABLED and not query_cost_budget.consume(
+        owner_key, cost
+    ):
+        log.warning(
+            "Query cost budget exceeded",
+            extra=dict(owner_key=owner_key, cost=cost),
+        )
+        raise TooManyRequests()
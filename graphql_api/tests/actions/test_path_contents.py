@@ -0,0 +1,59 @@
+import pytest
+from shared.reports.types import ReportTotals
+
+from codecov.commands.exceptions import ValidationError
+from graphql_api.actions.path_contents import (
+    decode_path_contents_cursor,
+    encode_path_contents_cursor,
+    paginate_path_contents,
+)
+from services.path import File
+
+items = [
+    File(full_path=f"file{i}.py", totals=ReportTotals.default_totals())
+    for i in range(5)
+]
+
+
+def test_paginate_path_contents_all():
+    page = paginate_path_contents(items)
+    assert page["results"] == items
+    assert page["total_count"](None) == 5
+    assert page["page_info"] == {
+        "has_next_page": False,
+        "has_previous_page": False,
+        "start_cursor": encode_path_contents_cursor(0),
+        "end_cursor": encode_path_contents_cursor(4),
+    }
+
+
+def test_paginate_path_contents_pages():
+    page = paginate_path_contents(items, first=2)
+    assert page["results"] == items[:2]
+    assert page["page_info"]["has_next_page"]
+    assert not page["page_info"]["has_previous_page"]
+
+    page = paginate_path_contents(items, first=2, after=page["page_info"]["end_cursor"])
+    assert page["results"] == items[2:4]
+    assert page["page_info"]["has_next_page"]
+    assert page["page_info"]["has_previous_page"]
+
+    page = paginate_path_contents(items, first=2, after=page["page_info"]["end_cursor"])
+    assert page["results"] == items[4:]
+    assert not page["page_info"]["has_next_page"]
+    assert page["total_count"](None) == 5
+
+
+def test_paginate_path_contents_empty_page():
+    page = paginate_path_contents(items, first=0)
+    assert page["results"] == []
+    assert page["page_info"]["start_cursor"] is None
+    assert page["page_info"]["end_cursor"] is None
+
+
+def test_path_contents_cursor():
+    assert decode_path_contents_cursor(encode_path_contents_cursor(42)) == 42
+    with pytest.raises(ValidationError):
+        decode_path_contents_cursor("not a cursor")
+    with pytest.raises(ValidationError):
+        paginate_path_contents(items, first=-1)
@@ -67,6 +67,36 @@ query_files = """
 """
 
 
+query_files_page = """
+    query FetchFiles($org: String!, $repo: String!, $branch: String!, $path: String!, $filters: PathContentsFilters!, $first: Int, $after: String) {
+        owner(username: $org) {
+            repository(name: $repo) {
+                ... on Repository {
+                    branch(name: $branch) {
+                        head {
+                            pathContents (path: $path, filters: $filters, first: $first, after: $after) {
+                                __typename
+                                ... on PathContents {
+                                    results {
+                                        name
+                                    }
+                                    totalCount
+                                    pageInfo {
+                                        hasNextPage
+                                        hasPreviousPage
+                                        endCursor
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
 class MockCoverage(object):
     def __init__(self, coverage, hits, lines):
         self.coverage = coverage
@@ -514,6 +544,38 @@ class TestBranch(GraphQLTestHelper, TransactionTestCase):
             data["owner"]["repository"]["branch"]["head"]["pathContents"]["results"]
         ) == len(report_mock.return_value.files)
 
+    @patch("services.report.build_report_from_commit")
+    def test_fetch_path_contents_paginated(self, report_mock):
+        report_mock.return_value = MockReport()
+        variables = {
+            "org": self.org.username,
+            "repo": self.repo.name,
+            "branch": self.branch.name,
+            "path": "",
+            "filters": {
+                "ordering": {
+                    "direction": "DESC",
+                    "parameter": "NAME",
+                }
+            },
+            "first": 2,
+        }
+
+        data = self.gql_request(query_files_page, variables=variables)
+        path_contents = data["owner"]["repository"]["branch"]["head"]["pathContents"]
+        assert path_contents["results"] == [{"name": "folder"}, {"name": "fileB.py"}]
+        assert path_contents["totalCount"] == 3
+        assert path_contents["pageInfo"]["hasNextPage"]
+        assert not path_contents["pageInfo"]["hasPreviousPage"]
+
+        variables["after"] = path_contents["pageInfo"]["endCursor"]
+        data = self.gql_request(query_files_page, variables=variables)
+        path_contents = data["owner"]["repository"]["branch"]["head"]["pathContents"]
+        assert path_contents["results"] == [{"name": "fileA.py"}]
+        assert path_contents["totalCount"] == 3
+        assert not path_contents["pageInfo"]["hasNextPage"]
+        assert path_contents["pageInfo"]["hasPreviousPage"]
+
     @patch("services.path.provider_path_exists")
     @patch("services.path.ReportPaths.paths", new_callable=PropertyMock)
     @patch("services.report.build_report_from_commit")
@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+from graphql import parse
+from redis.exceptions import RedisError
+
+from codecov.commands.exceptions import TooManyRequests, ValidationError
+
+from ..query_cost import check_query_cost, query_cost, query_cost_budget
+from ..schema import schema
+
+query_repositories = """
+    query Repositories($first: Int = 10) {
+        owner(username: "codecov") {
+            username
+            repositories(first: $first) {
+                totalCount
+                edges {
+                    node {
+                        name
+                        ...Commits
+                    }
+                }
+            }
+        }
+    }
+
+    fragment Commits on Repository {
+        commits(first: 5) {
+            edges {
+                node {
+                    commitid
+                    coverageFile(path: "src/main.py") { content }
+                    author { username }
+                }
+            }
+        }
+    }
+"""
+
+
+def cost(query, variables=None, operation_name=None):
+    return query_cost(schema, parse(query), variables, operation_name)
+
+
+def test_query_cost_scalars():
+    assert cost("{ me { username } }") == 1
+    assert cost("{ __typename }") == 0
+
+
+def test_query_cost_connections():
+    # commit: 1 + coverageFile 10 + author 1, edge: 1
+    commits = 1 + 5 * (1 + 1 + 10 + 1)
+    # repository: 1, edge: 1
+    repositories = 1 + 10 * (1 + 1 + commits)
+    assert cost(query_repositories) == 1 + repositories
+
+    # from the variables
+    assert cost(query_repositories, {"first": 2}) == 1 + 1 + 2 * (1 + 1 + commits)
+
+
+def test_query_cost_default_page_size():
+    query = """
+        {
+            owner(username: "codecov") {
+                repositories { edges { node { name } } }
+            }
+        }
+    """
+    assert cost(query) == 1 + 1 + 25 * 2
+
+
+def test_query_cost_operation_name():
+    query = """
+        query Me { me { username } }
+        query Owner { owner(username: "codecov") { username } }
+    """
+    assert cost(query, operation_name="Owner") == 1
+    # ambiguous
+    assert cost(query) == 0
+
+
+@override_settings(GRAPHQL_QUERY_MAX_COST=100)
+def test_check_query_cost_max_cost():
+    check_query_cost("owner/1", 100)
+    with pytest.raises(ValidationError) as exc_info:
+        check_query_cost("owner/1", 101)
+    assert exc_info.value.message == "Query is too expensive (cost 101, maximum 100)"
+
+
+@override_settings(
+    GRAPHQL_QUERY_MAX_COST=None,
+    GRAPHQL_QUERY_COST_BUDGET_ENABLED=True,
+    GRAPHQL_QUERY_COST_BUDGET_CAPACITY=1000,
+    GRAPHQL_QUERY_COST_BUDGET_REFILL_RATE=10,
+)
+@patch("graphql_api.query_cost.get_redis_connection")
+def test_check_query_cost_budget(get_redis_connection_mock):
+    redis = get_redis_connection_mock.return_value
+
+    redis.eval.return_value = 1
+    check_query_cost("owner/1", 50)
+    args = redis.eval.call_args.args
+    assert args[1:5] == (1, "graphql/query_cost_budget/owner/1", 1000, 10)
+    assert args[6] == 50
+
+    redis.eval.return_value = 0
+    with pytest.raises(TooManyRequests):
+        check_query_cost("owner/1", 50)
+
+
+@override_settings(GRAPHQL_QUERY_COST_BUDGET_CAPACITY=1000)
+@patch("graphql_api.query_cost.get_redis_connection")
+def test_query_cost_budget_redis_error(get_redis_connection_mock):
+    get_redis_connection_mock.return_value.eval.side_effect = RedisError()
+    assert query_cost_budget.consume("owner/1", 50) is True
@@ -1,11 +1,15 @@
+import hashlib
 import json
+from unittest.mock import patch
 
 from ariadne import ObjectType, make_executable_schema
 from django.test import RequestFactory, TestCase, override_settings
 from django.urls import ResolverMatch
+from graphql import GraphQLError, ValidationRule, parse
 
-from codecov.commands.exceptions import Unauthorized
+from codecov.commands.exceptions import TooManyRequests, Unauthorized
 
+from ..schema import schema as main_schema
 from ..views import AsyncGraphqlView
 from .helper import GraphQLTestHelper
 
@@ -26,18 +30,30 @@ def generate_schema_that_raise_with(exception):
 
 
 class ArianeViewTestCase(GraphQLTestHelper, TestCase):
-    async def do_query(self, schema, query="{ failing }"):
-        view = AsyncGraphqlView.as_view(schema=schema)
+    async def do_query(
+        self, schema, query="{ failing }", extensions=None, view_kwargs=None, **extra
+    ):
+        response = await self.do_request(
+            schema, query, extensions, view_kwargs, **extra
+        )
+        return json.loads(response.content)
+
+    async def do_request(
+        self, schema, query="{ failing }", extensions=None, view_kwargs=None, **extra
+    ):
+        view = AsyncGraphqlView.as_view(schema=schema, **(view_kwargs or {}))
+        data = {"query": query}
+        if extensions is not None:
+            data["extensions"] = extensions
         request = RequestFactory().post(
-            "/graphql/gh", {"query": query}, content_type="application/json"
+            "/graphql/gh", data, content_type="application/json", **extra
         )
         match = ResolverMatch(func=lambda: None, args=(), kwargs={"service": "github"})
 
         request.resolver_match = match
         request.user = None
         request.current_owner = None
-        res = await view(request, service="gh")
-        return json.loads(res.content)
+        return await view(request, service="gh")
 
     @override_settings(DEBUG=True)
     async def test_when_debug_is_true(self):
@@ -74,3 +90,159 @@ class ArianeViewTestCase(GraphQLTestHelper, TestCase):
             data["errors"][0]["message"]
             == "Cannot query field 'fieldThatDoesntExist' on type 'Query'."
         )
+
+    @override_settings(DEBUG=False)
+    async def test_query_parsed_once(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        query = "{ failing } # parsed once"
+        with patch("graphql_api.query_cache.parse") as parse_mock:
+            parse_mock.side_effect = parse
+            for _ in range(2):
+                data = await self.do_query(schema, query)
+                assert data["errors"][0]["type"] == "Unauthorized"
+        parse_mock.assert_called_once_with(query)
+
+    @override_settings(DEBUG=False)
+    async def test_bad_query_validated_once(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        query = " { otherFieldThatDoesntExist }"
+        for _ in range(2):
+            data = await self.do_query(schema, query)
+            assert (
+                data["errors"][0]["message"]
+                == "Cannot query field 'otherFieldThatDoesntExist' on type 'Query'."
+            )
+
+    @override_settings(DEBUG=True)
+    async def test_validation_rules_applied_to_cached_query(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        query = "{ failing } # validation rules"
+        data = await self.do_query(schema, query)
+        assert data["errors"][0]["message"] == "You are not authorized"
+
+        class NoFailingRule(ValidationRule):
+            def enter_field(self, node, *_):
+                if node.name.value == "failing":
+                    self.report_error(GraphQLError("failing is not allowed", node))
+
+        for validation_rules in [[NoFailingRule], lambda *_: [NoFailingRule]]:
+            data = await self.do_query(
+                schema, query, view_kwargs={"validation_rules": validation_rules}
+            )
+            assert data["errors"][0]["message"] == "failing is not allowed"
+
+    @override_settings(DEBUG=False)
+    async def test_callable_root_value(self):
+        types = """
+        type Query {
+            root: String
+        }
+        """
+        query_bindable = ObjectType("Query")
+
+        @query_bindable.field("root")
+        def resolve_root(root, *_):
+            return root
+
+        schema = make_executable_schema(types, query_bindable)
+        data = await self.do_query(
+            schema,
+            "query Root { root }",
+            view_kwargs={
+                "root_value": lambda context, operation_name, variables, document: (
+                    operation_name
+                )
+            },
+        )
+        assert data == {"data": {"root": "Root"}}
+
+    @override_settings(DEBUG=False, GRAPHQL_PERSISTED_QUERIES_ENABLED=True)
+    @patch("graphql_api.query_cache.get_redis_connection")
+    async def test_persisted_query(self, get_redis_connection_mock):
+        redis = get_redis_connection_mock.return_value
+        redis.get.return_value = None
+        schema = generate_schema_that_raise_with(Unauthorized())
+        query = "{ failing } # persisted"
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(query.encode()).hexdigest(),
+            }
+        }
+
+        data = await self.do_query(schema, None, extensions)
+        assert data["errors"][0]["message"] == "PersistedQueryNotFound"
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+        data = await self.do_query(schema, query, extensions)
+        assert data["errors"][0]["type"] == "Unauthorized"
+        redis.set.assert_called_once()
+
+        data = await self.do_query(schema, None, extensions)
+        assert data["errors"][0]["type"] == "Unauthorized"
+
+    @override_settings(DEBUG=False, GRAPHQL_PERSISTED_QUERIES_ENABLED=True)
+    async def test_persisted_query_hash_mismatch(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": "abc"}}
+        res = await self.do_request(schema, "{ failing }", extensions)
+        assert res.status_code == 400
+
+    @override_settings(DEBUG=False, GRAPHQL_PERSISTED_QUERIES_ENABLED=False)
+    async def test_persisted_query_not_supported(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": "abc"}}
+        data = await self.do_query(schema, None, extensions)
+        assert data["errors"][0]["message"] == "PersistedQueryNotSupported"
+
+    @override_settings(DEBUG=False, GRAPHQL_QUERY_MAX_COST=0)
+    async def test_query_cost_of_scalars(self):
+        schema = generate_schema_that_raise_with(Unauthorized())
+        data = await self.do_query(schema, "{ failing ... on Query { failing } }")
+        # scalar fields are free
+        assert data["errors"][0]["message"] == "You are not authorized"
+
+    @override_settings(DEBUG=False, GRAPHQL_QUERY_MAX_COST=10)
+    async def test_query_too_expensive(self):
+        query = """
+            query Repositories($first: Int) {
+                owner(username: "codecov") {
+                    repositories(first: $first) { edges { node { name } } }
+                }
+            }
+        """
+        with patch("graphql_api.views.execute") as execute_mock:
+            data = await self.do_query(main_schema, query)
+        assert data.get("data") is None
+        assert data["errors"][0]["message"] == (
+            "Query is too expensive (cost 52, maximum 10)"
+        )
+        assert data["errors"][0]["type"] == "ValidationError"
+        execute_mock.assert_not_called()
+
+    @override_settings(
+        DEBUG=False, GRAPHQL_QUERY_MAX_COST=None, GRAPHQL_QUERY_COST_BUDGET_ENABLED=True
+    )
+    @patch("graphql_api.views.check_query_cost")
+    async def test_query_cost_budget_exceeded(self, check_query_cost_mock):
+        check_query_cost_mock.side_effect = TooManyRequests()
+        schema = generate_schema_that_raise_with(Exception("hello"))
+        data = await self.do_query(schema)
+        assert data["errors"][0]["message"] == "Too many requests, try again later"
+        assert data["errors"][0]["type"] == "TooManyRequests"
+        check_query_cost_mock.assert_called_once_with("ip/127.0.0.1", 0)
+
+    @override_settings(
+        DEBUG=False,
+        GRAPHQL_QUERY_MAX_COST=None,
+        GRAPHQL_QUERY_COST_BUDGET_ENABLED=True,
+        GRAPHQL_QUERY_COST_TRUSTED_PROXIES=1,
+    )
+    @patch("graphql_api.views.check_query_cost")
+    async def test_query_cost_budget_forwarded_client_ip(self, check_query_cost_mock):
+        schema = generate_schema_that_raise_with(Exception("hello"))
+        await self.do_query(
+            schema, HTTP_X_FORWARDED_FOR="10.0.0.1, 203.0.113.7", REMOTE_ADDR="10.1.1.1"
+        )
+        # the spoofable entries left of the one set by the trusted proxy are ignored
+        check_query_cost_mock.assert_called_once_with("ip/203.0.113.7", 0)
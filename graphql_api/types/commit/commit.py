@@ -5,12 +5,11 @@ from ariadne import ObjectType, convert_kwargs_to_snake_case
 
 import services.components as components
 import services.path as path_service
-import services.report as report_service
 from codecov.db import sync_to_async
 from core.models import Commit
 from graphql_api.actions.commits import commit_uploads
 from graphql_api.actions.comparison import validate_commit_comparison
-from graphql_api.actions.path_contents import sort_path_contents
+from graphql_api.actions.path_contents import paginate_path_contents, sort_path_contents
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
@@ -18,6 +17,7 @@ from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
 )
+from graphql_api.helpers.reports import comparison_report_batch, report_registry
 from graphql_api.types.comparison.comparison import MissingBaseCommit, MissingHeadReport
 from graphql_api.types.enums import OrderingDirection, PathContentDisplayType
 from graphql_api.types.errors import MissingCoverage, MissingHeadReport, UnknownPath
@@ -25,7 +25,6 @@ from services.comparison import Comparison, ComparisonReport
 from services.components import Component
 from services.path import ReportPaths
 from services.profiling import CriticalFile, ProfilingSummary
-from services.report import ReadOnlyReport
 from services.yaml import YamlStates, get_yaml_state
 
 commit_bindable = ObjectType("Commit")
@@ -38,7 +37,8 @@ commit_bindable.set_alias("branchName", "branch")
 @commit_bindable.field("coverageFile")
 @sync_to_async
 def resolve_file(commit, info, path, flags=None):
-    commit_report = commit.full_report.filter(flags=flags)
+    # only a single file is looked at so avoid downloading every file's chunk
+    commit_report = report_registry(info).report(commit, flags=flags, ranged=True)
     file_report = commit_report.get(path)
 
     return {
@@ -125,13 +125,13 @@ async def resolve_compare_with_parent(commit: Commit, info, **kwargs):
         info.context["comparison"] = comparison
 
     if commit_comparison:
-        return ComparisonReport(commit_comparison)
+        return ComparisonReport(commit_comparison, batch=comparison_report_batch(info))
 
 
 @commit_bindable.field("flagNames")
 @sync_to_async
 def resolve_flags(commit, info, **kwargs):
-    return commit.full_report.flags.keys()
+    return report_registry(info).report(commit).flags.keys()
 
 
 @commit_bindable.field("criticalFiles")
@@ -150,7 +150,14 @@ def resolve_critical_files(commit: Commit, info, **kwargs) -> List[CriticalFile]
 @commit_bindable.field("pathContents")
 @convert_kwargs_to_snake_case
 @sync_to_async
-def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
+def resolve_path_contents(
+    commit: Commit,
+    info,
+    path: str = None,
+    filters=None,
+    first: int = None,
+    after: str = None,
+):
     """
     The file directory tree is a list of all the files and directories
     extracted from the commit report of the latest, head commit.
@@ -160,9 +167,8 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
     current_owner = info.context["request"].current_owner
 
     # TODO: Might need to add reports here filtered by flags in the future
-    commit_report = report_service.build_report_from_commit(
-        commit, report_class=ReadOnlyReport
-    )
+    # shares the report parsed for the other fields of the commit
+    commit_report = report_registry(info).report(commit)
     if not commit_report:
         return MissingHeadReport()
 
@@ -177,7 +183,7 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
         search_term=search_value,
     )
 
-    if len(report_paths.paths) == 0:
+    if not report_paths.paths:
         # we do not know about this path
 
         if path_service.provider_path_exists(path, commit, current_owner) is False:
@@ -188,10 +194,16 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
         return MissingCoverage(f"missing coverage for path: {path}")
 
     if search_value or display_type == PathContentDisplayType.LIST:
-        items = report_paths.full_filelist()
+        items = report_paths.lazy_filelist()
     else:
-        items = report_paths.single_directory()
-    return {"results": sort_path_contents(items, filters)}
+        # only the directory's direct children are returned
+        items = report_paths.lazy_single_directory(max_depth=1)
+
+    # items are sorted before paginating - unsorted items are only
+    # materialized for the requested page
+    return paginate_path_contents(
+        sort_path_contents(items, filters), first=first, after=after
+    )
 
 
 @commit_bindable.field("errors")
@@ -38,13 +38,21 @@ def resolve_impacted_files(
     comparison: ComparisonReport, info, filters=None
 ) -> List[ImpactedFile]:
     command = info.context["executor"].get_command("compare")
-    return command.fetch_impacted_files(comparison, filters)
+    impacted_files = command.fetch_impacted_files(comparison, filters)
+    if "comparison" in info.context:
+        # if the files' segments are requested their sources are fetched together
+        info.context["comparison"].prefetch_sources(
+            impacted_file.head_name
+            for impacted_file in impacted_files
+            if impacted_file.head_name is not None
+        )
+    return impacted_files
 
 
 @comparison_bindable.field("impactedFilesCount")
 @sync_to_async
 def resolve_impacted_files_count(comparison: ComparisonReport, info):
-    return len(comparison.impacted_files)
+    return comparison.impacted_files_count
 
 
 @comparison_bindable.field("directChangedFilesCount")
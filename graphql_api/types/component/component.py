@@ -5,7 +5,8 @@ from shared.reports.types import ReportTotals
 
 from codecov.db import sync_to_async
 from core.models import Commit
-from services.components import Component, component_filtered_report
+from graphql_api.helpers.reports import report_registry
+from services.components import Component
 
 component_bindable = ObjectType("Component")
 
@@ -24,6 +25,8 @@ def resolve_name(component: Component, info) -> str:
 @sync_to_async
 def resolve_totals(component: Component, info) -> Optional[ReportTotals]:
     commit: Commit = info.context["component_commit"]
-    report = commit.full_report
-    filtered_report = component_filtered_report(report, component)
+    reports = report_registry(info)
+    flags = component.get_matching_flags(reports.report(commit).flags.keys())
+    # components with the same flags and paths share the filtered report
+    filtered_report = reports.report(commit, flags=flags, paths=component.paths)
     return filtered_report.totals
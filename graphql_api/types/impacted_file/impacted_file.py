@@ -6,9 +6,10 @@ from shared.reports.types import ReportTotals
 from shared.torngit.exceptions import TorngitClientError
 
 from codecov.db import sync_to_async
+from graphql_api.dataloader.file_comparison import FileComparisonLoader
 from graphql_api.types.errors import ProviderError, UnknownPath
 from graphql_api.types.segment_comparison.segment_comparison import SegmentComparisons
-from services.comparison import Comparison, MissingComparisonReport, Segment
+from services.comparison import Segment
 from services.profiling import ProfilingSummary
 
 impacted_file_bindable = ObjectType("ImpactedFile")
@@ -60,9 +61,8 @@ def resolve_hashed_path(impacted_file: ImpactedFile, info) -> str:
 
 
 @impacted_file_bindable.field("segments")
-@sync_to_async
 @convert_kwargs_to_snake_case
-def resolve_segments(
+async def resolve_segments(
     impacted_file: ImpactedFile, info, filters=None
 ) -> Union[UnknownPath, ProviderError, SegmentComparisons]:
     if filters is None:
@@ -70,23 +70,19 @@ def resolve_segments(
     if "comparison" not in info.context:
         return SegmentComparisons(results=[])
 
-    comparison: Comparison = info.context["comparison"]
-    try:
-        comparison.validate()
-    except MissingComparisonReport:
-        return SegmentComparisons(results=[])
     path = impacted_file.head_name
-
     try:
-        file_comparison = comparison.get_file_comparison(
-            path, with_src=True, bypass_max_diff=True
-        )
+        file_comparison = await FileComparisonLoader.loader(info).load(path)
     except TorngitClientError as e:
         if e.code == 404:
             return UnknownPath(f"path does not exist: {path}")
         else:
             return ProviderError()
 
+    if file_comparison is None:
+        # missing comparison report
+        return SegmentComparisons(results=[])
+
     segments = file_comparison.segments
 
     if filters.get("has_unintended_changes") is True:
@@ -8,6 +8,7 @@ from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
 from graphql_api.helpers.connection import queryset_to_connection_sync
+from graphql_api.helpers.reports import comparison_report_batch
 from graphql_api.types.comparison.comparison import MissingBaseCommit, MissingHeadCommit
 from graphql_api.types.enums import OrderingDirection, PullRequestState
 from services.comparison import ComparisonReport, PullRequestComparison
@@ -64,7 +65,7 @@ async def resolve_compare_with_base(pull, info, **kwargs):
         info.context["comparison"] = comparison
 
     if commit_comparison:
-        return ComparisonReport(commit_comparison)
+        return ComparisonReport(commit_comparison, batch=comparison_report_batch(info))
 
 
 @pull_bindable.field("commits")
@@ -1,27 +1,67 @@
-import json
 import logging
 import socket
 from asyncio import iscoroutine
+from functools import lru_cache
+from inspect import isawaitable
 
 from ariadne import format_error
+from ariadne.exceptions import HttpBadRequestError
+from ariadne.extensions import ExtensionManager
+from ariadne.graphql import (
+    handle_graphql_errors,
+    handle_query_result,
+    validate_operation_name,
+    validate_variables,
+)
+from ariadne.types import GraphQLResult
 from ariadne_django.views import GraphQLAsyncView
 from django.conf import settings
-from django.http import HttpResponseNotAllowed
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from graphql import GraphQLError, execute
 from sentry_sdk import capture_exception
 
 from codecov.commands.exceptions import BaseException
 from codecov.commands.executor import get_executor_from_request
 from codecov.db import sync_to_async
 from services import ServiceException
+from services.report import ReportRegistry
 
+from .query_cache import PersistedQueryError, query_cache
+from .query_cost import check_query_cost, query_cost
 from .schema import schema
 
 log = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=128)
+def _clean_query(query: str) -> str:
+    # clean up graphql query to remove new lines and extra spaces
+    return query.replace("\n", " ").replace("  ", "").strip()
+
+
+def _client_ip(request) -> str:
+    """
+    Behind the load balancer `REMOTE_ADDR` is the address of the proxy, so the
+    client IP is taken from the X-Forwarded-For entry appended by the outermost
+    trusted proxy.  Entries further left are set by the client and can be spoofed.
+    """
+    trusted_proxies = settings.GRAPHQL_QUERY_COST_TRUSTED_PROXIES
+    if trusted_proxies:
+        forwarded_for = [
+            ip.strip()
+            for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+            if ip.strip()
+        ]
+        if len(forwarded_for) >= trusted_proxies:
+            return forwarded_for[-trusted_proxies]
+    return request.META.get("REMOTE_ADDR")
+
+
 class AsyncGraphqlView(GraphQLAsyncView):
     schema = schema
     extensions = []
+    execution_context_class = None
+    middleware_manager_class = None
 
     async def get(self, *args, **kwargs):
         if settings.GRAPHQL_PLAYGROUND:
@@ -32,30 +72,139 @@ class AsyncGraphqlView(GraphQLAsyncView):
     async def post(self, request, *args, **kwargs):
         await self._get_user(request)
 
-        # get request body information
-        req_body = json.loads(request.body.decode("utf-8")) if request.body else {}
+        try:
+            data = self.extract_data_from_request(request)
+        except HttpBadRequestError as error:
+            return HttpResponseBadRequest(error.message)
 
-        # clean up graphql query to remove new lines and extra spaces
-        req_body["query"] = req_body["query"].replace("\n", " ")
-        req_body["query"] = req_body["query"].replace("  ", "").strip()
+        try:
+            success, result = await self._execute(request, data)
+        except PersistedQueryError as error:
+            return JsonResponse(error.formatted(), status=error.status)
+        return JsonResponse(result, status=200 if success else 400)
 
+    def get_kwargs_graphql(self, request) -> dict:
+        return {
+            **super().get_kwargs_graphql(request),
+            "execution_context_class": self.execution_context_class,
+            "middleware_manager_class": self.middleware_manager_class,
+        }
+
+    async def _execute(self, request, data) -> GraphQLResult:
+        """
+        Executes the request like `ariadne.graphql.graphql` does, except that
+        the query document is parsed and validated once per distinct query
+        (see `graphql_api.query_cache`) instead of on every request.
+        """
+        kwargs = self.get_kwargs_graphql(request)
+        context_value = kwargs["context_value"]
+        error_handling = dict(
+            logger=kwargs["logger"],
+            error_formatter=kwargs["error_formatter"],
+            debug=kwargs["debug"],
+        )
+        extension_manager = ExtensionManager(kwargs["extensions"], context_value)
+
+        with extension_manager.request():
+            try:
+                if not isinstance(data, dict):
+                    raise GraphQLError("Operation data should be a JSON object")
+                validate_variables(data.get("variables"))
+                validate_operation_name(data.get("operationName"))
+
+                parsed_query = query_cache.get(
+                    self.schema,
+                    data,
+                    introspection=kwargs["introspection"],
+                    validation_rules=kwargs["validation_rules"],
+                    context_value=context_value,
+                )
+                self._log_request(request, data, parsed_query.query)
+                if parsed_query.validation_errors:
+                    return handle_graphql_errors(
+                        parsed_query.validation_errors,
+                        extension_manager=extension_manager,
+                        **error_handling,
+                    )
+
+                await self._check_query_cost(request, data, parsed_query.document)
+
+                root_value = kwargs["root_value"]
+                if callable(root_value):
+                    root_value = root_value(
+                        context_value,
+                        data.get("operationName"),
+                        data.get("variables"),
+                        parsed_query.document,
+                    )
+                    if isawaitable(root_value):
+                        root_value = await root_value
+
+                result = execute(
+                    self.schema,
+                    parsed_query.document,
+                    root_value=root_value,
+                    context_value=context_value,
+                    variable_values=data.get("variables"),
+                    operation_name=data.get("operationName"),
+                    execution_context_class=kwargs["execution_context_class"],
+                    middleware=extension_manager.as_middleware_manager(
+                        kwargs["middleware"], kwargs["middleware_manager_class"]
+                    ),
+                )
+                if isawaitable(result):
+                    result = await result
+            except GraphQLError as error:
+                return handle_graphql_errors(
+                    [error], extension_manager=extension_manager, **error_handling
+                )
+
+        return handle_query_result(
+            result, extension_manager=extension_manager, **error_handling
+        )
+
+    async def _check_query_cost(self, request, data: dict, document):
+        """
+        Rejects queries whose estimated cost exceeds the maximum or the budget
+        of the current owner (anonymous requests are budgeted by client IP).
+        """
+        if (
+            settings.GRAPHQL_QUERY_MAX_COST is None
+            and not settings.GRAPHQL_QUERY_COST_BUDGET_ENABLED
+        ):
+            return
+
+        cost = query_cost(
+            self.schema, document, data.get("variables"), data.get("operationName")
+        )
+        current_owner = getattr(request, "current_owner", None)
+        if current_owner is not None:
+            owner_key = f"owner/{current_owner.ownerid}"
+        else:
+            owner_key = f"ip/{_client_ip(request)}"
+
+        try:
+            await sync_to_async(check_query_cost)(owner_key, cost)
+        except BaseException as error:
+            raise GraphQLError(error.message, original_error=error)
+
+    def _log_request(self, request, data: dict, query: str):
         # put everything together for log
         log_data = {
             "server_hostname": socket.gethostname(),
             "request_method": request.method,
             "request_path": request.get_full_path(),
-            "request_body": req_body,
+            "request_body": {**data, "query": _clean_query(query)},
         }
         log.info("GraphQL Request", extra=log_data)
 
-        # request.user = await get_user(request) or AnonymousUser()
-        return await super().post(request, *args, **kwargs)
-
     def context_value(self, request):
         return {
             "request": request,
             "service": request.resolver_match.kwargs["service"],
             "executor": get_executor_from_request(request),
+            # reports shared by the resolvers of the request
+            "reports": ReportRegistry(),
         }
 
     def error_formatter(self, error, debug=False):
@@ -9,7 +9,7 @@ from shared.reports.enums import UploadState, UploadType
 from codecov.models import BaseCodecovModel
 from upload.constants import ci
 from utils.config import should_write_data_to_storage_config_check
-from utils.model_utils import ArchiveField
+from utils.model_utils import ArchiveField, ArchiveFieldQuerySet
 from utils.services import get_short_service_name
 
 log = logging.getLogger(__name__)
@@ -81,6 +81,8 @@ class ReportDetails(BaseCodecovModel):
         default_value_class=list,
     )
 
+    objects = ArchiveFieldQuerySet.as_manager()
+
 
 class ReportLevelTotals(AbstractTotals):
     report = models.OneToOneField(CommitReport, on_delete=models.CASCADE)
@@ -1,23 +1,35 @@
+import gzip
 import json
 import logging
 from base64 import b16encode
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from hashlib import md5
+from typing import Dict, Iterable, List, Optional, Union
 from uuid import uuid4
 
 from django.conf import settings
 from django.utils import timezone
 from minio import Minio
+from shared.metrics import metrics
+from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
+from services.single_flight import SingleFlight
 from services.storage import StorageService
 from utils.config import get_config
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
 log = logging.getLogger(__name__)
 
 
 class MinioEndpoints(Enum):
     chunks = "{version}/repos/{repo_hash}/commits/{commitid}/chunks.txt"
+    chunks_index = "{version}/repos/{repo_hash}/commits/{commitid}/chunks_index.json"
     json_data = "{version}/repos/{repo_hash}/commits/{commitid}/json_data/{table}/{field}/{external_id}.json"
     json_data_no_commit = (
         "{version}/repos/{repo_hash}/json_data/{table}/{field}/{external_id}.json"
@@ -37,6 +49,70 @@ class MinioEndpoints(Enum):
         return self.value.format(**kwaargs)
 
 
+END_OF_CHUNK = b"\n<<<<< end_of_chunk >>>>>\n"
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class ArchiveEncoding(Enum):
+    gzip = "gzip"
+    zstd = "zstd"
+
+
+def compress(
+    data: Union[str, bytes], encoding: Optional[ArchiveEncoding]
+) -> Union[str, bytes]:
+    """
+    Compresses data for storage.  The compressed formats are self-describing
+    (magic bytes) so `decompress` can tell how an object was written.
+    Data is returned untouched when no encoding is given.
+    """
+    if encoding is None:
+        return data
+    if isinstance(data, str):
+        data = data.encode()
+    if encoding == ArchiveEncoding.gzip:
+        return gzip.compress(data)
+    if encoding == ArchiveEncoding.zstd:
+        if zstandard is None:
+            raise ValueError("zstd archive compression requires `zstandard`")
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"unknown archive encoding: {encoding}")
+
+
+def decompress(data: bytes) -> bytes:
+    """
+    Decompresses data written by `compress`.  Uncompressed data (i.e. objects
+    written before compression was enabled) is returned as is.
+    """
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError("reading zstd archive objects requires `zstandard`")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def build_chunks_index(chunks: bytes) -> List[List[int]]:
+    """
+    Returns the `[start, end)` byte offsets of every chunk in a chunks file.
+    The position of each range in the list is the `file_index` of the file
+    the chunk belongs to.
+    """
+    offsets = []
+    start = 0
+    while True:
+        end = chunks.find(END_OF_CHUNK, start)
+        if end == -1:
+            offsets.append([start, len(chunks)])
+            return offsets
+        offsets.append([start, end])
+        start = end + len(END_OF_CHUNK)
+
+
 def get_minio_client():
     return Minio(
         settings.MINIO_LOCATION,
@@ -46,6 +122,9 @@ def get_minio_client():
     )
 
 
+chunks_read_flights = SingleFlight("read_chunks")
+
+
 # Service class for performing archive operations. Meant to work against the
 # underlying StorageService
 class ArchiveService(object):
@@ -77,6 +156,12 @@ class ArchiveService(object):
         self.region = get_config("services", "minio", "region", default="us-east-1")
         # Set TTL from config and default to existing value
         self.ttl = ttl or int(get_config("services", "minio", "ttl", default=self.ttl))
+        # the minio client's connection pool holds 10 connections
+        self.read_concurrency = int(
+            get_config("services", "minio", "read_concurrency", default=8)
+        )
+        compression = get_config("services", "minio", "compression", default=None)
+        self.compression = ArchiveEncoding(compression) if compression else None
         self.storage = StorageService()
         self.storage_hash = self.get_archive_hash(repository)
 
@@ -148,7 +233,7 @@ class ArchiveService(object):
                 external_id=external_id,
             )
         stringified_data = json.dumps(data, cls=encoder)
-        self.write_file(path, stringified_data)
+        self.write_file(path, compress(stringified_data, self.compression))
         return path
 
     """
@@ -205,16 +290,49 @@ class ArchiveService(object):
             version="v4", repo_hash=self.storage_hash, commitid=commit_sha
         )
 
-        self.write_file(path, data)
+        self.write_file(path, compress(data, self.compression))
         return path
 
     """
-    Generic method to read a file from the archive
+    Generic method to read a file from the archive.  Compressed files are
+    transparently decompressed.
     """
 
     def read_file(self, path):
         contents = self.storage.read_file(self.root, path)
-        return contents.decode()
+        return decompress(contents).decode()
+
+    """
+    Reads many files from the archive concurrently (at most `max_concurrency`
+    reads at a time over the shared minio client).  Returns a dict of path to
+    contents - paths that are not in storage map to a `FileNotInStorageError`
+    instead of failing the whole batch.
+    """
+
+    def read_files(
+        self, paths: Iterable[str], max_concurrency: Optional[int] = None
+    ) -> Dict[str, Union[str, FileNotInStorageError]]:
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return {}
+        if max_concurrency is None:
+            max_concurrency = self.read_concurrency
+
+        def read(path):
+            try:
+                with metrics.timer("services.archive.read_files.file"):
+                    return self.read_file(path)
+            except FileNotInStorageError as e:
+                metrics.incr("services.archive.read_files.not_in_storage")
+                return e
+
+        with metrics.timer("services.archive.read_files"):
+            with ThreadPoolExecutor(
+                max_workers=min(max_concurrency, len(paths))
+            ) as executor:
+                contents = list(executor.map(read, paths))
+
+        return dict(zip(paths, contents))
 
     """
     Generic method to delete a file from the archive.
@@ -242,7 +360,74 @@ class ArchiveService(object):
             version="v4", repo_hash=self.storage_hash, commitid=commit_sha
         )
         log.info("Downloading chunks from path %s for commit %s", path, commit_sha)
-        return self.read_file(path)
+        # concurrent reads of the same chunks share a single download
+        chunks, _ = chunks_read_flights.do(
+            (self.storage_hash, commit_sha), lambda: self.read_file(path)
+        )
+        return chunks
+
+    """
+    Reads the offset index of a chunks file from the archive.  The index is built
+    (and written next to the chunks file) the first time it's needed.
+    """
+
+    def read_chunks_index(self, commit_sha) -> dict:
+        path = MinioEndpoints.chunks_index.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        try:
+            return json.loads(self.read_file(path))
+        except FileNotInStorageError:
+            return self.write_chunks_index(commit_sha)
+
+    """
+    Builds the offset index of a chunks file and writes it to the archive.
+    The index records the ETag of the chunks file it was built from so that
+    reads against an outdated index can be detected.
+    """
+
+    def write_chunks_index(self, commit_sha) -> dict:
+        chunks_path = MinioEndpoints.chunks.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        log.info(
+            "Building chunks index from path %s for commit %s", chunks_path, commit_sha
+        )
+        chunks, etag = self.storage.read_file_with_etag(self.root, chunks_path)
+        decompressed = decompress(chunks)
+        index = {
+            "etag": etag,
+            "offsets": build_chunks_index(decompressed),
+            # byte ranges of a compressed file can't be read independently
+            "compressed": decompressed is not chunks,
+        }
+
+        path = MinioEndpoints.chunks_index.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        self.write_file(path, json.dumps(index))
+        return index
+
+    """
+    Reads a single file's chunk from a chunks file using a ranged GET.
+    Returns `None` if there is no chunk at `file_index`.
+    """
+
+    def read_chunk(self, commit_sha, index: dict, file_index: int) -> Optional[str]:
+        offsets = index["offsets"]
+        if not 0 <= file_index < len(offsets):
+            return None
+        start, end = offsets[file_index]
+        if start == end:
+            return ""
+
+        path = MinioEndpoints.chunks.get_path(
+            version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+        )
+        contents = self.storage.read_file_range(
+            self.root, path, offset=start, length=end - start, etag=index["etag"]
+        )
+        return contents.decode()
 
     """
     Delete a chunk file from the archive
@@ -252,6 +437,11 @@ class ArchiveService(object):
         path = "v4/repos/{}/commits/{}/chunks.txt".format(self.storage_hash, commit_sha)
 
         self.delete_file(path)
+        self.delete_file(
+            MinioEndpoints.chunks_index.get_path(
+                version="v4", repo_hash=self.storage_hash, commitid=commit_sha
+            )
+        )
 
     def create_presigned_put(self, path):
         return self.storage.create_presigned_put(self.root, path, self.ttl)
@@ -1,16 +1,21 @@
 import asyncio
 import copy
 import functools
+import io
 import json
 import logging
+import threading
+from array import array
 from collections import Counter
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import minio
 import pytz
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.db.models import Prefetch
 from django.utils.functional import cached_property
 from shared.helpers.yaml import walk
@@ -23,10 +28,17 @@ from core.models import Commit
 from reports.models import CommitReport, ReportDetails
 from services import ServiceException
 from services.archive import ArchiveService
+from services.provider_cache import fetch_sources, provider_cache
 from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
+from services.single_flight import SingleFlight, distributed_lock
 from utils.config import get_config
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
 log = logging.getLogger(__name__)
 
 
@@ -35,6 +47,9 @@ redis = get_redis_connection()
 
 MAX_DIFF_SIZE = 170
 
+# coalesces concurrent fetches of the same comparison from the provider
+comparison_flights = SingleFlight("provider_compare")
+
 
 def _is_added(line_value):
     return line_value and line_value[0] == "+"
@@ -96,14 +111,14 @@ class FileComparisonTraverseManager:
             }
 
             The segment["header"], also known as the hunk-header (https://en.wikipedia.org/wiki/Diff#Unified_format),
-            is an array of strings, which is why we have to use the int() builtin function
-            to compare with self.head_ln and self.base_ln. It is used by this algorithm to
+            is an array of strings. The headers are parsed once, up front, into the ranges of
+            base and head lines each segment covers. They are used by this algorithm to
               1. Set initial values for the self.base_ln and self.head_ln line-counters, and
               2. Detect if self.base and/or self.head refer to lines in the diff at any given time
 
             This algorithm relies on the fact that segments are returned in ascending
-            order for each file, which means that the "nearest" segment to the current line
-            being traversed is located at segments[0].
+            order for each file, so the segments (and the lines within them) are walked
+            in order by index. The segments are never modified.
 
         src -- this is the source code of the file at the head-reference, where each line
             is a cell in the array. If we are not traversing a segment, and src is provided,
@@ -111,48 +126,69 @@ class FileComparisonTraverseManager:
         """
         self.head_file_eof = head_file_eof
         self.base_file_eof = base_file_eof
-        self.segments = copy.deepcopy(segments)
+        self.segments = segments
         self.src = src
 
+        self._segment_ranges = [
+            self._parse_header(segment["header"]) for segment in segments
+        ]
+        # position of the next line to visit: segments[_segment_index]["lines"][_line_index]
+        self._segment_index = 0
+        self._line_index = 0
+
         if self.segments:
             # Base offsets can be 0 if files are added or removed
-            self.base_ln = min(1, int(self.segments[0]["header"][0]))
-            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+            self.base_ln = min(1, self._segment_ranges[0][0])
+            self.head_ln = min(1, self._segment_ranges[0][2])
         else:
             self.base_ln, self.head_ln = 1, 1
 
+    @staticmethod
+    def _parse_header(header):
+        """
+        Returns the (start, end) of the base lines followed by the (start, end)
+        of the head lines that a segment covers.
+        """
+        base_start, base_length, head_start, head_length = header[:4]
+        base_start, head_start = int(base_start), int(head_start)
+        return (
+            base_start,
+            base_start + int(base_length or 1),
+            head_start,
+            head_start + int(head_length or 1),
+        )
+
     def traverse_finished(self):
-        if self.segments:
+        if self._segment_index < len(self.segments):
             return False
         if self.src:
             return self.head_ln > len(self.src)
         return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
 
     def traversing_diff(self):
-        if self.segments == []:
+        if self._segment_index >= len(self.segments):
             return False
 
-        base_ln_within_offset = (
-            int(self.segments[0]["header"][0])
-            <= self.base_ln
-            < int(self.segments[0]["header"][0])
-            + int(self.segments[0]["header"][1] or 1)
-        )
-        head_ln_within_offset = (
-            int(self.segments[0]["header"][2])
-            <= self.head_ln
-            < int(self.segments[0]["header"][2])
-            + int(self.segments[0]["header"][3] or 1)
+        base_start, base_end, head_start, head_end = self._segment_ranges[
+            self._segment_index
+        ]
+        return (
+            base_start <= self.base_ln < base_end
+            or head_start <= self.head_ln < head_end
         )
-        return base_ln_within_offset or head_ln_within_offset
 
-    def pop_line(self):
-        if self.traversing_diff():
-            return self.segments[0]["lines"].pop(0)
+    def _next_line(self, is_diff):
+        if is_diff:
+            line_value = self.segments[self._segment_index]["lines"][self._line_index]
+            self._line_index += 1
+            return line_value
 
         if self.src:
             return self.src[self.head_ln - 1]
 
+    def pop_line(self):
+        return self._next_line(self.traversing_diff())
+
     def apply(self, visitors):
         """
         Traverses the lines in a file comparison while accounting for the diff.
@@ -164,30 +200,35 @@ class FileComparisonTraverseManager:
         visitors -- A list of visitors applied to each line.
         """
         while not self.traverse_finished():
-            line_value = self.pop_line()
             is_diff = self.traversing_diff()
+            line_value = self._next_line(is_diff)
+            is_added = is_diff and _is_added(line_value)
+            is_removed = is_diff and _is_removed(line_value)
 
             for visitor in visitors:
                 visitor(
-                    None if is_diff and _is_added(line_value) else self.base_ln,
-                    None if is_diff and _is_removed(line_value) else self.head_ln,
+                    None if is_added else self.base_ln,
+                    None if is_removed else self.head_ln,
                     line_value,
                     is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
                 )
 
-            if is_diff and _is_added(line_value):
+            if is_added:
                 self.head_ln += 1
-            elif is_diff and _is_removed(line_value):
+            elif is_removed:
                 self.base_ln += 1
             else:
                 self.head_ln += 1
                 self.base_ln += 1
 
-            if self.segments and not self.segments[0]["lines"]:
+            if self._segment_index < len(self.segments) and self._line_index >= len(
+                self.segments[self._segment_index]["lines"]
+            ):
                 # Either the segment has no lines (and is therefore of no use)
-                # or all lines have been popped and visited, which means we are
+                # or all of its lines have been visited, which means we are
                 # done traversing it
-                self.segments.pop(0)
+                self._segment_index += 1
+                self._line_index = 0
 
 
 class FileComparisonVisitor:
@@ -246,7 +287,7 @@ class CreateLineComparisonVisitor(FileComparisonVisitor):
 
     def __init__(self, base_file, head_file):
         self.base_file, self.head_file = base_file, head_file
-        self.lines = []
+        self.lines = LineComparisons()
 
     def __call__(self, base_ln, head_ln, value, is_diff):
         if value is None:
@@ -255,14 +296,12 @@ class CreateLineComparisonVisitor(FileComparisonVisitor):
         base_line, head_line = self._get_lines(base_ln, head_ln)
 
         self.lines.append(
-            LineComparison(
-                base_line=base_line,
-                head_line=head_line,
-                base_ln=base_ln,
-                head_ln=head_ln,
-                value=value,
-                is_diff=is_diff,
-            )
+            base_line=base_line,
+            head_line=head_line,
+            base_ln=base_ln,
+            head_ln=head_ln,
+            value=value,
+            is_diff=is_diff,
         )
 
 
@@ -307,6 +346,17 @@ class CreateChangeSummaryVisitor(FileComparisonVisitor):
 
 
 class LineComparison:
+    __slots__ = (
+        "base_line",
+        "head_line",
+        "base_ln",
+        "head_ln",
+        "value",
+        "is_diff",
+        "added",
+        "removed",
+    )
+
     def __init__(self, base_line, head_line, base_ln, head_ln, value, is_diff):
         self.base_line = base_line
         self.head_line = head_line
@@ -336,7 +386,7 @@ class LineComparison:
             else line_type(self.head_line[0]),
         }
 
-    @cached_property
+    @property
     def head_line_sessions(self) -> Optional[List[tuple]]:
         if self.head_line is None:
             return None
@@ -352,7 +402,7 @@ class LineComparison:
 
         return sessions
 
-    @cached_property
+    @property
     def hit_count(self) -> Optional[int]:
         if self.head_line_sessions is None:
             return None
@@ -364,7 +414,7 @@ class LineComparison:
         if hit_count > 0:
             return hit_count
 
-    @cached_property
+    @property
     def hit_session_ids(self) -> Optional[List[int]]:
         if self.head_line_sessions is None:
             return None
@@ -377,12 +427,132 @@ class LineComparison:
             return ids
 
 
+# `LineComparisons` stores coverage types as indexes into this list
+_COVERAGE_TYPES = [None, *LineType]
+_COVERAGE_TYPE_CODES = {coverage: code for code, coverage in enumerate(_COVERAGE_TYPES)}
+
+# `LineComparisons` stores line numbers that are `None` as this value
+_NO_LINE_NUMBER = -1
+
+_IS_DIFF, _ADDED, _REMOVED = 1, 2, 4
+
+
+class LineComparisons(Sequence):
+    """
+    The line comparisons of a file, stored column-wise: line numbers, coverage
+    types and flags are kept in arrays, while the line values and report lines
+    are references to the diff/source and the report files.  Items are
+    `LineComparison`s created on access, so only the lines handed out (e.g. the
+    ones in a segment) are materialized as objects.
+    """
+
+    __slots__ = (
+        "base_lns",
+        "head_lns",
+        "base_coverages",
+        "head_coverages",
+        "flags",
+        "values",
+        "base_lines",
+        "head_lines",
+    )
+
+    def __init__(self):
+        self.base_lns = array("q")
+        self.head_lns = array("q")
+        self.base_coverages = array("b")
+        self.head_coverages = array("b")
+        self.flags = array("b")
+        self.values = []
+        self.base_lines = []
+        self.head_lines = []
+
+    @classmethod
+    def from_lines(cls, lines):
+        line_comparisons = cls()
+        for line in lines:
+            line_comparisons.append(
+                base_line=line.base_line,
+                head_line=line.head_line,
+                base_ln=line.base_ln,
+                head_ln=line.head_ln,
+                value=line.value,
+                is_diff=line.is_diff,
+            )
+        return line_comparisons
+
+    def append(self, base_line, head_line, base_ln, head_ln, value, is_diff):
+        added = is_diff and _is_added(value)
+        removed = is_diff and _is_removed(value)
+
+        self.base_lns.append(_NO_LINE_NUMBER if base_ln is None else base_ln)
+        self.head_lns.append(_NO_LINE_NUMBER if head_ln is None else head_ln)
+        self.base_coverages.append(
+            0
+            if added or not base_line
+            else _COVERAGE_TYPE_CODES[line_type(base_line[0])]
+        )
+        self.head_coverages.append(
+            0
+            if removed or not head_line
+            else _COVERAGE_TYPE_CODES[line_type(head_line[0])]
+        )
+        self.flags.append(
+            (_IS_DIFF if is_diff else 0)
+            | (_ADDED if added else 0)
+            | (_REMOVED if removed else 0)
+        )
+        self.values.append(value)
+        self.base_lines.append(base_line)
+        self.head_lines.append(head_line)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        base_ln, head_ln = self.base_lns[index], self.head_lns[index]
+        return LineComparison(
+            base_line=self.base_lines[index],
+            head_line=self.head_lines[index],
+            base_ln=None if base_ln == _NO_LINE_NUMBER else base_ln,
+            head_ln=None if head_ln == _NO_LINE_NUMBER else head_ln,
+            value=self.values[index],
+            is_diff=bool(self.flags[index] & _IS_DIFF),
+        )
+
+    def number(self, index: int) -> Tuple[Optional[int], Optional[int]]:
+        """
+        The (base, head) line numbers of a line, like `LineComparison.number`.
+        """
+        flags = self.flags[index]
+        base_ln = self.base_lns[index]
+        head_ln = self.head_lns[index]
+        return (
+            None if flags & _ADDED or base_ln == _NO_LINE_NUMBER else base_ln,
+            None if flags & _REMOVED or head_ln == _NO_LINE_NUMBER else head_ln,
+        )
+
+    def is_changed(self, index: int) -> bool:
+        """
+        Whether the line was added or removed in the diff.
+        """
+        return bool(self.flags[index] & (_ADDED | _REMOVED))
+
+    def is_coverage_changed(self, index: int) -> bool:
+        return self.base_coverages[index] != self.head_coverages[index]
+
+
 class Segment:
     """
     A segment represents a contiguous subset of lines in a file where either
     the coverage has changed or the code has changed (i.e. is part of a diff).
     """
 
+    __slots__ = ("_lines", "_start", "_end")
+
     # additional lines included before and after each segment
     padding_lines = 3
 
@@ -392,15 +562,13 @@ class Segment:
     @classmethod
     def segments(cls, file_comparison):
         lines = file_comparison.lines
+        if not isinstance(lines, LineComparisons):
+            lines = LineComparisons.from_lines(lines)
 
         # line numbers of interest (i.e. coverage changed or code changed)
         line_numbers = []
-        for idx, line in enumerate(lines):
-            if (
-                line.coverage["base"] != line.coverage["head"]
-                or line.added
-                or line.removed
-            ):
+        for idx in range(len(lines)):
+            if lines.is_coverage_changed(idx) or lines.is_changed(idx):
                 line_numbers.append(idx)
 
         segmented_lines = []
@@ -422,13 +590,18 @@ class Segment:
             end_line_number = group[-1] + cls.padding_lines
             end_line_number = min(end_line_number, len(lines) - 1)
 
-            segment = cls(lines[start_line_number : end_line_number + 1])
+            segment = cls(lines, start_line_number, end_line_number + 1)
             segments.append(segment)
 
         return segments
 
-    def __init__(self, lines):
+    def __init__(self, lines: LineComparisons, start: int, end: int):
+        """
+        A segment of the lines from `start` up to (but not including) `end`.
+        """
         self._lines = lines
+        self._start = start
+        self._end = end
 
     @property
     def header(self):
@@ -438,14 +611,16 @@ class Segment:
         num_added = 0
         num_context = 0
 
-        for line in self.lines:
-            if base_start is None and line.number["base"] is not None:
-                base_start = int(line.number["base"])
-            if head_start is None and line.number["head"] is not None:
-                head_start = int(line.number["head"])
-            if line.added:
+        for idx in range(self._start, self._end):
+            base_ln, head_ln = self._lines.number(idx)
+            if base_start is None and base_ln is not None:
+                base_start = base_ln
+            if head_start is None and head_ln is not None:
+                head_start = head_ln
+            flags = self._lines.flags[idx]
+            if flags & _ADDED:
                 num_added += 1
-            elif line.removed:
+            elif flags & _REMOVED:
                 num_removed += 1
             else:
                 num_context += 1
@@ -458,22 +633,20 @@ class Segment:
         )
 
     @property
-    def lines(self):
-        return self._lines
+    def lines(self) -> List[LineComparison]:
+        return self._lines[self._start : self._end]
 
     @property
     def has_diff_changes(self):
-        for line in self.lines:
-            if line.added or line.removed:
+        for idx in range(self._start, self._end):
+            if self._lines.is_changed(idx):
                 return True
         return False
 
     @property
     def has_unintended_changes(self):
-        for line in self.lines:
-            head_coverage = line.coverage["base"]
-            base_coverage = line.coverage["head"]
-            if not (line.added or line.removed) and (base_coverage != head_coverage):
+        for idx in range(self._start, self._end):
+            if not self._lines.is_changed(idx) and self._lines.is_coverage_changed(idx):
                 return True
         return False
 
@@ -633,6 +806,11 @@ class Comparison(object):
         self._base_commit = base_commit
         self._head_commit = head_commit
 
+        # sources fetched ahead of time (see `prefetch_sources`)
+        self._sources = {}
+        self._sources_to_prefetch = set()
+        self._sources_lock = threading.Lock()
+
     def validate(self):
         # make sure head and base reports exist (will throw an error if not)
         self.head_report
@@ -663,15 +841,8 @@ class Comparison(object):
             base_file = None
 
         if with_src:
-            adapter = RepoProviderService().get_adapter(
-                owner=self.user, repo=self.base_commit.repository
-            )
-            file_content = async_to_sync(adapter.get_source)(
-                file_name, self.head_commit.commitid
-            )["content"]
             # make sure the file is str utf-8
-            if type(file_content) is not str:
-                file_content = str(file_content, "utf-8")
+            file_content = str(self._get_source(file_name), "utf-8")
             src = file_content.splitlines()
         else:
             src = []
@@ -684,12 +855,54 @@ class Comparison(object):
             bypass_max_diff=bypass_max_diff,
         )
 
+    def prefetch_sources(self, file_names: Iterable[str]):
+        """
+        Marks the head sources of `file_names` as needed soon (e.g. for the
+        impacted files of a comparison page): the next source fetched by
+        `get_file_comparison(with_src=True)` fetches all of them concurrently.
+        """
+        with self._sources_lock:
+            self._sources_to_prefetch.update(
+                file_name for file_name in file_names if file_name not in self._sources
+            )
+
+    def _get_source(self, file_name: str) -> bytes:
+        with self._sources_lock:
+            if file_name not in self._sources:
+                file_names = list({file_name, *self._sources_to_prefetch})
+                self._sources_to_prefetch = set()
+                self._sources.update(
+                    async_to_sync(fetch_sources)(
+                        RepoProviderService().get_adapter(
+                            owner=self.user, repo=self.base_commit.repository
+                        ),
+                        self.base_commit.repository.repoid,
+                        self.head_commit.commitid,
+                        file_names,
+                    )
+                )
+            # each file's source is only read once
+            source = self._sources.pop(file_name)
+
+        if isinstance(source, Exception):
+            raise source
+        return source
+
     @property
     def git_comparison(self):
         return self._fetch_comparison_and_reverse_comparison[0]
 
+    def _prefetch_commit_reports(self):
+        # both reports are needed so read the data of both commits at once
+        try:
+            commits = [self.base_commit, self.head_commit]
+        except MissingComparisonCommit:
+            return
+        report_service.prefetch_commit_reports(commits)
+
     @cached_property
     def base_report(self):
+        self._prefetch_commit_reports()
         try:
             return report_service.build_report_from_commit(self.base_commit)
         except minio.error.S3Error as e:
@@ -700,6 +913,7 @@ class Comparison(object):
 
     @cached_property
     def head_report(self):
+        self._prefetch_commit_reports()
         try:
             report = report_service.build_report_from_commit(self.head_commit)
         except minio.error.S3Error as e:
@@ -762,7 +976,46 @@ class Comparison(object):
         """
         Fetches comparison and reverse comparison concurrently, then
         caches the result. Returns (comparison, reverse_comparison).
+
+        Comparisons between two SHAs never change, so they are also kept in
+        the provider cache (when enabled), and concurrent fetches of the same
+        comparison are coalesced.
         """
+        cache_key = provider_cache.comparison_key(
+            self.base_commit.repository.repoid,
+            self.base_commit.commitid,
+            self.head_commit.commitid,
+        )
+        result, shared = comparison_flights.do(
+            cache_key, lambda: self._load_comparison_and_reverse_comparison(cache_key)
+        )
+        if shared:
+            # callers store data in the diff (see `head_report`)
+            result = copy.deepcopy(result)
+        return result
+
+    def _load_comparison_and_reverse_comparison(self, cache_key: str):
+        cached = provider_cache.get_comparison(cache_key)
+        if cached is not None:
+            return cached
+
+        if not provider_cache.enabled:
+            return self._fetch_from_provider()
+
+        with distributed_lock(
+            f"provider_compare/{cache_key}",
+            timeout=settings.PROVIDER_CACHE_LOCK_TIMEOUT,
+        ):
+            # another worker may have fetched it while we waited for the lock
+            cached = provider_cache.get_comparison(cache_key)
+            if cached is not None:
+                return cached
+
+            comparison, reverse_comparison = self._fetch_from_provider()
+            provider_cache.set_comparison(cache_key, comparison, reverse_comparison)
+            return comparison, reverse_comparison
+
+    def _fetch_from_provider(self):
         adapter = RepoProviderService().get_adapter(
             self.user, self.base_commit.repository
         )
@@ -777,7 +1030,7 @@ class Comparison(object):
         async def runnable():
             return await asyncio.gather(comparison_coro, reverse_comparison_coro)
 
-        return async_to_sync(runnable)()
+        return tuple(async_to_sync(runnable)())
 
     def flag_comparison(self, flag_name):
         return FlagComparison(self, flag_name)
@@ -957,6 +1210,57 @@ class ImpactedFile:
         return parts[-1]
 
 
+class ComparisonReportBatch:
+    """
+    The comparison reports of a request (e.g. one per pull of a page).  The first
+    time the raw data of one of them is needed, the data of every report of the
+    batch that wasn't read yet is read concurrently with `ArchiveService.read_files`
+    instead of one blocking read per report.
+    """
+
+    def __init__(self):
+        # commit comparisons whose data wasn't read yet
+        self._pending = []
+        # storage path -> contents (or the exception raised reading it)
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def add(self, commit_comparison: CommitComparison):
+        if commit_comparison.report_storage_path:
+            with self._lock:
+                self._pending.append(commit_comparison)
+
+    def read(self, commit_comparison: CommitComparison) -> str:
+        path = commit_comparison.report_storage_path
+        with self._lock:
+            if path not in self._data:
+                pending = [*self._pending, commit_comparison]
+                self._pending = []
+                self._read_many(pending)
+            # each report's data is only read once
+            data = self._data.pop(path)
+
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    def _read_many(self, commit_comparisons: List[CommitComparison]):
+        by_repository = {}
+        for commit_comparison in commit_comparisons:
+            compare_commit = commit_comparison.compare_commit
+            if compare_commit.repository_id not in by_repository:
+                by_repository[compare_commit.repository_id] = (
+                    ArchiveService(compare_commit.repository),
+                    set(),
+                )
+            by_repository[compare_commit.repository_id][1].add(
+                commit_comparison.report_storage_path
+            )
+
+        for archive_service, paths in by_repository.values():
+            self._data.update(archive_service.read_files(paths))
+
+
 @dataclass
 class ComparisonReport(object):
     """
@@ -966,6 +1270,16 @@ class ComparisonReport(object):
     """
 
     commit_comparison: CommitComparison = None
+    # reports whose raw data is read together with this one's
+    batch: Optional[ComparisonReportBatch] = field(
+        default=None, compare=False, repr=False
+    )
+    # whether a file lookup already streamed the raw data
+    _streamed: bool = field(default=False, init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.batch is not None and self.commit_comparison is not None:
+            self.batch.add(self.commit_comparison)
 
     @cached_property
     def files(self) -> List[ImpactedFile]:
@@ -977,10 +1291,41 @@ class ComparisonReport(object):
             ImpactedFile.create(**data) for data in comparison_data.get("files", [])
         ]
 
-    def impacted_file(self, path: str) -> Optional[ImpactedFile]:
+    @cached_property
+    def _files_by_head_name(self) -> Dict[str, ImpactedFile]:
+        files_by_head_name = {}
         for file in self.files:
-            if file.head_name == path:
-                return file
+            files_by_head_name.setdefault(file.head_name, file)
+        return files_by_head_name
+
+    def _should_stream(self) -> bool:
+        """
+        Whether to stream the raw data instead of loading every file: only when
+        `ijson` is available, the files weren't loaded yet and no file was
+        streamed yet (later lookups build the index instead of parsing again).
+        """
+        return ijson is not None and "files" not in self.__dict__ and not self._streamed
+
+    def impacted_file(self, path: str) -> Optional[ImpactedFile]:
+        if self._should_stream():
+            self._streamed = True
+            # stop parsing once the file is found
+            for data in self._stream_raw_files():
+                if data.get("head_name") == path:
+                    return ImpactedFile.create(**data)
+            return None
+        return self._files_by_head_name.get(path)
+
+    @cached_property
+    def impacted_files_count(self) -> int:
+        if self._should_stream():
+            # count the files without building them
+            return sum(
+                1
+                for prefix, event, _ in self._parse_raw_comparison_data()
+                if prefix == "files.item" and event == "start_map"
+            )
+        return len(self.files)
 
     @cached_property
     def impacted_files(self) -> List[ImpactedFile]:
@@ -994,20 +1339,53 @@ class ComparisonReport(object):
     def impacted_files_with_direct_changes(self) -> List[ImpactedFile]:
         return [file for file in self.files if file.has_diff or not file.has_changes]
 
-    def _fetch_raw_comparison_data(self) -> dict:
+    @cached_property
+    def _raw_comparison_data(self) -> Optional[str]:
         """
-        Fetches the raw comparison data from storage
+        Fetches the raw comparison data from storage (once)
         """
-        repository = self.commit_comparison.compare_commit.repository
-        archive_service = ArchiveService(repository)
+        if not self.commit_comparison.report_storage_path:
+            return None
         try:
-            data = archive_service.read_file(self.commit_comparison.report_storage_path)
-            return json.loads(data)
+            if self.batch is not None:
+                return self.batch.read(self.commit_comparison)
+            repository = self.commit_comparison.compare_commit.repository
+            archive_service = ArchiveService(repository)
+            return archive_service.read_file(self.commit_comparison.report_storage_path)
         except:
             log.error(
                 "ComparisonReport - couldn't fetch data from storage", exc_info=True
             )
+            return None
+
+    def _fetch_raw_comparison_data(self) -> dict:
+        data = self._raw_comparison_data
+        if data is None:
             return {}
+        try:
+            return json.loads(data)
+        except ValueError:
+            log.error("ComparisonReport - couldn't parse data", exc_info=True)
+            return {}
+
+    def _parse_raw_comparison_data(self) -> Iterator[tuple]:
+        """
+        Streams the `ijson` parser events of the raw comparison data.
+        """
+        data = self._raw_comparison_data
+        if data is None:
+            return
+        try:
+            yield from ijson.parse(io.BytesIO(data.encode()), use_float=True)
+        except ijson.JSONError:
+            log.error("ComparisonReport - couldn't parse data", exc_info=True)
+
+    def _stream_raw_files(self) -> Iterator[dict]:
+        """
+        Streams the raw data of each impacted file, parsing only as much of
+        the comparison data as is consumed.
+        """
+        yield from ijson.items(self._parse_raw_comparison_data(), "files.item")
 
 
 class PullRequestComparison(Comparison):
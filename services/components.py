@@ -1,10 +1,13 @@
-from typing import List
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from django.utils.functional import cached_property
 from shared.components import Component
+from shared.helpers.numeric import ratio
 from shared.reports.filtered import FilteredReport
 from shared.reports.resources import Report
 from shared.reports.types import ReportTotals
+from shared.utils.match import match
 
 from codecov_auth.models import Owner
 from core.models import Commit
@@ -31,10 +34,167 @@ def component_filtered_report(report: Report, component: Component) -> FilteredR
     return filtered_report
 
 
+def sum_totals(totals: List[ReportTotals], sessions: int = 0) -> ReportTotals:
+    """
+    Aggregates the totals of a set of files.
+    """
+    (
+        lines,
+        hits,
+        misses,
+        partials,
+        branches,
+        methods,
+        messages,
+        complexity,
+        complexity_total,
+    ) = (
+        sum(getattr(file_totals, field) or 0 for file_totals in totals)
+        for field in (
+            "lines",
+            "hits",
+            "misses",
+            "partials",
+            "branches",
+            "methods",
+            "messages",
+            "complexity",
+            "complexity_total",
+        )
+    )
+    return ReportTotals(
+        files=len(totals),
+        lines=lines,
+        hits=hits,
+        misses=misses,
+        partials=partials,
+        coverage=ratio(hits, lines) if lines else None,
+        branches=branches,
+        methods=methods,
+        messages=messages,
+        sessions=sessions,
+        complexity=complexity,
+        complexity_total=complexity_total,
+    )
+
+
+class ComponentsTotals:
+    """
+    Base, head and patch totals of all the components of a comparison.
+
+    Filtering the reports per component (see `component_filtered_report`)
+    matches every file against the component's paths and walks the whole
+    report (and diff) again for each of base, head and patch totals.  Here
+    each file is matched against the distinct path patterns once, the totals
+    of each file are computed once per distinct set of matching flags, and
+    the totals of every component are accumulated in a single pass over each
+    report and over the diff.
+    """
+
+    def __init__(self, comparison: Comparison, components: List[Component]):
+        self.comparison = comparison
+        self.components = components
+        # components sharing the same path patterns are matched together
+        self._components_by_paths: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        for idx, component in enumerate(components):
+            self._components_by_paths[tuple(component.paths or ())].append(idx)
+
+    @cached_property
+    def base_totals(self) -> List[Optional[ReportTotals]]:
+        return self._report_totals(self.comparison.base_report)
+
+    @cached_property
+    def head_totals(self) -> List[Optional[ReportTotals]]:
+        return self._report_totals(self.comparison.head_report)
+
+    @cached_property
+    def patch_totals(self) -> List[Optional[ReportTotals]]:
+        report = self.comparison.head_report
+        diff = self.comparison.git_comparison["diff"]
+        if report is None or not diff or not diff.get("files"):
+            return [None] * len(self.components)
+
+        files = [
+            path
+            for path, data in diff["files"].items()
+            if data["type"] in ("modified", "new")
+        ]
+        # a copy so that the (filtered) totals aren't saved into the diff
+        per_file_totals = self._accumulate(
+            report,
+            files,
+            lambda file_report, path: file_report.apply_diff(dict(diff["files"][path])),
+        )
+        return [sum_totals(totals) for totals in per_file_totals]
+
+    def _report_totals(self, report: Optional[Report]) -> List[Optional[ReportTotals]]:
+        if report is None:
+            return [None] * len(self.components)
+
+        per_file_totals = self._accumulate(
+            report, report.files, lambda file_report, _: file_report.totals
+        )
+        return [
+            sum_totals(totals, sessions=self._sessions_count(report, component))
+            for component, totals in zip(self.components, per_file_totals)
+        ]
+
+    def _accumulate(self, report: Report, files: List[str], file_totals):
+        """
+        Returns the `file_totals(file_report, path)` of each of `files` that
+        belongs to each component.  A file's totals are computed once for all
+        the components with the same matching flags.
+        """
+        flags_per_component = [
+            tuple(sorted(component.get_matching_flags(report.flags.keys())))
+            for component in self.components
+        ]
+        # reports filtered by each distinct set of flags (all sessions if none)
+        reports = {
+            flags: report.filter(flags=list(flags)) if flags else report
+            for flags in set(flags_per_component)
+        }
+
+        per_file_totals = [[] for _ in self.components]
+        for path in files:
+            # the same file totals are shared by the components with the same flags
+            totals_by_flags = {}
+            for paths, components in self._components_by_paths.items():
+                if paths and not match(list(paths), path):
+                    continue
+                for idx in components:
+                    flags = flags_per_component[idx]
+                    if flags not in totals_by_flags:
+                        file_report = reports[flags].get(path)
+                        totals_by_flags[flags] = (
+                            file_totals(file_report, path) if file_report else None
+                        )
+                    if totals_by_flags[flags] is not None:
+                        per_file_totals[idx].append(totals_by_flags[flags])
+        return per_file_totals
+
+    def _sessions_count(self, report: Report, component: Component) -> int:
+        flags = set(component.get_matching_flags(report.flags.keys()))
+        if not flags:
+            return len(report.sessions)
+        return sum(
+            1
+            for session in report.sessions.values()
+            if flags.intersection(session.flags or [])
+        )
+
+
 class ComponentComparison:
-    def __init__(self, comparison: Comparison, component: Component):
+    def __init__(
+        self,
+        comparison: Comparison,
+        component: Component,
+        components_totals: Optional[ComponentsTotals] = None,
+    ):
         self.comparison = comparison
         self.component = component
+        # totals shared with the other components of the comparison (if any)
+        self.components_totals = components_totals
 
     @cached_property
     def base_report(self) -> FilteredReport:
@@ -44,15 +204,27 @@ class ComponentComparison:
     def head_report(self) -> FilteredReport:
         return component_filtered_report(self.comparison.head_report, self.component)
 
+    @cached_property
+    def _components_totals_index(self) -> Optional[int]:
+        if self.components_totals is None:
+            return None
+        return self.components_totals.components.index(self.component)
+
     @cached_property
     def base_totals(self) -> ReportTotals:
+        if self._components_totals_index is not None:
+            return self.components_totals.base_totals[self._components_totals_index]
         return self.base_report.totals
 
     @cached_property
     def head_totals(self) -> ReportTotals:
+        if self._components_totals_index is not None:
+            return self.components_totals.head_totals[self._components_totals_index]
         return self.head_report.totals
 
     @cached_property
     def patch_totals(self) -> ReportTotals:
+        if self._components_totals_index is not None:
+            return self.components_totals.patch_totals[self._components_totals_index]
         git_comparison = self.comparison.git_comparison
         return self.head_report.apply_diff(git_comparison["diff"])
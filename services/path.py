@@ -1,8 +1,11 @@
 import re
+from array import array
+from bisect import bisect_left
 from collections import defaultdict
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from functools import cached_property
-from typing import Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 from asgiref.sync import async_to_sync
 from django.conf import settings
@@ -13,6 +16,8 @@ from shared.torngit.exceptions import TorngitClientError
 from codecov_auth.models import Owner
 from core.models import Commit
 from services.repo_providers import RepoProviderService
+from services.report import FileSummaryTable
+from services.report_cache import report_cache
 
 
 class PathNode:
@@ -67,9 +72,15 @@ class Dir(PathNode):
 
     full_path: str
     children: List[PathNode]
+    precomputed_totals: Optional[ReportTotals] = field(
+        default=None, compare=False, repr=False
+    )
 
     @cached_property
     def totals(self):
+        if self.precomputed_totals is not None:
+            return self.precomputed_totals
+
         # A dir's totals are sum of its children's totals
         totals = ReportTotals.default_totals()
         for child in self.children:
@@ -141,28 +152,256 @@ def dashboard_commit_file_url(
     return f"{settings.CODECOV_DASHBOARD_URL}/{service}/{owner}/{repo}/commit/{commit_sha}/{commit_path}"
 
 
+class PathTrie:
+    """
+    Trie over a report's file paths.  Directories are dicts mapping names to
+    child directories or, for files, to the file's full path.  Children keep
+    the order in which they first appear in the report.
+
+    Looking up a directory only walks the components of its path, so listing
+    a directory or its subtree doesn't need to scan every file in the report.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self.paths = list(paths)
+        self.positions = {}
+        self.root = {}
+        self._directory_totals: Dict[str, ReportTotals] = {}
+        for position, path in enumerate(self.paths):
+            self.positions[path] = position
+            node = self.root
+            *dirnames, filename = path.split("/")
+            for dirname in dirnames:
+                child = node.get(dirname)
+                if not isinstance(child, dict):
+                    child = node[dirname] = {}
+                node = child
+            node.setdefault(filename, path)
+
+    @property
+    def has_directory_totals(self) -> bool:
+        return "" in self._directory_totals
+
+    def find(self, path: str) -> Optional[Union[dict, str]]:
+        """
+        Returns the directory node (or file path) at the given path.
+        """
+        node = self.root
+        if not path:
+            return node
+        for name in path.split("/"):
+            if not isinstance(node, dict):
+                return None
+            node = node.get(name)
+            if node is None:
+                return None
+        return node
+
+    def files_under(self, path: str) -> List[str]:
+        """
+        All files at or under the given path, in report order.
+        """
+        if not path:
+            return self.paths
+        node = self.find(path)
+        if node is None:
+            return []
+        if isinstance(node, str):
+            return [node]
+
+        files = []
+        stack = [node]
+        while stack:
+            for child in stack.pop().values():
+                if isinstance(child, dict):
+                    stack.append(child)
+                else:
+                    files.append(child)
+        return sorted(files, key=self.positions.__getitem__)
+
+    def directory_totals(
+        self, path: str, file_totals: Callable[[str], ReportTotals]
+    ) -> Optional[ReportTotals]:
+        """
+        Totals of the directory at the given path.  The first lookup computes
+        the totals of every directory in its subtree in one bottom-up pass
+        (reading each file's totals once) and later lookups are memoized.
+        """
+        if path in self._directory_totals:
+            return self._directory_totals[path]
+        node = self.find(path)
+        if not isinstance(node, dict):
+            return None
+
+        stack = [(node, path, False)]
+        while stack:
+            node, dir_path, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, dir_path, True))
+                for name, child in node.items():
+                    child_path = f"{dir_path}/{name}" if dir_path else name
+                    if (
+                        isinstance(child, dict)
+                        and child_path not in self._directory_totals
+                    ):
+                        stack.append((child, child_path, False))
+                continue
+
+            totals = ReportTotals.default_totals()
+            for name, child in node.items():
+                if isinstance(child, dict):
+                    child_totals = self._directory_totals[
+                        f"{dir_path}/{name}" if dir_path else name
+                    ]
+                else:
+                    child_totals = file_totals(child)
+                totals.lines += child_totals.lines or 0
+                totals.hits += child_totals.hits or 0
+                totals.partials += child_totals.partials or 0
+                totals.misses += child_totals.misses or 0
+            self._directory_totals[dir_path] = totals
+
+        return self._directory_totals[path]
+
+    def directory_totals_table(
+        self, file_totals: Callable[[str], ReportTotals]
+    ) -> Dict[str, list]:
+        """
+        Lines, hits, partials and misses of every directory, in a form that
+        can be cached and later restored with `load_directory_totals`.
+        """
+        self.directory_totals("", file_totals)
+        return {
+            path: [totals.lines, totals.hits, totals.partials, totals.misses]
+            for path, totals in self._directory_totals.items()
+        }
+
+    def load_directory_totals(self, table: Dict[str, list]):
+        for path, (lines, hits, partials, misses) in table.items():
+            totals = ReportTotals.default_totals()
+            totals.lines = lines
+            totals.hits = hits
+            totals.partials = partials
+            totals.misses = misses
+            self._directory_totals[path] = totals
+
+    @cached_property
+    def _trigrams(self) -> Dict[str, array]:
+        """
+        Maps every trigram of the lowercase paths to the (sorted) positions
+        of the paths containing it.  Built on first search.
+        """
+        trigrams = defaultdict(lambda: array("I"))
+        for position, path in enumerate(self.paths):
+            path = path.lower()
+            for trigram in {path[i : i + 3] for i in range(len(path) - 2)}:
+                trigrams[trigram].append(position)
+        return dict(trigrams)
+
+    def _search_candidates(self, term: str) -> Iterable[int]:
+        """
+        Positions of the paths that may contain `term` (lowercase), in order.
+        """
+        if len(term) < 3:
+            return range(len(self.paths))
+
+        postings = []
+        for trigram in {term[i : i + 3] for i in range(len(term) - 2)}:
+            positions = self._trigrams.get(trigram)
+            if positions is None:
+                return []
+            postings.append(positions)
+        postings.sort(key=len)
+
+        # intersect starting from the rarest trigram, binary searching the others
+        candidates = postings[0]
+        for positions in postings[1:]:
+            candidates = [
+                position
+                for position in candidates
+                if _sorted_contains(positions, position)
+            ]
+            if not candidates:
+                break
+        return candidates
+
+    def search(
+        self,
+        term: str,
+        path: str = "",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Files under `path` whose path relative to `path` contains `term`
+        (case-insensitive), in report order.  `offset` and `limit` page
+        through the results without checking every candidate.
+        """
+        if limit == 0:
+            return []
+
+        term = term.lower()
+        matches = []
+        skipped = 0
+        for position in self._search_candidates(term):
+            full_path = self.paths[position]
+            if not is_subpath(full_path, path):
+                continue
+            relative_path = PrefixedPath(full_path=full_path, prefix=path).relative_path
+            if term not in relative_path.lower():
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            matches.append(full_path)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+
+def _sorted_contains(values: array, value: int) -> bool:
+    i = bisect_left(values, value)
+    return i < len(values) and values[i] == value
+
+
+def report_path_trie(report: Report) -> PathTrie:
+    """
+    The `PathTrie` of the given report, built on first use and kept on the report.
+    """
+    trie = getattr(report, "_path_trie", None)
+    if trie is None:
+        trie = PathTrie(report.files)
+        try:
+            report._path_trie = trie
+        except AttributeError:
+            pass
+    return trie
+
+
 class ReportPaths:
     """
     Contains methods for getting path information out of a single report.
+    A `FileSummaryTable` can be passed instead of a report when only totals
+    are needed.
     """
 
     def __init__(
-        self, report: Report, path: PrefixedPath = None, search_term: str = None
+        self,
+        report: Union[Report, FileSummaryTable],
+        path: PrefixedPath = None,
+        search_term: str = None,
     ):
         self.report = report
         self.prefix = path or ""
-
-        self._paths = [
-            PrefixedPath(full_path=full_path, prefix=self.prefix)
-            for full_path in report.files
-            if is_subpath(full_path, self.prefix)
-        ]
+        self.search_term = search_term
+        self._trie = report_path_trie(report)
 
         if search_term:
+            self._paths = PathSearchResults(self._trie, search_term, self.prefix)
+        else:
             self._paths = [
-                path
-                for path in self.paths
-                if search_term.lower() in path.relative_path.lower()
+                PrefixedPath(full_path=full_path, prefix=self.prefix)
+                for full_path in self._trie.files_under(self.prefix)
             ]
 
     @property
@@ -173,22 +412,123 @@ class ReportPaths:
         """
         Return a flat file list of all files under the specified `path` prefix/directory.
         """
-        return [
-            File(full_path=path.full_path, totals=self._totals(path))
-            for path in self.paths
-        ]
+        return list(self.lazy_filelist())
 
-    def single_directory(self) -> Iterable[Union[File, Dir]]:
+    def lazy_filelist(self) -> "LazyPathNodes":
+        """
+        Same as `full_filelist` but files are only built (and their totals
+        read) when accessed - slicing it only materializes the slice.
+        """
+        return LazyPathNodes(
+            self.paths,
+            lambda path: File(full_path=path.full_path, totals=self._totals(path)),
+            lambda path: PathEntry(
+                full_path=path.full_path,
+                is_dir=False,
+                read_totals=lambda: self._totals(path),
+            ),
+        )
+
+    def single_directory(
+        self, max_depth: Optional[int] = None
+    ) -> Iterable[Union[File, Dir]]:
         """
         Return a single directory (specified by `path`) of mixed file/directory results.
+
+        Directory totals come from the precomputed totals of the report's `PathTrie`.
+        When `max_depth` is given, directories nested deeper than `max_depth` levels
+        are returned without their children (their totals are still complete).
+        """
+        return list(self.lazy_single_directory(max_depth))
+
+    def lazy_single_directory(
+        self, max_depth: Optional[int] = None
+    ) -> Sequence[Union[File, Dir]]:
+        """
+        Same as `single_directory` but entries (and their subtrees) are only
+        built when accessed - slicing it only materializes the slice.
+        """
+        node = self._trie.find(self.prefix)
+        if self.search_term or not isinstance(node, dict):
+            return self._single_directory_recursive(self.paths)
+        self._load_directory_totals()
+        return self._directory(node, self.prefix, max_depth)
+
+    def _load_directory_totals(self):
+        """
+        Unfiltered reports built by `services.report.build_report_from_commit`
+        keep the totals of all their directories in the report cache, so they
+        are computed once per report rather than once per request.
         """
-        return self._single_directory_recursive(self.paths)
+        # read from the instance itself so filtered views proxying the
+        # unfiltered report never pick up its key
+        cache_key = getattr(self.report, "__dict__", {}).get("_cache_key")
+        if cache_key is None or self._trie.has_directory_totals:
+            return
+
+        table = report_cache.get_directory_totals(cache_key)
+        if table is not None:
+            self._trie.load_directory_totals(table)
+        else:
+            report_cache.set_directory_totals(
+                cache_key, self._trie.directory_totals_table(self._file_totals)
+            )
+
+    def _directory(
+        self, node: dict, dir_path: str, max_depth: Optional[int]
+    ) -> "LazyPathNodes":
+        def build(entry) -> Union[File, Dir]:
+            name, child = entry
+            if not isinstance(child, dict):
+                return File(full_path=child, totals=self._file_totals(child))
+
+            full_path = f"{dir_path}/{name}" if dir_path else name
+            if max_depth is None or max_depth > 1:
+                children = list(
+                    self._directory(child, full_path, max_depth and max_depth - 1)
+                )
+            else:
+                children = []
+            return Dir(
+                full_path=full_path,
+                children=children,
+                precomputed_totals=self._directory_totals(full_path),
+            )
+
+        def describe(entry) -> PathEntry:
+            name, child = entry
+            if not isinstance(child, dict):
+                return PathEntry(
+                    full_path=child,
+                    is_dir=False,
+                    read_totals=lambda: self._file_totals(child),
+                )
+
+            full_path = f"{dir_path}/{name}" if dir_path else name
+            return PathEntry(
+                full_path=full_path,
+                is_dir=True,
+                read_totals=lambda: self._directory_totals(full_path),
+            )
+
+        return LazyPathNodes(list(node.items()), build, describe)
 
     def _totals(self, path: PrefixedPath) -> ReportTotals:
         """
         Returns the report totals for a given prefixed path.
         """
-        return self.report.get(path.full_path).totals
+        return self._file_totals(path.full_path)
+
+    def _directory_totals(self, full_path: str) -> ReportTotals:
+        if isinstance(self.report, FileSummaryTable):
+            # the table's prefix sums make this a couple of bisections
+            return self.report.totals_under(full_path)
+        return self._trie.directory_totals(full_path, self._file_totals)
+
+    def _file_totals(self, full_path: str) -> ReportTotals:
+        if isinstance(self.report, FileSummaryTable):
+            return self.report.file_totals(full_path)
+        return self.report.get(full_path).totals
 
     def _single_directory_recursive(
         self, paths: Iterable[PrefixedPath]
@@ -218,6 +558,103 @@ class ReportPaths:
         return results
 
 
+class PathSearchResults(Sequence):
+    """
+    Paths of the files matching a search term.  Slicing it pages through the
+    `PathTrie` search, so only the candidates up to the end of the slice are
+    checked - every match is only found when the length is needed.
+    """
+
+    def __init__(self, trie: PathTrie, term: str, prefix: str):
+        self._trie = trie
+        self._term = term
+        self._prefix = prefix
+
+    @cached_property
+    def _all(self) -> List[PrefixedPath]:
+        return self._prefixed(self._trie.search(self._term, self._prefix))
+
+    def _prefixed(self, full_paths: Iterable[str]) -> List[PrefixedPath]:
+        return [
+            PrefixedPath(full_path=full_path, prefix=self._prefix)
+            for full_path in full_paths
+        ]
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def __bool__(self) -> bool:
+        return len(self[:1]) > 0
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or "_all" in self.__dict__:
+            return self._all[index]
+
+        start, stop, step = index.start or 0, index.stop, index.step
+        if start < 0 or (stop is not None and stop < 0) or step not in (None, 1):
+            return self._all[index]
+        limit = None if stop is None else max(stop - start, 0)
+        return self._prefixed(
+            self._trie.search(self._term, self._prefix, offset=start, limit=limit)
+        )
+
+
+class PathEntry(PathNode):
+    """
+    Lightweight stand-in for the `File` or `Dir` node of an entry of
+    `LazyPathNodes`, without children and reading its totals on first access.
+    """
+
+    def __init__(
+        self, full_path: str, is_dir: bool, read_totals: Callable[[], ReportTotals]
+    ):
+        self.full_path = full_path
+        self.is_dir = is_dir
+        self._read_totals = read_totals
+
+    @cached_property
+    def totals(self) -> ReportTotals:
+        return self._read_totals()
+
+
+class LazyPathNodes(Sequence):
+    """
+    Sequence of path nodes that are built from their entries on access.
+    `describe` turns an entry into a `PathEntry` so the nodes can be sorted
+    without building them.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence,
+        build: Callable,
+        describe: Callable[..., PathEntry],
+    ):
+        self._entries = entries
+        self._build = build
+        self._describe = describe
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build(entry) for entry in self._entries[index]]
+        return self._build(self._entries[index])
+
+    def sorted(
+        self, key: Callable[[PathEntry], Any], reverse: bool = False
+    ) -> "LazyPathNodes":
+        """
+        Stable sort by `key` of the entries' `PathEntry`, only the totals
+        that `key` reads are looked up and no node is built.
+        """
+        entries = list(self._entries)
+        keys = [key(self._describe(entry)) for entry in entries]
+        order = sorted(range(len(entries)), key=keys.__getitem__, reverse=reverse)
+        return LazyPathNodes([entries[i] for i in order], self._build, self._describe)
+
+
 def provider_path_exists(path: str, commit: Commit, owner: Owner):
     """
     Check whether the given path exists on the provider.
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.functional import cached_property
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class ProviderCache:
+    """
+    Redis cache for data fetched from git providers that can never change:
+    the comparison between two commit SHAs and the source of a file at a
+    commit.  Values are zlib-compressed, have a long TTL and are shared by
+    every worker.
+
+    Sources are also kept in an LRU bounded by their total (compressed) size:
+    a sorted set holds when each source was last read, and the least recently
+    read sources are evicted whenever the total exceeds the budget.
+    """
+
+    metrics_prefix = "services.provider_cache"
+
+    # last time each source was read (or written)
+    source_lru_key = "provider_cache/source_lru"
+    # compressed size of each source
+    source_sizes_key = "provider_cache/source_sizes"
+    # total compressed size of the sources
+    source_bytes_key = "provider_cache/source_bytes"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PROVIDER_CACHE_ENABLED
+
+    @cached_property
+    def redis(self):
+        return get_redis_connection()
+
+    def comparison_key(self, repoid: int, base_commitid: str, head_commitid: str):
+        return f"provider_cache/compare/{repoid}/{base_commitid}/{head_commitid}"
+
+    def get_comparison(self, key: str) -> Optional[Tuple[dict, dict]]:
+        """
+        Returns the cached `(comparison, reverse_comparison)`, if any.
+        """
+        cached = self._get(key, "compare")
+        if cached is None:
+            return None
+        return cached["comparison"], cached["reverse_comparison"]
+
+    def set_comparison(self, key: str, comparison: dict, reverse_comparison: dict):
+        self._set(
+            key,
+            "compare",
+            {
+                "comparison": comparison,
+                # only the commits of the reverse comparison are ever used
+                "reverse_comparison": {"commits": reverse_comparison["commits"]},
+            },
+            ttl=settings.PROVIDER_CACHE_COMPARISON_TTL,
+        )
+
+    def source_key(self, repoid: int, commitid: str, path: str) -> str:
+        path_hash = hashlib.sha1(path.encode()).hexdigest()
+        return f"provider_cache/source/{repoid}/{commitid}/{path_hash}"
+
+    def get_sources(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = self.redis.mget(keys)
+            now = time.time()
+            hits = {key: now for key, value in zip(keys, values) if value is not None}
+            if hits:
+                self.redis.zadd(self.source_lru_key, hits)
+        except (RedisError, OSError) as e:
+            log.warning("Error reading from provider cache", extra=dict(error=e))
+            return [None] * len(keys)
+
+        if hits:
+            metrics.incr(f"{self.metrics_prefix}.source.hit", len(hits))
+        if len(hits) < len(keys):
+            metrics.incr(f"{self.metrics_prefix}.source.miss", len(keys) - len(hits))
+        return [
+            zlib.decompress(value) if value is not None else None for value in values
+        ]
+
+    def get_source(self, key: str) -> Optional[bytes]:
+        return self.get_sources([key])[0]
+
+    def set_source(self, key: str, content: bytes):
+        if not self.enabled:
+            return
+
+        compressed = zlib.compress(content)
+        size = len(compressed)
+        if size > settings.PROVIDER_CACHE_SOURCE_MAX_OBJECT_BYTES:
+            metrics.incr(f"{self.metrics_prefix}.source.too_large")
+            return
+
+        try:
+            previous_size = int(self.redis.hget(self.source_sizes_key, key) or 0)
+            pipeline = self.redis.pipeline()
+            pipeline.set(key, compressed, ex=settings.PROVIDER_CACHE_SOURCE_TTL)
+            pipeline.zadd(self.source_lru_key, {key: time.time()})
+            pipeline.hset(self.source_sizes_key, key, size)
+            pipeline.incrby(self.source_bytes_key, size - previous_size)
+            total_size = pipeline.execute()[-1]
+
+            excess = total_size - settings.PROVIDER_CACHE_SOURCE_MAX_BYTES
+            if excess > 0:
+                self._evict_sources(excess)
+        except (RedisError, OSError) as e:
+            log.warning("Error writing to provider cache", extra=dict(error=e))
+
+    def _evict_sources(self, excess: int):
+        """
+        Evicts the least recently read sources until `excess` bytes are freed.
+        """
+        evicted = 0
+        while excess > 0:
+            oldest = self.redis.zrange(self.source_lru_key, 0, 99)
+            if not oldest:
+                break
+
+            keys, freed = [], 0
+            for key, size in zip(
+                oldest, self.redis.hmget(self.source_sizes_key, oldest)
+            ):
+                keys.append(key)
+                freed += int(size or 0)
+                if freed >= excess:
+                    break
+
+            pipeline = self.redis.pipeline()
+            pipeline.delete(*keys)
+            pipeline.zrem(self.source_lru_key, *keys)
+            pipeline.hdel(self.source_sizes_key, *keys)
+            pipeline.decrby(self.source_bytes_key, freed)
+            pipeline.execute()
+            excess -= freed
+            evicted += len(keys)
+
+        metrics.incr(f"{self.metrics_prefix}.source.eviction", evicted)
+
+    def _get(self, key: str, kind: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        try:
+            compressed = self.redis.get(key)
+        except (RedisError, OSError) as e:
+            log.warning("Error reading from provider cache", extra=dict(error=e))
+            return None
+
+        metrics.incr(
+            f"{self.metrics_prefix}.{kind}.{'miss' if compressed is None else 'hit'}"
+        )
+        if compressed is None:
+            return None
+        return json.loads(zlib.decompress(compressed))
+
+    def _set(self, key: str, kind: str, value: Any, ttl: int):
+        if not self.enabled:
+            return
+
+        compressed = zlib.compress(json.dumps(value).encode())
+        if len(compressed) > settings.PROVIDER_CACHE_MAX_BYTES:
+            metrics.incr(f"{self.metrics_prefix}.{kind}.too_large")
+            return
+
+        try:
+            self.redis.set(key, compressed, ex=ttl)
+        except (RedisError, OSError) as e:
+            log.warning("Error writing to provider cache", extra=dict(error=e))
+
+
+provider_cache = ProviderCache()
+
+
+async def fetch_sources(
+    adapter, repoid: int, commitid: str, paths: List[str]
+) -> Dict[str, Union[bytes, Exception]]:
+    """
+    Returns the source (as bytes) of each path at the given commit, or the
+    exception raised fetching it.  Sources missing from the provider cache are
+    fetched from the provider concurrently (at most
+    `PROVIDER_SOURCE_FETCH_CONCURRENCY` at a time) and cached.
+    """
+    keys = [provider_cache.source_key(repoid, commitid, path) for path in paths]
+    if provider_cache.enabled:
+        cached = await sync_to_async(provider_cache.get_sources)(keys)
+    else:
+        cached = [None] * len(keys)
+    sources = {path: content for path, content in zip(paths, cached)}
+
+    semaphore = asyncio.Semaphore(settings.PROVIDER_SOURCE_FETCH_CONCURRENCY)
+
+    async def fetch(path: str, key: str) -> bytes:
+        async with semaphore:
+            content = (await adapter.get_source(path, commitid))["content"]
+        if isinstance(content, str):
+            content = content.encode()
+        if provider_cache.enabled:
+            await sync_to_async(provider_cache.set_source)(key, content)
+        return content
+
+    missing = [(path, key) for path, key in zip(paths, keys) if sources[path] is None]
+    results = await asyncio.gather(
+        *(fetch(path, key) for path, key in missing), return_exceptions=True
+    )
+    for (path, _), result in zip(missing, results):
+        sources[path] = result
+    return sources
+
+
+async def fetch_source(adapter, repoid: int, commitid: str, path: str) -> bytes:
+    source = (await fetch_sources(adapter, repoid, commitid, [path]))[path]
+    if isinstance(source, Exception):
+        raise source
+    return source
@@ -1,29 +1,148 @@
 import logging
-from typing import Optional
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from copy import deepcopy
+from datetime import datetime
+from itertools import accumulate
+from typing import Iterable, Optional, Tuple
 
 from django.conf import settings
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch
 from django.utils.functional import cached_property
+from minio.error import S3Error
 from shared.helpers.flag import Flag
+from shared.helpers.numeric import ratio
 from shared.reports.readonly import ReadOnlyReport as SharedReadOnlyReport
-from shared.reports.resources import Report
+from shared.reports.resources import END_OF_CHUNK, Report
 from shared.reports.types import ReportFileSummary, ReportTotals
 from shared.storage.exceptions import FileNotInStorageError
+from shared.utils.merge import LineType, line_type, merge_all
 from shared.utils.sessions import Session, SessionType
 
 from core.models import Commit
 from reports.models import AbstractTotals, CommitReport, ReportDetails, ReportSession
 from services.archive import ArchiveService
+from services.report_cache import ReportData, report_cache
+from services.report_parsing import report_parser
+from services.single_flight import SingleFlight, distributed_lock
 from utils.config import RUN_ENV
+from utils.model_utils import prefetch_archive_fields
 
 log = logging.getLogger(__name__)
 
 
+class SessionTotals:
+    """
+    The lines of a report grouped by their type, complexity, number of messages
+    and the coverage of each of their sessions (the line's "signature"), along
+    with the sessions present in each file.
+
+    It takes one walk over every line of the report to build, after which the
+    totals of any set of sessions (e.g. the sessions of a flag, with or without
+    the carried forward ones) are summed over the distinct signatures - of
+    which there are few - instead of filtering and walking every line again.
+    """
+
+    def __init__(self, report: Report):
+        # the lines of very large reports are walked in a process pool
+        self.signatures, self.file_sessions = report_parser.line_signatures(report)
+
+    def totals(self, session_ids: Iterable[int]) -> ReportTotals:
+        """
+        Totals of the report restricted to the given sessions (as filtering the
+        report by the flags of those sessions would give).
+        """
+        session_ids = frozenset(session_ids)
+        hits = misses = partials = branches = methods = messages = 0
+        complexity = complexity_total = 0
+        for signature, count in self.signatures.items():
+            type, line_complexity, line_messages, sessions = signature
+            coverages = [coverage for sid, coverage in sessions if sid in session_ids]
+            if not coverages:
+                continue
+
+            # like the filtered report, every line with one of the sessions
+            # counts towards branches, methods, messages and complexity, even
+            # when its coverage (e.g. ignored) doesn't count towards lines
+            if type == "b":
+                branches += count
+            elif type == "m":
+                methods += count
+            messages += line_messages * count
+            if isinstance(line_complexity, tuple):
+                complexity += line_complexity[0] * count
+                complexity_total += line_complexity[1] * count
+            elif line_complexity:
+                complexity += line_complexity * count
+
+            coverage_type = line_type(merge_all(coverages))
+            if coverage_type == LineType.hit:
+                hits += count
+            elif coverage_type == LineType.miss:
+                misses += count
+            elif coverage_type == LineType.partial:
+                partials += count
+
+        lines = hits + misses + partials
+        return ReportTotals(
+            files=sum(1 for sessions in self.file_sessions if sessions & session_ids),
+            lines=lines,
+            hits=hits,
+            misses=misses,
+            partials=partials,
+            coverage=ratio(hits, lines) if lines else None,
+            branches=branches,
+            methods=methods,
+            messages=messages,
+            sessions=len(session_ids),
+            complexity=complexity,
+            complexity_total=complexity_total,
+        )
+
+
+class ReportFlag(Flag):
+    """
+    Flag whose totals are computed from the `SessionTotals` of its report.
+    """
+
+    def __init__(self, report, name, *args, **kwargs):
+        super().__init__(report, name, *args, **kwargs)
+        self._session_totals_report = report
+
+    @cached_property
+    def totals(self) -> ReportTotals:
+        return self._session_totals_report.flags_totals([self.name])
+
+
 class ReportMixin:
     def file_reports(self):
         for f in self.files:
             yield self.get(f)
 
+    @cached_property
+    def session_totals(self) -> SessionTotals:
+        return SessionTotals(self)
+
+    def flags_totals(
+        self, flags: Iterable[str], include_carriedforward: bool = True
+    ) -> ReportTotals:
+        """
+        Totals of the sessions with any of the given flags.
+        """
+        flags = set(flags)
+        return self.session_totals.totals(
+            sid
+            for sid, session in self.sessions.items()
+            if session.flags
+            and flags.intersection(session.flags)
+            and (
+                include_carriedforward
+                or session.session_type != SessionType.carriedforward
+            )
+        )
+
     @cached_property
     def flags(self):
         """returns dict(:name=<Flag>)"""
@@ -33,7 +152,7 @@ class ReportMixin:
                 carriedforward = session.session_type.value == "carriedforward"
                 carriedforward_from = session.session_extras.get("carriedforward_from")
                 for flag in session.flags:
-                    flags_dict[flag] = Flag(
+                    flags_dict[flag] = ReportFlag(
                         self,
                         flag,
                         carriedforward=carriedforward,
@@ -50,6 +169,70 @@ class ReadOnlyReport(ReportMixin, SharedReadOnlyReport):
     pass
 
 
+class RangedChunks(Sequence):
+    """
+    Stand-in for a report's list of chunks that fetches each file's chunk on
+    demand with a ranged GET (using the chunks offset index) instead of
+    downloading the whole chunks file up front.
+    """
+
+    def __init__(self, archive_service: ArchiveService, commit_sha: str):
+        self.archive_service = archive_service
+        self.commit_sha = commit_sha
+        self.index = archive_service.read_chunks_index(commit_sha)
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.index["offsets"])
+
+    def __getitem__(self, file_index):
+        if isinstance(file_index, slice):
+            return [self[i] for i in range(len(self))[file_index]]
+        if file_index < 0:
+            file_index += len(self)
+        if not 0 <= file_index < len(self):
+            raise IndexError(file_index)
+
+        if file_index not in self._chunks:
+            self._chunks[file_index] = self._read_chunk(file_index)
+        return self._chunks[file_index]
+
+    def __iter__(self):
+        # reading every chunk one by one would be much slower than a single
+        # download of the whole file
+        chunks = self.archive_service.read_chunks(self.commit_sha)
+        return iter(chunks.split(END_OF_CHUNK))
+
+    def _read_chunk(self, file_index: int) -> str:
+        if self.index.get("compressed"):
+            # ranged reads aren't possible so fall back to reading everything
+            self._chunks = dict(enumerate(self))
+            return self._chunks[file_index]
+
+        try:
+            return self.archive_service.read_chunk(
+                self.commit_sha, self.index, file_index
+            )
+        except S3Error as e:
+            if e.code != "PreconditionFailed":
+                raise
+            # chunks file was rewritten after the index was built
+            self.index = self.archive_service.write_chunks_index(self.commit_sha)
+            self._chunks = {}
+            return self.archive_service.read_chunk(
+                self.commit_sha, self.index, file_index
+            )
+
+
+class RangedChunksReport(SerializableReport):
+    """
+    Report whose chunks are read one file at a time from storage.
+    Meant for callers that only look at a handful of files (i.e. single file views).
+    """
+
+    pass
+
+
 def build_report(chunks, files, sessions, totals, report_class=None):
     if report_class is None:
         report_class = SerializableReport
@@ -64,17 +247,159 @@ def build_report_from_commit(commit: Commit, report_class=None):
 
     Chunks are fetched from archive storage and the rest of the data is sourced
     from various `reports_*` tables in the database.
+
+    Concurrent builds of the same report within a process share a single
+    download of the report data and, when the report cache is enabled, builds
+    across workers are serialized with a redis lock so that only one of them
+    misses the cache.
     """
 
-    # TODO: this can be removed once confirmed working well on prod
-    new_report_builder_enabled = (
-        RUN_ENV == "DEV"
-        or RUN_ENV == "STAGING"
-        or RUN_ENV == "TESTING"
-        or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
-    )
+    new_report_builder_enabled = _new_report_builder_enabled(commit)
 
     commit_report = fetch_commit_report(commit)
+    cache_key = report_cache.key(
+        commit,
+        _report_updated_at(commit, commit_report, new_report_builder_enabled),
+    )
+    cached = report_cache.get(cache_key)
+    if cached is not None:
+        return _cacheable_report(
+            build_report(*cached, report_class=report_class), cache_key
+        )
+
+    if report_class is not None and issubclass(report_class, RangedChunksReport):
+        report_data = _load_report_data(
+            commit, commit_report, new_report_builder_enabled, read_chunks=False
+        )
+        if report_data is None:
+            return None
+        try:
+            chunks = RangedChunks(ArchiveService(commit.repository), commit.commitid)
+        except FileNotInStorageError:
+            _log_chunks_not_in_storage(commit)
+            return None
+        return _cacheable_report(
+            build_report(chunks, *report_data[1:], report_class=report_class),
+            cache_key,
+        )
+
+    report_data, shared = report_build_flights.do(
+        (commit.repository_id, commit.commitid, report_class),
+        lambda: _load_cached_report_data(
+            commit, commit_report, new_report_builder_enabled, cache_key
+        ),
+    )
+    if report_data is None:
+        return None
+    if shared:
+        # reports mutate their files and sessions so callers can't share them
+        report_data = ReportData(report_data.chunks, *deepcopy(report_data[1:]))
+    return _cacheable_report(
+        build_report(*report_data, report_class=report_class), cache_key
+    )
+
+
+def _cacheable_report(report: Report, cache_key: Optional[str]) -> Report:
+    """
+    Tags the report with its cache key so that data derived from it (i.e. the
+    directory totals of `services.path.ReportPaths`) can be cached alongside it.
+    Filtered views of the report don't carry the key.
+    """
+    report._cache_key = cache_key
+    return report
+
+
+report_build_flights = SingleFlight("report_build")
+
+
+class ReportRegistry:
+    """
+    Memo of the reports (and filtered reports) of commits, meant to live for a
+    single request so that every consumer of the same report shares one
+    instance - each commit's report is built (and parsed) at most once and
+    filtered views of it are reused.
+
+    Every consumer is given the commit's `full_report`.  Consumers that only
+    look at a few files can ask for a `ranged` report: they get the full
+    report if it was already built, otherwise a `RangedChunksReport` which
+    only reads the chunks of the files that are looked up.
+    """
+
+    def __init__(self):
+        self._reports = {}
+
+    def report(
+        self,
+        commit: Commit,
+        flags: Optional[Iterable[str]] = None,
+        paths: Optional[Iterable[str]] = None,
+        ranged: bool = False,
+    ) -> Optional[Report]:
+        commit_key = (commit.repository_id, commit.commitid)
+        if ranged and (commit_key, False, None, None) in self._reports:
+            ranged = False
+
+        flags = tuple(sorted(flags)) if flags else None
+        paths = tuple(paths) if paths else None
+        key = (commit_key, ranged, flags, paths)
+        if key in self._reports:
+            return self._reports[key]
+
+        if flags or paths:
+            # filtered views of the same (unfiltered) report
+            report = self.report(commit, ranged=ranged)
+            if report is not None:
+                report = report.filter(
+                    flags=list(flags) if flags else None,
+                    paths=list(paths) if paths else None,
+                )
+        elif ranged:
+            report = build_report_from_commit(commit, report_class=RangedChunksReport)
+        else:
+            report = commit.full_report
+
+        self._reports[key] = report
+        return report
+
+
+def _load_cached_report_data(
+    commit: Commit,
+    commit_report: Optional[CommitReport],
+    new_report_builder_enabled: bool,
+    cache_key: Optional[str],
+) -> Optional[ReportData]:
+    """
+    Loads the report data (downloading the chunks) and caches it.
+    """
+    if cache_key is None or not report_cache.enabled:
+        return _load_report_data(commit, commit_report, new_report_builder_enabled)
+
+    with distributed_lock(
+        f"report_build/{cache_key}", timeout=settings.REPORT_BUILD_LOCK_TIMEOUT
+    ):
+        # another worker may have built the report while we waited for the lock
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        report_data = _load_report_data(
+            commit, commit_report, new_report_builder_enabled
+        )
+        if report_data is not None:
+            report_cache.set(cache_key, report_data)
+        return report_data
+
+
+def _load_report_data(
+    commit: Commit,
+    commit_report: Optional[CommitReport],
+    new_report_builder_enabled: bool,
+    read_chunks: bool = True,
+) -> Optional[ReportData]:
+    """
+    Loads everything needed to build the commit's report.  Chunks are downloaded
+    from storage unless `read_chunks` is false.  Returns `None` if there is no report.
+    """
     if commit_report and new_report_builder_enabled:
         files = build_files(commit_report)
         sessions = build_sessions(commit_report)
@@ -90,32 +415,88 @@ def build_report_from_commit(commit: Commit, report_class=None):
         sessions = commit.report["sessions"]
         totals = commit.totals
 
-    try:
-        chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
-        return build_report(chunks, files, sessions, totals, report_class=report_class)
-    except FileNotInStorageError:
-        log.warning(
-            "File for chunks not found in storage",
-            extra=dict(
-                commit=commit.commitid,
-                repo=commit.repository_id,
-            ),
-        )
-        return None
+    chunks = None
+    if read_chunks:
+        try:
+            chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
+        except FileNotInStorageError:
+            _log_chunks_not_in_storage(commit)
+            return None
+
+    return ReportData(chunks, files, sessions, totals)
+
+
+def _log_chunks_not_in_storage(commit: Commit):
+    log.warning(
+        "File for chunks not found in storage",
+        extra=dict(
+            commit=commit.commitid,
+            repo=commit.repository_id,
+        ),
+    )
+
+
+def _new_report_builder_enabled(commit: Commit) -> bool:
+    # TODO: this can be removed once confirmed working well on prod
+    return (
+        RUN_ENV == "DEV"
+        or RUN_ENV == "STAGING"
+        or RUN_ENV == "TESTING"
+        or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
+    )
+
+
+def prefetch_commit_reports(commits: Iterable[Commit]):
+    """
+    Reads the `commits.report` JSON that `build_report_from_commit` needs for the
+    given commits concurrently, instead of one blocking read per report build.
+    Nothing is read when reports are served from the report cache or built from
+    the `reports_*` tables.
+    """
+    if report_cache.enabled:
+        return
+    prefetch_archive_fields(
+        [
+            commit
+            for commit in commits
+            if commit is not None and not _new_report_builder_enabled(commit)
+        ],
+        "report",
+    )
+
+
+def _report_updated_at(
+    commit: Commit,
+    commit_report: Optional[CommitReport],
+    new_report_builder_enabled: bool,
+) -> Optional[datetime]:
+    """
+    When the data that `build_report_from_commit` reads was last changed.
+    This is used to version cached report data.
+    """
+    if commit_report and new_report_builder_enabled:
+        try:
+            return commit_report.reportdetails.updated_at
+        except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+            return None
+    return commit.updatestamp
 
 
 def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
     """
     Fetch a single `CommitReport` for the given commit.
-    All the necessary report relations are prefetched.
+    All the necessary report relations are prefetched.  Only sessions
+    that were successfully processed are fetched.
     """
     return (
         commit.reports.prefetch_related(
             Prefetch(
                 "sessions",
-                queryset=ReportSession.objects.prefetch_related("flags").select_related(
-                    "uploadleveltotals"
-                ),
+                queryset=ReportSession.objects.filter(
+                    state__in=["complete", "processed"]
+                )
+                .prefetch_related("flags")
+                .select_related("uploadleveltotals"),
             ),
         )
         .select_related("reportdetails", "reportleveltotals")
@@ -181,9 +562,9 @@ def build_sessions(commit_report: CommitReport) -> dict[int, Session]:
     carryforward_sessions = {}
     uploaded_flags = set()
 
-    for upload in commit_report.sessions.filter(
-        Q(state="complete") | Q(state="processed")
-    ):
+    # sessions are filtered by state in `fetch_commit_report` - filtering
+    # here would bypass the prefetch and query flags/totals per session
+    for upload in commit_report.sessions.all():
         session = build_session(upload)
         if session.session_type == SessionType.carriedforward:
             carryforward_sessions[upload.order_number] = session
@@ -224,3 +605,225 @@ def build_files(commit_report: CommitReport) -> dict[str, ReportFileSummary]:
         )
         for file in report_details.files_array
     }
+
+
+class FileSummaryTable:
+    """
+    Columnar, read-only view of a report's file summaries.
+
+    Line counts for every file are kept in typed arrays (one per column) and
+    paths in a single list of interned strings, so readers that only need
+    totals (path trees, totals for a directory, etc.) can aggregate over the
+    columns without building a `ReportFileSummary`/`ReportTotals` per file.
+    Those objects are only materialized for the files that are actually
+    looked up.
+
+    Rows keep the order of the report.  The first directory lookup sorts them
+    by path and takes prefix sums of every column, after which the files under
+    a directory are a bisected slice and their totals a difference of sums.
+    """
+
+    columns = ("lines", "hits", "misses", "partials", "branches", "methods")
+
+    def __init__(self):
+        self.paths = []
+        self.file_index = array("q")
+        self.lines = array("q")
+        self.hits = array("q")
+        self.misses = array("q")
+        self.partials = array("q")
+        self.branches = array("q")
+        self.methods = array("q")
+        self._rows = {}
+        self._entries = []
+        self._sorted_paths = None
+        self._sorted_rows = None
+        self._prefix_sums = None
+
+    @staticmethod
+    def _as_totals(totals) -> Optional[ReportTotals]:
+        """
+        Converts totals from their JSON form (a list or dict) to `ReportTotals`.
+        """
+        if totals is None or isinstance(totals, ReportTotals):
+            return totals
+        if isinstance(totals, dict):
+            return ReportTotals(**totals)
+        return ReportTotals(*totals)
+
+    def _append(self, path: str, file_index: int, file_totals, entry):
+        file_totals = self._as_totals(file_totals)
+
+        path = sys.intern(path)
+        self._rows[path] = len(self.paths)
+        self.paths.append(path)
+        self.file_index.append(file_index)
+        self.lines.append(file_totals.lines or 0)
+        self.hits.append(file_totals.hits or 0)
+        self.misses.append(file_totals.misses or 0)
+        self.partials.append(file_totals.partials or 0)
+        self.branches.append(file_totals.branches or 0)
+        self.methods.append(file_totals.methods or 0)
+        self._entries.append(entry)
+
+    @classmethod
+    def from_files_array(cls, files_array: Iterable[dict]) -> "FileSummaryTable":
+        """
+        Builds the table from `ReportDetails.files_array`.
+        """
+        table = cls()
+        for file in files_array:
+            table._append(
+                file["filename"], file["file_index"], file["file_totals"], file
+            )
+        return table
+
+    @classmethod
+    def from_files(cls, files: dict) -> "FileSummaryTable":
+        """
+        Builds the table from a report files dictionary - either the legacy
+        `commits.report["files"]` JSON or `Report._files`.
+        """
+        table = cls()
+        for path, summary in files.items():
+            if not isinstance(summary, ReportFileSummary):
+                summary = ReportFileSummary(*summary)
+                # the legacy JSON holds the totals as lists
+                summary.file_totals = cls._as_totals(summary.file_totals)
+                summary.diff_totals = cls._as_totals(summary.diff_totals)
+            table._append(path, summary.file_index, summary.file_totals, summary)
+        return table
+
+    @property
+    def files(self) -> list[str]:
+        return self.paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._rows
+
+    def _build_index(self):
+        self._sorted_rows = array(
+            "q", sorted(range(len(self.paths)), key=self.paths.__getitem__)
+        )
+        self._sorted_paths = [self.paths[row] for row in self._sorted_rows]
+        self._prefix_sums = {}
+        for name in self.columns:
+            column = getattr(self, name)
+            self._prefix_sums[name] = array(
+                "q",
+                accumulate((column[row] for row in self._sorted_rows), initial=0),
+            )
+
+    def _span_under(self, prefix: str) -> Tuple[int, int]:
+        """
+        Positions (in path order) of the files at or under the given prefix.
+        """
+        if self._sorted_paths is None:
+            self._build_index()
+        if not prefix:
+            return 0, len(self._sorted_paths)
+
+        start = bisect_left(self._sorted_paths, prefix)
+        if start < len(self._sorted_paths) and self._sorted_paths[start] == prefix:
+            return start, start + 1
+        # "0" is the character after "/" so this bounds every path in the directory
+        return (
+            bisect_left(self._sorted_paths, f"{prefix}/", lo=start),
+            bisect_left(self._sorted_paths, f"{prefix}0", lo=start),
+        )
+
+    def rows_under(self, prefix: str) -> list[int]:
+        """
+        Rows of the files at or under the given directory prefix (in path order).
+        """
+        start, end = self._span_under(prefix)
+        return list(self._sorted_rows[start:end])
+
+    def totals_under(self, prefix: str) -> ReportTotals:
+        """
+        Aggregated line totals of the files at or under the given prefix.
+        """
+        start, end = self._span_under(prefix)
+        return self._make_totals(
+            end - start,
+            *(
+                self._prefix_sums[name][end] - self._prefix_sums[name][start]
+                for name in self.columns
+            ),
+        )
+
+    def totals(self, rows: Optional[Iterable[int]] = None) -> ReportTotals:
+        """
+        Aggregated line totals of the given rows (all files by default).
+        """
+        if rows is None:
+            return self.totals_under("")
+
+        rows = list(rows)
+        return self._make_totals(
+            len(rows),
+            *(sum(getattr(self, name)[row] for row in rows) for name in self.columns),
+        )
+
+    def _make_totals(
+        self, files, lines, hits, misses, partials, branches, methods
+    ) -> ReportTotals:
+        return ReportTotals(
+            files=files,
+            lines=lines,
+            hits=hits,
+            misses=misses,
+            partials=partials,
+            coverage=ratio(hits, lines) if lines else None,
+            branches=branches,
+            methods=methods,
+        )
+
+    def file_totals(self, path: str) -> Optional[ReportTotals]:
+        row = self._rows.get(path)
+        if row is None:
+            return None
+        entry = self._entries[row]
+        if isinstance(entry, ReportFileSummary):
+            return entry.file_totals
+        return self._as_totals(entry["file_totals"])
+
+    def summary(self, path: str) -> Optional[ReportFileSummary]:
+        """
+        Materializes the full file summary (including session totals).
+        """
+        row = self._rows.get(path)
+        if row is None:
+            return None
+        entry = self._entries[row]
+        if isinstance(entry, ReportFileSummary):
+            return entry
+        return ReportFileSummary(
+            file_index=entry["file_index"],
+            file_totals=self._as_totals(entry["file_totals"]),
+            session_totals=entry["session_totals"],
+            diff_totals=self._as_totals(entry["diff_totals"]),
+        )
+
+
+def build_files_table(commit: Commit) -> Optional[FileSummaryTable]:
+    """
+    Builds a `FileSummaryTable` for the given commit's report straight from the
+    database (no chunks are downloaded).  Returns `None` if there is no report.
+    """
+    if _new_report_builder_enabled(commit):
+        commit_report = commit.reports.select_related("reportdetails").first()
+        if commit_report is None:
+            return None
+        try:
+            report_details = commit_report.reportdetails
+        except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+            return FileSummaryTable()
+        return FileSummaryTable.from_files_array(report_details.files_array)
+
+    if not commit.report:
+        return None
+    return FileSummaryTable.from_files(commit.report["files"])
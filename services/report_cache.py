@@ -0,0 +1,240 @@
+import json
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+from shared.utils.ReportEncoder import ReportEncoder
+from shared.utils.sessions import Session
+
+from core.models import Commit
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class ReportData(NamedTuple):
+    """
+    Everything needed to build a report with `services.report.build_report`.
+    """
+
+    chunks: str
+    files: dict
+    sessions: dict
+    totals: Any
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by the total size (in bytes)
+    of the values it holds.  Values larger than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes: int, metrics_prefix: str):
+        self.max_bytes = max_bytes
+        self.metrics_prefix = metrics_prefix
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+
+        metrics.incr(f"{self.metrics_prefix}.{'miss' if entry is None else 'hit'}")
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                evicted += 1
+            self.evictions += evicted
+
+        if evicted:
+            metrics.incr(f"{self.metrics_prefix}.eviction", evicted)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class ReportCache:
+    """
+    Two-tier cache for the data a commit's report is built from (chunks, files,
+    sessions and totals):
+
+    1. an in-process LRU bounded by the size of the serialized data
+    2. redis, holding a zlib-compressed copy shared by every worker
+
+    Report instances themselves are not shared since callers mutate them
+    (`apply_diff`, `shift_lines_by_diff`, etc.) - each caller builds a fresh
+    report from the cached data, which skips the storage download and the
+    database/archive reads for files and sessions.  The totals of the report's
+    directories are cached alongside it so path trees don't recompute them.
+
+    Keys include the time the report was last updated so that a new upload
+    invalidates any previously cached data.
+    """
+
+    metrics_prefix = "services.report_cache"
+
+    def __init__(self):
+        self.memory = LRUCache(
+            max_bytes=settings.REPORT_CACHE_MEMORY_MAX_BYTES,
+            metrics_prefix=f"{self.metrics_prefix}.memory",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return settings.REPORT_CACHE_ENABLED
+
+    @cached_property
+    def redis(self):
+        return get_redis_connection()
+
+    def key(self, commit: Commit, updated_at: Optional[datetime]) -> Optional[str]:
+        """
+        Cache key for the given commit's report as of `updated_at`.
+        Returns `None` if the report cannot be cached (unknown update time).
+        """
+        if updated_at is None:
+            return None
+        return f"report_cache/{commit.id}/{updated_at.isoformat()}"
+
+    def get(self, key: Optional[str]) -> Optional[ReportData]:
+        serialized = self._get_serialized(key)
+        if serialized is None:
+            return None
+        return self.deserialize(serialized)
+
+    def set(self, key: Optional[str], data: ReportData):
+        self._set_serialized(key, self.serialize(data))
+
+    def get_directory_totals(self, key: Optional[str]) -> Optional[Dict[str, list]]:
+        """
+        The totals of every directory of the report cached under `key`, as
+        computed by `services.path.PathTrie.directory_totals_table`.
+        """
+        serialized = self._get_serialized(self._directory_totals_key(key))
+        if serialized is None:
+            return None
+        return json.loads(serialized)
+
+    def set_directory_totals(self, key: Optional[str], table: Dict[str, list]):
+        self._set_serialized(self._directory_totals_key(key), json.dumps(table))
+
+    def _directory_totals_key(self, key: Optional[str]) -> Optional[str]:
+        return f"{key}/directory_totals" if key is not None else None
+
+    def _get_serialized(self, key: Optional[str]) -> Optional[str]:
+        if not self.enabled or key is None:
+            return None
+
+        serialized = self.memory.get(key)
+        if serialized is None:
+            serialized = self._redis_get(key)
+            if serialized is None:
+                return None
+            self.memory.set(key, serialized, len(serialized))
+        return serialized
+
+    def _set_serialized(self, key: Optional[str], serialized: str):
+        if not self.enabled or key is None:
+            return
+
+        self.memory.set(key, serialized, len(serialized))
+        self._redis_set(key, serialized)
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            compressed = self.redis.get(key)
+        except (RedisError, OSError) as e:
+            log.warning("Error reading report from redis cache", extra=dict(error=e))
+            return None
+
+        metrics.incr(
+            f"{self.metrics_prefix}.redis.{'miss' if compressed is None else 'hit'}"
+        )
+        if compressed is None:
+            return None
+        return zlib.decompress(compressed).decode()
+
+    def _redis_set(self, key: str, serialized: str):
+        compressed = zlib.compress(serialized.encode())
+        if len(compressed) > settings.REPORT_CACHE_REDIS_MAX_BYTES:
+            metrics.incr(f"{self.metrics_prefix}.redis.too_large")
+            return
+
+        try:
+            self.redis.set(key, compressed, ex=settings.REPORT_CACHE_REDIS_TTL)
+        except (RedisError, OSError) as e:
+            log.warning("Error writing report to redis cache", extra=dict(error=e))
+
+    @staticmethod
+    def serialize(data: ReportData) -> str:
+        """
+        Compact text form: a single line of JSON holding files, sessions and totals
+        followed by the raw chunks.
+        """
+        metadata = json.dumps(
+            {
+                "files": data.files,
+                "sessions": {
+                    sid: session._encode() if isinstance(session, Session) else session
+                    for sid, session in data.sessions.items()
+                },
+                "totals": data.totals,
+            },
+            cls=ReportEncoder,
+        )
+        return f"{metadata}\n{data.chunks}"
+
+    @staticmethod
+    def deserialize(serialized: str) -> ReportData:
+        metadata, chunks = serialized.split("\n", 1)
+        metadata = json.loads(metadata)
+        return ReportData(
+            chunks=chunks,
+            files=metadata["files"],
+            sessions=metadata["sessions"],
+            totals=metadata["totals"],
+        )
+
+
+report_cache = ReportCache()
@@ -0,0 +1,119 @@
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from shared.metrics import metrics
+from shared.reports.resources import Report, ReportFile
+
+# This module must not import any Django models: `parse_line_signatures` runs
+# in processes that don't set up Django.
+
+
+# line signature -> number of lines, sessions present in each file
+LineSignatures = Tuple[Counter, List[frozenset]]
+
+
+def line_signatures(file_reports: Iterable[ReportFile]) -> LineSignatures:
+    """
+    Groups the lines of the given files by their type, complexity, number of
+    messages and the coverage of each of their sessions (see
+    `services.report.SessionTotals`).
+    """
+    signatures = Counter()
+    file_sessions = []
+    for file_report in file_reports:
+        if file_report is None:
+            continue
+        file_signatures = Counter(
+            (
+                line.type,
+                tuple(line.complexity)
+                if isinstance(line.complexity, list)
+                else line.complexity,
+                len(line.messages or ()),
+                tuple((session.id, session.coverage) for session in line.sessions),
+            )
+            for _, line in file_report.lines
+        )
+        signatures.update(file_signatures)
+        file_sessions.append(
+            frozenset(
+                sid for _, _, _, sessions in file_signatures for sid, _ in sessions
+            )
+        )
+    return signatures, file_sessions
+
+
+def parse_line_signatures(chunks: List[str]) -> LineSignatures:
+    """
+    Same as `line_signatures` but parsing the raw chunk of every file.
+    The result is small (there are few distinct signatures) and cheap to pickle.
+    """
+    return line_signatures(ReportFile(name="", lines=chunk) for chunk in chunks)
+
+
+def raw_file_chunks(report: Report) -> Optional[List[str]]:
+    """
+    The unparsed chunk of every file of a report built from chunks, or `None`
+    if the report's chunks aren't all held in memory as text (i.e. read on
+    demand, or already parsed into `ReportFile`s).
+    """
+    chunks = getattr(report, "_chunks", None)
+    files = getattr(report, "_files", None)
+    if not isinstance(chunks, list) or files is None:
+        return None
+
+    file_chunks = []
+    for summary in files.values():
+        if summary.file_index >= len(chunks):
+            return None
+        chunk = chunks[summary.file_index]
+        if not isinstance(chunk, str):
+            return None
+        file_chunks.append(chunk)
+    return file_chunks
+
+
+class ReportParser:
+    """
+    Walks every line of a report in a process pool when its chunks are larger
+    than `REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES` (and the pool is enabled)
+    so that parsing very large reports doesn't hold the GIL of the web worker.
+    Smaller reports are parsed on the calling thread.
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.REPORT_PARSE_PROCESS_POOL_WORKERS,
+                    # don't fork the (multi-threaded) web worker
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._pool
+
+    def should_offload(self, chunks: List[str]) -> bool:
+        return (
+            settings.REPORT_PARSE_PROCESS_POOL_ENABLED
+            and sum(len(chunk) for chunk in chunks)
+            >= settings.REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES
+        )
+
+    def line_signatures(self, report: Report) -> LineSignatures:
+        chunks = raw_file_chunks(report)
+        if chunks is None or not self.should_offload(chunks):
+            return line_signatures(report.file_reports())
+
+        with metrics.timer("services.report_parsing.process_pool"):
+            return self.pool.submit(parse_line_signatures, chunks).result()
+
+
+report_parser = ReportParser()
@@ -0,0 +1,94 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Tuple
+
+import redis_lock
+from redis.exceptions import RedisError
+from shared.metrics import metrics
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within a process: the first
+    caller runs the function while any callers arriving before it finishes
+    wait for (and share) its result or exception.  Nothing is cached once the
+    call completes - later callers run the function again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns `(result, shared)` where `shared` is true when the result came
+        from a call made by another caller (and so may be in use elsewhere).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            metrics.incr(f"services.single_flight.{self.name}.shared")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+@contextmanager
+def distributed_lock(name: str, timeout: int, expire: int = 60) -> Iterator[bool]:
+    """
+    Best-effort lock shared by every worker, used so that only one of them
+    does some expensive work (and fills a cache) while the others wait.
+
+    Yields whether the lock was acquired - if it could not be acquired within
+    `timeout` seconds (or redis is unavailable) callers proceed without it.
+    """
+    try:
+        lock = redis_lock.Lock(
+            get_redis_connection(), name, expire=expire, auto_renewal=True
+        )
+        acquired = lock.acquire(timeout=timeout)
+    except (RedisError, OSError) as e:
+        log.warning("Unable to acquire lock", extra=dict(lock=name, error=e))
+        lock, acquired = None, False
+
+    if not acquired:
+        metrics.incr("services.single_flight.lock_timeout")
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except (RedisError, OSError, redis_lock.NotAcquired) as e:
+                log.warning("Unable to release lock", extra=dict(lock=name, error=e))
@@ -1,6 +1,13 @@
 import logging
+import os
+import tempfile
 from datetime import timedelta
+from hashlib import sha256
+from typing import Optional, Tuple
 
+from minio.error import S3Error
+from shared.metrics import metrics
+from shared.storage.exceptions import FileNotInStorageError
 from shared.storage.minio import MinioStorageService
 
 from utils.config import get_config
@@ -9,6 +16,128 @@ log = logging.getLogger(__name__)
 
 
 MINIO_CLIENT = None
+DISK_CACHE = None
+
+
+class DiskCache:
+    """
+    Size-bounded cache of storage objects on local disk, keyed by bucket and path.
+
+    Every entry records the ETag of the object it holds so that callers can
+    validate it with a cheap HEAD request instead of downloading the object.
+    When the total size goes over `max_bytes` the least recently used entries
+    (by mtime, which is bumped on every hit) are evicted.  The size is
+    recomputed from disk on eviction, so several processes can share a directory.
+    """
+
+    metrics_prefix = "services.storage.disk_cache"
+
+    # evict down to this fraction of `max_bytes` so we don't evict on every write
+    evict_to_ratio = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.size = self._disk_usage()
+
+    def _entry_path(self, bucket: str, path: str) -> str:
+        return os.path.join(
+            self.directory, sha256(f"{bucket}/{path}".encode()).hexdigest()
+        )
+
+    def get(self, bucket: str, path: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Returns `(contents, etag)` for a cached object, or `None` on a miss.
+        """
+        entry_path = self._entry_path(bucket, path)
+        try:
+            with open(entry_path, "rb") as f:
+                etag, contents = f.read().split(b"\n", 1)
+            os.utime(entry_path)
+        except (FileNotFoundError, ValueError):
+            metrics.incr(f"{self.metrics_prefix}.miss")
+            return None
+        metrics.incr(f"{self.metrics_prefix}.hit")
+        return contents, etag.decode()
+
+    def set(self, bucket: str, path: str, contents: bytes, etag: str):
+        if len(contents) > self.max_bytes:
+            return
+
+        entry = etag.encode() + b"\n" + contents
+        entry_path = self._entry_path(bucket, path)
+        previous_size = self._entry_size(entry_path)
+
+        # write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(entry)
+        os.replace(tmp_path, entry_path)
+
+        self.size += len(entry) - previous_size
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def delete(self, bucket: str, path: str):
+        entry_path = self._entry_path(bucket, path)
+        size = self._entry_size(entry_path)
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            return
+        self.size = max(self.size - size, 0)
+
+    def _entry_size(self, entry_path: str) -> int:
+        try:
+            return os.stat(entry_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                yield entry
+
+    def _disk_usage(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _evict(self):
+        entries = sorted(
+            ((entry.stat(), entry.path) for entry in self._entries()),
+            key=lambda entry: entry[0].st_mtime,
+        )
+        size = sum(stat.st_size for stat, _ in entries)
+        target = self.max_bytes * self.evict_to_ratio
+        evicted = 0
+        for stat, entry_path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+            evicted += 1
+        self.size = size
+        metrics.incr(f"{self.metrics_prefix}.eviction", evicted)
+
+
+def get_disk_cache(minio_config: dict) -> Optional[DiskCache]:
+    """
+    The disk cache is enabled by setting `services.minio.disk_cache.path`.
+    """
+    global DISK_CACHE
+
+    disk_cache_config = minio_config.get("disk_cache") or {}
+    if not disk_cache_config.get("path"):
+        return None
+    if DISK_CACHE is None:
+        DISK_CACHE = DiskCache(
+            directory=disk_cache_config["path"],
+            max_bytes=int(disk_cache_config.get("max_bytes", 10 * 1024**3)),
+        )
+    return DISK_CACHE
 
 
 # Service class for interfacing with codecov's underlying storage layer, minio
@@ -43,6 +172,46 @@ class StorageService(MinioStorageService):
             )
             log.info("----- created minio_client: ---- ")
         self.minio_client = MINIO_CLIENT
+        self.disk_cache = get_disk_cache(self.minio_config)
+
+    def read_file(self, bucket_name, path, file_obj=None):
+        if self.disk_cache is None or file_obj is not None:
+            return super().read_file(bucket_name, path, file_obj=file_obj)
+
+        cached = self.disk_cache.get(bucket_name, path)
+        if cached is not None:
+            contents, etag = cached
+            # a HEAD request is much cheaper than downloading the object again
+            try:
+                stat = self.minio_client.stat_object(bucket_name, path)
+            except S3Error as e:
+                if e.code == "NoSuchKey":
+                    self.disk_cache.delete(bucket_name, path)
+                    raise FileNotInStorageError(
+                        f"File {path} does not exist in {bucket_name}"
+                    )
+                raise
+            if stat.etag.strip('"') == etag.strip('"'):
+                return contents
+
+        contents, etag = self.read_file_with_etag(bucket_name, path)
+        self.disk_cache.set(bucket_name, path, contents, etag or "")
+        return contents
+
+    def write_file(self, bucket_name, path, data, *args, **kwargs):
+        if self.disk_cache is not None:
+            self.disk_cache.delete(bucket_name, path)
+        return super().write_file(bucket_name, path, data, *args, **kwargs)
+
+    def append_to_file(self, bucket_name, path, data):
+        if self.disk_cache is not None:
+            self.disk_cache.delete(bucket_name, path)
+        return super().append_to_file(bucket_name, path, data)
+
+    def delete_file(self, bucket_name, path):
+        if self.disk_cache is not None:
+            self.disk_cache.delete(bucket_name, path)
+        return super().delete_file(bucket_name, path)
 
     def create_presigned_put(self, bucket, path, expires):
         expires = timedelta(seconds=expires)
@@ -51,3 +220,46 @@ class StorageService(MinioStorageService):
     def create_presigned_get(self, bucket, path, expires):
         expires = timedelta(seconds=expires)
         return self.minio_client.presigned_get_object(bucket, path, expires)
+
+    def read_file_with_etag(self, bucket, path) -> Tuple[bytes, str]:
+        """
+        Reads a whole file, returning its contents along with the ETag of
+        the object version that was read.
+        """
+        try:
+            response = self.minio_client.get_object(bucket, path)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotInStorageError(f"File {path} does not exist in {bucket}")
+            raise
+        try:
+            return response.read(), response.headers.get("ETag")
+        finally:
+            response.close()
+            response.release_conn()
+
+    def read_file_range(
+        self, bucket, path, offset: int, length: int, etag: Optional[str] = None
+    ) -> bytes:
+        """
+        Reads `length` bytes starting at `offset` with a ranged GET.  When `etag`
+        is given the read only succeeds if the object has not changed since
+        (an `S3Error` with code `PreconditionFailed` is raised otherwise).
+        """
+        try:
+            response = self.minio_client.get_object(
+                bucket,
+                path,
+                offset=offset,
+                length=length,
+                request_headers={"If-Match": etag} if etag else None,
+            )
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotInStorageError(f"File {path} does not exist in {bucket}")
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
@@ -3,11 +3,19 @@ from pathlib import Path
 from time import time
 from unittest.mock import patch
 
+import pytest
 from django.test import TestCase
 from shared.storage import MinioStorageService
+from shared.storage.exceptions import FileNotInStorageError
 
 from core.tests.factories import RepositoryFactory
-from services.archive import ArchiveService
+from services.archive import (
+    ArchiveEncoding,
+    ArchiveService,
+    build_chunks_index,
+    compress,
+    decompress,
+)
 
 current_file = Path(__file__)
 
@@ -117,3 +125,148 @@ class TestWriteData(object):
             gzipped=False,
             reduced_redundancy=False,
         )
+
+
+class TestChunksIndex(object):
+    chunks = "{}\n[1, null, [[0, 1]]]\n<<<<< end_of_chunk >>>>>\n\n<<<<< end_of_chunk >>>>>\n{}\n[0, null, [[0, 0]]]"
+
+    def test_build_chunks_index(self):
+        data = self.chunks.encode()
+        offsets = build_chunks_index(data)
+        assert [
+            data[start:end].decode() for start, end in offsets
+        ] == self.chunks.split("\n<<<<< end_of_chunk >>>>>\n")
+
+    def test_read_chunks_index_builds_index(self, mocker, db):
+        repo = RepositoryFactory()
+        archive_service = ArchiveService(repository=repo)
+        mocker.patch.object(
+            MinioStorageService,
+            "read_file",
+            side_effect=FileNotInStorageError(),
+        )
+        read_file_with_etag = mocker.patch(
+            "services.storage.StorageService.read_file_with_etag",
+            return_value=(self.chunks.encode(), "etag"),
+        )
+        mock_write_file = mocker.patch.object(MinioStorageService, "write_file")
+
+        index = archive_service.read_chunks_index("abc123")
+
+        assert index == {
+            "etag": "etag",
+            "offsets": [[0, 22], [48, 48], [74, 96]],
+            "compressed": False,
+        }
+        read_file_with_etag.assert_called_once_with(
+            archive_service.root,
+            f"v4/repos/{archive_service.storage_hash}/commits/abc123/chunks.txt",
+        )
+        mock_write_file.assert_called_with(
+            archive_service.root,
+            f"v4/repos/{archive_service.storage_hash}/commits/abc123/chunks_index.json",
+            json.dumps(index),
+            gzipped=False,
+            reduced_redundancy=False,
+        )
+
+    def test_read_chunk(self, mocker, db):
+        repo = RepositoryFactory()
+        archive_service = ArchiveService(repository=repo)
+        read_file_range = mocker.patch(
+            "services.storage.StorageService.read_file_range",
+            return_value=b"{}\n[0, null, [[0, 0]]]",
+        )
+        index = {"etag": "etag", "offsets": [[0, 22], [48, 48], [74, 96]]}
+
+        assert (
+            archive_service.read_chunk("abc123", index, 2) == "{}\n[0, null, [[0, 0]]]"
+        )
+        read_file_range.assert_called_once_with(
+            archive_service.root,
+            f"v4/repos/{archive_service.storage_hash}/commits/abc123/chunks.txt",
+            offset=74,
+            length=22,
+            etag="etag",
+        )
+
+        # empty and missing chunks don't need a request
+        assert archive_service.read_chunk("abc123", index, 1) == ""
+        assert archive_service.read_chunk("abc123", index, 3) is None
+        assert read_file_range.call_count == 1
+
+
+class TestArchiveCompression(object):
+    def test_compress_decompress_gzip(self):
+        data = b'{"files": {}}'
+        compressed = compress(data, ArchiveEncoding.gzip)
+        assert compressed != data
+        assert decompress(compressed) == data
+
+    def test_compress_decompress_zstd(self):
+        pytest.importorskip("zstandard")
+        data = b'{"files": {}}'
+        compressed = compress(data, ArchiveEncoding.zstd)
+        assert compressed != data
+        assert decompress(compressed) == data
+
+    def test_no_compression(self):
+        assert compress('{"files": {}}', None) == '{"files": {}}'
+        assert decompress(b'{"files": {}}') == b'{"files": {}}'
+
+    def test_write_chunks_compressed(self, mocker, db):
+        repo = RepositoryFactory()
+        mock_write_file = mocker.patch.object(MinioStorageService, "write_file")
+        archive_service = ArchiveService(repository=repo)
+        archive_service.compression = ArchiveEncoding.gzip
+
+        path = archive_service.write_chunks("abc123", "{}\n[1, null, [[0, 1]]]")
+
+        data = mock_write_file.call_args[0][2]
+        assert mock_write_file.call_args[0][1] == path
+        assert decompress(data) == b"{}\n[1, null, [[0, 1]]]"
+
+    def test_read_file_decompresses(self, mocker, db):
+        repo = RepositoryFactory()
+        mocker.patch.object(
+            MinioStorageService,
+            "read_file",
+            return_value=compress(b'{"files": {}}', ArchiveEncoding.gzip),
+        )
+        archive_service = ArchiveService(repository=repo)
+        assert archive_service.read_file("path") == '{"files": {}}'
+
+
+class TestReadFiles(object):
+    def test_read_files(self, mocker, db):
+        repo = RepositoryFactory()
+        archive_service = ArchiveService(repository=repo)
+
+        def read_file(bucket, path):
+            if path == "missing":
+                raise FileNotInStorageError()
+            return f"contents of {path}".encode()
+
+        mocker.patch.object(MinioStorageService, "read_file", side_effect=read_file)
+
+        res = archive_service.read_files(["a", "missing", "b", "a"])
+
+        assert list(res.keys()) == ["a", "missing", "b"]
+        assert res["a"] == "contents of a"
+        assert res["b"] == "contents of b"
+        assert isinstance(res["missing"], FileNotInStorageError)
+
+    def test_read_files_other_errors_raised(self, mocker, db):
+        repo = RepositoryFactory()
+        archive_service = ArchiveService(repository=repo)
+        mocker.patch.object(
+            MinioStorageService, "read_file", side_effect=ConnectionError()
+        )
+
+        with pytest.raises(ConnectionError):
+            archive_service.read_files(["a", "b"], max_concurrency=1)
+
+    def test_read_files_empty(self, mocker, db):
+        repo = RepositoryFactory()
+        archive_service = ArchiveService(repository=repo)
+        assert archive_service.read_files([]) == {}
@@ -11,25 +11,34 @@ import pytz
 from django.test import TestCase
 from shared.reports.resources import ReportFile
 from shared.reports.types import ReportTotals
+from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.merge import LineType
 
 from codecov_auth.tests.factories import OwnerFactory
 from compare.models import CommitComparison
 from compare.tests.factories import CommitComparisonFactory
+from core.management.commands.benchmark_diff_traversal import (
+    LegacyFileComparisonTraverseManager,
+    synthetic_diff,
+    traverse,
+)
 from core.models import Commit
 from core.tests.factories import CommitFactory, PullFactory, RepositoryFactory
 from reports.models import ReportDetails
 from reports.tests.factories import CommitReportFactory
+from services.archive import ArchiveService
 from services.comparison import (
     CommitComparisonService,
     Comparison,
     ComparisonReport,
+    ComparisonReportBatch,
     CreateChangeSummaryVisitor,
     CreateLineComparisonVisitor,
     FileComparison,
     FileComparisonTraverseManager,
     ImpactedFile,
     LineComparison,
+    LineComparisons,
     MissingComparisonReport,
     PullRequestComparison,
 )
@@ -47,6 +56,20 @@ file_data = [
 ]
 
 
+def line_fields(lines):
+    return [
+        (
+            line.base_line,
+            line.head_line,
+            line.base_ln,
+            line.head_ln,
+            line.value,
+            line.is_diff,
+        )
+        for line in lines
+    ]
+
+
 class MockOrderValue(object):
     def __init__(self, value):
         self.value = value
@@ -266,6 +289,34 @@ class FileComparisonTraverseManagerTests(TestCase):
         manager.apply([visitor])
         assert visitor.line_numbers == [(1, 1), (2, 2), (3, None), (None, 3)]
 
+    def test_segments_are_not_modified(self):
+        segments = [{"header": ["1", "1", "1", "2"], "lines": ["-a", "+b", "+c"]}]
+        manager = FileComparisonTraverseManager(
+            head_file_eof=3, base_file_eof=2, segments=segments
+        )
+        manager.apply([LineNumberCollector()])
+        assert segments == [
+            {"header": ["1", "1", "1", "2"], "lines": ["-a", "+b", "+c"]}
+        ]
+
+    def test_same_visitor_calls_as_previous_traversal(self):
+        for num_lines, hunk_lines, changed_ratio in [
+            (50, 1, 0.5),
+            (300, 7, 0.3),
+            (500, 40, 0.8),
+            (1000, 1000, 1.0),
+        ]:
+            segments, src, base_file_eof, head_file_eof = synthetic_diff(
+                num_lines, hunk_lines, changed_ratio
+            )
+            for diff in [
+                (segments, src, base_file_eof, head_file_eof),
+                (segments, [], base_file_eof, head_file_eof),
+            ]:
+                assert traverse(FileComparisonTraverseManager, *diff) == traverse(
+                    LegacyFileComparisonTraverseManager, *diff
+                )
+
 
 class CreateLineComparisonVisitorTests(TestCase):
     def setUp(self):
@@ -279,7 +330,7 @@ class CreateLineComparisonVisitorTests(TestCase):
     def test_skips_if_line_value_is_none(self):
         visitor = CreateLineComparisonVisitor(self.base_file, self.head_file)
         visitor(0, 0, None, False)
-        assert visitor.lines == []
+        assert list(visitor.lines) == []
 
     def test_appends_line_comparison_with_relevant_fields_if_line_value_not_none(self):
         base_ln = 2
@@ -458,6 +509,54 @@ class LineComparisonTests(TestCase):
         assert lc.hit_session_ids == None
 
 
+class LineComparisonsTests(TestCase):
+    def test_items_are_line_comparisons(self):
+        lines = LineComparisons()
+        lines.append([1, "", [], 0, 0], [0, "", [], 0, 0], 1, 1, "a line", False)
+        lines.append(None, [1, "", [], 0, 0], None, 2, "+added", True)
+        lines.append([1, "", [], 0, 0], None, 2, None, "-removed", True)
+
+        assert len(lines) == 3
+        assert line_fields([lines[0]]) == [
+            ([1, "", [], 0, 0], [0, "", [], 0, 0], 1, 1, "a line", False)
+        ]
+        assert lines[1].number == {"base": None, "head": 2}
+        assert lines[1].added
+        assert lines[2].coverage == {"base": LineType.hit, "head": None}
+        assert line_fields(lines[1:]) == [
+            (None, [1, "", [], 0, 0], None, 2, "+added", True),
+            ([1, "", [], 0, 0], None, 2, None, "-removed", True),
+        ]
+        assert len({lines[0], lines[0]}) == 1
+
+    def test_columns(self):
+        lines = LineComparisons.from_lines(
+            [
+                LineComparison([1], [0], 1, 1, "a line", False),
+                LineComparison(None, [1], 0, 2, "+added", True),
+                LineComparison([1], [1], 2, 3, "+not part of the diff", False),
+            ]
+        )
+
+        assert [lines.number(idx) for idx in range(3)] == [
+            (1, 1),
+            (None, 2),
+            (2, 3),
+        ]
+        assert [lines.is_changed(idx) for idx in range(3)] == [False, True, False]
+        assert [lines.is_coverage_changed(idx) for idx in range(3)] == [
+            True,
+            True,
+            False,
+        ]
+        assert line_fields(lines) == [
+            ([1], [0], 1, 1, "a line", False),
+            (None, [1], 0, 2, "+added", True),
+            ([1], [1], 2, 3, "+not part of the diff", False),
+        ]
+        assert list(LineComparisons()) == []
+
+
 class FileComparisonConstructorTests(TestCase):
     def test_constructor_no_keyError_if_diff_data_segements_is_missing(self):
         file_comp = FileComparison(
@@ -543,7 +642,7 @@ class FileComparisonTests(TestCase):
         assert self.file_comparison.stats == expected_stats
 
     def test_lines_returns_emptylist_if_no_diff_or_src(self):
-        assert self.file_comparison.lines == []
+        assert list(self.file_comparison.lines) == []
 
     # essentially a smoke/integration test
     def test_lines(self):
@@ -610,7 +709,7 @@ class FileComparisonTests(TestCase):
         segments = self.file_comparison.segments
 
         assert len(segments) == 1
-        assert segments[0].lines == self.file_comparison.lines
+        assert line_fields(segments[0].lines) == line_fields(self.file_comparison.lines)
         assert segments[0].header == (1, 3, 1, 3)
         assert segments[0].has_diff_changes == True
         assert segments[0].has_unintended_changes == False
@@ -626,7 +725,7 @@ class FileComparisonTests(TestCase):
         segments = self.file_comparison.segments
 
         assert len(segments) == 1
-        assert segments[0].lines == self.file_comparison.lines
+        assert line_fields(segments[0].lines) == line_fields(self.file_comparison.lines)
         assert segments[0].header == (1, 3, 1, 3)
         assert segments[0].has_diff_changes == False
         assert segments[0].has_unintended_changes
@@ -1693,12 +1792,92 @@ class ComparisonReportTest(TestCase):
         impacted_files = self.comparison_report.impacted_files
         assert impacted_files == []
 
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_files_read_in_batch(self, read_file):
+        contents = {
+            "v4/test.json": mock_data_from_archive,
+            "v4/other.json": mocked_files_with_direct_and_indirect_changes,
+        }
+
+        def read(path):
+            if path not in contents:
+                raise FileNotInStorageError()
+            return contents[path]
+
+        read_file.side_effect = read
+        batch = ComparisonReportBatch()
+        comparison_reports = [
+            ComparisonReport(self.comparison, batch=batch),
+            *(
+                ComparisonReport(
+                    CommitComparisonFactory(
+                        base_commit=self.parent_commit,
+                        compare_commit=self.commit,
+                        report_storage_path=path,
+                    ),
+                    batch=batch,
+                )
+                for path in ["v4/other.json", "v4/missing.json"]
+            ),
+        ]
+
+        with patch.object(
+            ArchiveService,
+            "read_files",
+            autospec=True,
+            side_effect=ArchiveService.read_files,
+        ) as read_files:
+            counts = [len(report.impacted_files) for report in comparison_reports]
+        assert counts == [2, 4, 0]
+        # the data of every report of the batch is read at once
+        assert read_files.call_count == 1
+        assert read_file.call_count == 3
+
     @patch("services.archive.ArchiveService.read_file")
     def test_impacted_file(self, read_file):
         read_file.return_value = mock_data_from_archive
         impacted_file = self.comparison_report.impacted_file("fileB")
         assert impacted_file.head_name == "fileB"
 
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_not_found(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        assert self.comparison_report.impacted_file("fileZ") is None
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_indexed_once_files_loaded(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        assert len(self.comparison_report.files) == 2
+        assert (
+            self.comparison_report.impacted_file("fileB")
+            is self.comparison_report.files[1]
+        )
+        assert self.comparison_report.impacted_files_count == 2
+        assert read_file.call_count == 1
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_streamed(self, read_file):
+        pytest.importorskip("ijson")
+        read_file.return_value = mock_data_from_archive
+        assert self.comparison_report.impacted_files_count == 2
+        assert self.comparison_report.impacted_file("fileB").head_name == "fileB"
+        # no file was built for the count and the first lookup
+        assert "files" not in self.comparison_report.__dict__
+
+        # later lookups use the index instead of parsing the data again
+        assert self.comparison_report.impacted_file("fileA").head_name == "fileA"
+        assert "files" in self.comparison_report.__dict__
+        assert read_file.call_count == 1
+
+    @patch("services.comparison.ijson", None)
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_without_ijson(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        assert self.comparison_report.impacted_files_count == 2
+        assert self.comparison_report.impacted_file("fileB").head_name == "fileB"
+        assert self.comparison_report.impacted_file("fileZ") is None
+        assert read_file.call_count == 1
+
     @patch("services.archive.ArchiveService.read_file")
     def test_impacted_files_filtered_by_indirect_changes(self, read_file):
         read_file.return_value = mock_data_from_archive
@@ -12,6 +12,7 @@ from core.tests.factories import CommitFactory, RepositoryFactory
 from services.comparison import Comparison
 from services.components import (
     ComponentComparison,
+    ComponentsTotals,
     commit_components,
     component_filtered_report,
 )
@@ -218,3 +219,62 @@ class ComponentComparisonTest(TransactionTestCase):
 
         # removed 1 tested line, added 1 tested and 1 untested line
         assert component_comparison.patch_totals.coverage == "50.00000"
+
+    @patch("services.comparison.Comparison.git_comparison", new_callable=PropertyMock)
+    @patch("services.comparison.Comparison.head_report", new_callable=PropertyMock)
+    @patch("services.comparison.Comparison.base_report", new_callable=PropertyMock)
+    def test_components_totals(
+        self, base_report_mock, head_report_mock, git_comparison_mock
+    ):
+        base_report_mock.return_value = sample_report()
+        head_report_mock.return_value = sample_report()
+        git_comparison_mock.return_value = {
+            "diff": {
+                "files": {
+                    "file_1.go": {
+                        "type": "modified",
+                        "segments": [
+                            {
+                                "header": ["1", "2", "1", "1"],
+                                "lines": ["-line", "+line", "+another line"],
+                            }
+                        ],
+                    },
+                    "file_2.py": {
+                        "type": "modified",
+                        "segments": [
+                            {
+                                "header": ["1", "1", "1", "1"],
+                                "lines": ["-line", "+line"],
+                            }
+                        ],
+                    },
+                }
+            }
+        }
+
+        components = [
+            Component.from_dict({"component_id": "golang", "paths": [".*/*.go"]}),
+            Component.from_dict({"component_id": "python", "paths": [".*/*.py"]}),
+            Component.from_dict(
+                {"component_id": "flag1", "flag_regexes": ["flag1"], "paths": []}
+            ),
+        ]
+        components_totals = ComponentsTotals(self.comparison, components)
+
+        for component in components:
+            component_comparison = ComponentComparison(
+                self.comparison, component, components_totals
+            )
+            expected = ComponentComparison(self.comparison, component)
+            for totals, expected_totals in [
+                (component_comparison.base_totals, expected.base_totals),
+                (component_comparison.head_totals, expected.head_totals),
+                (component_comparison.patch_totals, expected.patch_totals),
+            ]:
+                assert totals.files == expected_totals.files
+                assert totals.lines == expected_totals.lines
+                assert totals.hits == expected_totals.hits
+                assert totals.misses == expected_totals.misses
+                assert totals.partials == expected_totals.partials
+                assert totals.coverage == expected_totals.coverage
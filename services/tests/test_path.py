@@ -10,10 +10,12 @@ from core.tests.factories import CommitFactory
 from services.path import (
     Dir,
     File,
+    PathTrie,
     PrefixedPath,
     ReportPaths,
     dashboard_commit_file_url,
     provider_path_exists,
+    report_path_trie,
 )
 from services.report import SerializableReport
 
@@ -148,6 +150,69 @@ class TestPrefixedPath(TestCase):
         assert path.basename == "dir/subdir/file1.py"
 
 
+class TestPathTrie(TestCase):
+    def setUp(self):
+        self.trie = PathTrie(
+            [
+                "dir/file1.py",
+                "file.py",
+                "dir/subdir/file2.py",
+                "src/ui/A/A.js",
+                "src/ui/Avatar/A.js",
+                "dir/file3.py",
+            ]
+        )
+
+    def test_find(self):
+        assert self.trie.find("") is self.trie.root
+        assert self.trie.find("dir/subdir") == {"file2.py": "dir/subdir/file2.py"}
+        assert self.trie.find("file.py") == "file.py"
+        assert self.trie.find("file.py/wrong") is None
+        assert self.trie.find("wrong") is None
+
+    def test_files_under(self):
+        assert self.trie.files_under("dir") == [
+            "dir/file1.py",
+            "dir/subdir/file2.py",
+            "dir/file3.py",
+        ]
+        assert self.trie.files_under("src/ui/A") == ["src/ui/A/A.js"]
+        assert self.trie.files_under("file.py") == ["file.py"]
+        assert self.trie.files_under("di") == []
+        assert len(self.trie.files_under("")) == 6
+
+    def test_search(self):
+        assert self.trie.search("FILE") == [
+            "dir/file1.py",
+            "file.py",
+            "dir/subdir/file2.py",
+            "dir/file3.py",
+        ]
+        assert self.trie.search("le2") == ["dir/subdir/file2.py"]
+        assert self.trie.search("a.js", path="src/ui") == [
+            "src/ui/A/A.js",
+            "src/ui/Avatar/A.js",
+        ]
+        # the search term is matched against the path relative to `path`
+        assert self.trie.search("ui", path="src/ui") == []
+        assert self.trie.search("dir", path="dir") == ["dir/subdir/file2.py"]
+        assert self.trie.search("missing") == []
+
+    def test_search_paging(self):
+        assert self.trie.search("file", offset=1, limit=2) == [
+            "file.py",
+            "dir/subdir/file2.py",
+        ]
+        assert self.trie.search("file", offset=3, limit=2) == ["dir/file3.py"]
+        assert self.trie.search("file", limit=0) == []
+
+    def test_report_path_trie_cached(self):
+        report = SerializableReport(files={"dir/file1.py": file_data1})
+        trie = report_path_trie(report)
+        assert report_path_trie(report) is trie
+        assert trie.files_under("dir") == ["dir/file1.py"]
+
+
 class TestReportPaths(TestCase):
     def setUp(self):
         files = {
@@ -181,17 +246,33 @@ class TestReportPaths(TestCase):
 
     def test_search_paths(self):
         report_paths = ReportPaths(self.report, search_term="file")
-        assert report_paths.paths == [
+        assert list(report_paths.paths) == [
             PrefixedPath("dir/file1.py", ""),
             PrefixedPath("dir/subdir/file2.py", ""),
             PrefixedPath("dir/subdir/file3.py", ""),
         ]
 
         report_paths = ReportPaths(self.report, search_term="ile2")
-        assert report_paths.paths == [
+        assert list(report_paths.paths) == [
             PrefixedPath("dir/subdir/file2.py", ""),
         ]
 
+        assert not ReportPaths(self.report, search_term="missing").paths
+
+    @patch("services.path.PathTrie.search", wraps=PathTrie.search, autospec=True)
+    def test_search_paths_paged(self, search):
+        report_paths = ReportPaths(self.report, path="dir", search_term="file")
+        assert report_paths.paths[1:2] == [
+            PrefixedPath("dir/subdir/file2.py", "dir"),
+        ]
+        # only the requested page is searched
+        assert search.call_args.kwargs == {"offset": 1, "limit": 1}
+
+        assert report_paths.lazy_filelist()[2:] == [
+            File(full_path="dir/subdir/file3.py", totals=totals3),
+        ]
+        assert len(report_paths.paths) == 3
+
     def test_full_filelist(self):
         report_paths = ReportPaths(self.report)
         assert report_paths.full_filelist() == [
@@ -259,6 +340,82 @@ class TestReportPathsNested(TestCase):
             File(full_path="src/ui/A/A.js", totals=totals3),
         ]
 
+    def test_single_directory_max_depth(self):
+        report_paths = ReportPaths(self.report, path="dir")
+        assert report_paths.single_directory(max_depth=1) == [
+            File(full_path="dir/file1.py", totals=totals1),
+            Dir(full_path="dir/subdir", children=[]),
+        ]
+
+        subdir = report_paths.single_directory(max_depth=2)[1]
+        assert [child.full_path for child in subdir.children] == [
+            "dir/subdir/file2.py",
+            "dir/subdir/dir1",
+            "dir/subdir/dir2",
+        ]
+        assert subdir.children[1].children == []
+
+    def test_lazy_single_directory(self):
+        report_paths = ReportPaths(self.report, path="dir/subdir")
+        items = report_paths.lazy_single_directory(max_depth=1)
+        assert len(items) == 3
+        assert items[1:] == [
+            Dir(full_path="dir/subdir/dir1", children=[]),
+            Dir(full_path="dir/subdir/dir2", children=[]),
+        ]
+        assert items[0] == File(full_path="dir/subdir/file2.py", totals=totals2)
+        assert list(items) == report_paths.single_directory(max_depth=1)
+
+    def test_directory_totals(self):
+        report_paths = ReportPaths(self.report, path="dir")
+        subdir = report_paths.single_directory(max_depth=1)[1]
+        # totals are complete even though the children were not listed
+        assert (subdir.lines, subdir.hits, subdir.misses) == (30, 14, 6)
+
+        trie = report_path_trie(self.report)
+        assert trie.directory_totals("dir", report_paths._file_totals).hits == 22
+        assert trie.directory_totals("dir/subdir/dir1", None).hits == 3
+        assert trie.directory_totals("dir/file1.py", None) is None
+
+    def test_lazy_single_directory_sorted(self):
+        report_paths = ReportPaths(self.report, path="dir")
+        items = report_paths.lazy_single_directory(max_depth=1)
+        with patch.object(ReportPaths, "_file_totals") as file_totals:
+            by_name = items.sorted(key=lambda entry: entry.name, reverse=True)
+            directories_first = by_name.sorted(key=lambda entry: not entry.is_dir)
+            # sorting by name neither builds the nodes nor reads totals
+            file_totals.assert_not_called()
+        assert [item.full_path for item in directories_first] == [
+            "dir/subdir",
+            "dir/file1.py",
+        ]
+
+        by_hits = items.sorted(key=lambda entry: entry.hits)
+        assert [item.full_path for item in by_hits] == ["dir/file1.py", "dir/subdir"]
+
+    @patch("services.path.report_cache")
+    def test_directory_totals_cached_with_report(self, report_cache):
+        report_cache.get_directory_totals.return_value = None
+        self.report._cache_key = "report_cache/1/2023-01-01T00:00:00"
+        report_paths = ReportPaths(self.report, path="dir")
+        subdir = report_paths.single_directory(max_depth=1)[1]
+        assert (subdir.lines, subdir.hits, subdir.misses) == (30, 14, 6)
+
+        key, table = report_cache.set_directory_totals.call_args.args
+        assert key == "report_cache/1/2023-01-01T00:00:00"
+        assert table["dir/subdir"] == [30, 14, 0, 6]
+        assert table[""] == [60, 28, 0, 12]
+
+        # a report built from the cache again doesn't recompute the totals
+        report = SerializableReport(files={"dir/subdir/file2.py": file_data2})
+        report._cache_key = "report_cache/1/2023-01-01T00:00:00"
+        report_cache.get_directory_totals.return_value = table
+        with patch.object(ReportPaths, "_file_totals") as file_totals:
+            report_paths = ReportPaths(report, path="dir")
+            subdir = report_paths.single_directory(max_depth=1)[0]
+            file_totals.assert_not_called()
+        assert (subdir.lines, subdir.hits, subdir.misses) == (30, 14, 6)
+
 
 class MockedProviderAdapter:
     async def list_files(self, *args, **kwargs):
@@ -0,0 +1,176 @@
+import os
+import zlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from shared.torngit.exceptions import TorngitObjectNotFoundError
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
+from services.comparison import Comparison
+from services.provider_cache import ProviderCache, fetch_sources
+
+comparison = {
+    "diff": {"files": {"file.py": {"type": "modified", "segments": []}}},
+    "commits": [{"commitid": "abc"}, {"commitid": "def"}],
+}
+reverse_comparison = {"diff": {"files": {}}, "commits": [{"commitid": "abc"}]}
+
+
+def test_provider_cache_comparison(settings, mock_redis):
+    settings.PROVIDER_CACHE_ENABLED = True
+    cache = ProviderCache()
+    key = cache.comparison_key(1, "abc", "def")
+    assert cache.get_comparison(key) is None
+
+    cache.set_comparison(key, comparison, reverse_comparison)
+    assert mock_redis.ttl(key) == settings.PROVIDER_CACHE_COMPARISON_TTL
+    assert cache.get_comparison(key) == (
+        comparison,
+        {"commits": reverse_comparison["commits"]},
+    )
+
+
+def test_provider_cache_disabled(settings, mock_redis):
+    settings.PROVIDER_CACHE_ENABLED = False
+    cache = ProviderCache()
+    key = cache.comparison_key(1, "abc", "def")
+    cache.set_comparison(key, comparison, reverse_comparison)
+    assert mock_redis.get(key) is None
+    assert cache.get_comparison(key) is None
+
+
+def test_provider_cache_skips_large_values(settings, mock_redis):
+    settings.PROVIDER_CACHE_ENABLED = True
+    settings.PROVIDER_CACHE_MAX_BYTES = 10
+    cache = ProviderCache()
+    key = cache.comparison_key(1, "abc", "def")
+    cache.set_comparison(key, comparison, reverse_comparison)
+    assert mock_redis.get(key) is None
+
+
+class MockCompareAdapter:
+    def __init__(self):
+        self.calls = []
+
+    async def get_compare(self, base, head):
+        self.calls.append((base, head))
+        return comparison if base < head else reverse_comparison
+
+
+def test_comparison_uses_provider_cache(settings, mock_redis, mocker, db):
+    settings.PROVIDER_CACHE_ENABLED = True
+    mocker.patch("services.comparison.provider_cache", ProviderCache())
+    mocker.patch("services.comparison.distributed_lock")
+    adapter = MockCompareAdapter()
+    mocker.patch(
+        "services.comparison.RepoProviderService.get_adapter", return_value=adapter
+    )
+    owner = OwnerFactory()
+    repository = RepositoryFactory(author=owner)
+    base_commit = CommitFactory(repository=repository, commitid="a" * 40)
+    head_commit = CommitFactory(repository=repository, commitid="b" * 40)
+
+    first = Comparison(owner, base_commit, head_commit)
+    assert first.git_comparison == comparison
+    assert first.has_unmerged_base_commits is False
+
+    second = Comparison(owner, base_commit, head_commit)
+    assert second.git_comparison == comparison
+    assert second.has_unmerged_base_commits is False
+
+    assert adapter.calls == [("a" * 40, "b" * 40), ("b" * 40, "a" * 40)]
+
+
+def test_provider_cache_sources(settings, mock_redis):
+    settings.PROVIDER_CACHE_ENABLED = True
+    cache = ProviderCache()
+    key = cache.source_key(1, "abc", "path/to/file.py")
+    assert cache.get_source(key) is None
+
+    cache.set_source(key, b"print('hello')")
+    assert cache.get_source(key) == b"print('hello')"
+    assert cache.get_sources([key, cache.source_key(1, "abc", "other.py")]) == [
+        b"print('hello')",
+        None,
+    ]
+
+
+def test_provider_cache_sources_lru(settings, mock_redis, mocker):
+    settings.PROVIDER_CACHE_ENABLED = True
+    cache = ProviderCache()
+    keys = [cache.source_key(1, "abc", f"file{i}.py") for i in range(3)]
+    size = len(zlib.compress(b"a" * 100))
+    settings.PROVIDER_CACHE_SOURCE_MAX_BYTES = 2 * size
+    clock = mocker.patch("services.provider_cache.time.time")
+
+    clock.return_value = 1
+    cache.set_source(keys[0], b"a" * 100)
+    clock.return_value = 2
+    cache.set_source(keys[1], b"a" * 100)
+    # reading the first source makes the second one the least recently used
+    clock.return_value = 3
+    assert cache.get_source(keys[0]) is not None
+    clock.return_value = 4
+    cache.set_source(keys[2], b"a" * 100)
+
+    assert cache.get_sources(keys) == [b"a" * 100, None, b"a" * 100]
+    assert int(mock_redis.get(cache.source_bytes_key)) == 2 * size
+
+
+def test_provider_cache_skips_large_sources(settings, mock_redis):
+    settings.PROVIDER_CACHE_ENABLED = True
+    settings.PROVIDER_CACHE_SOURCE_MAX_OBJECT_BYTES = 10
+    cache = ProviderCache()
+    key = cache.source_key(1, "abc", "file.py")
+    cache.set_source(key, os.urandom(100))
+    assert cache.get_source(key) is None
+
+
+class MockSourceAdapter:
+    def __init__(self):
+        self.calls = []
+
+    async def get_source(self, path, commitid):
+        self.calls.append(path)
+        if path == "missing.py":
+            raise TorngitObjectNotFoundError(response_data=404, message="not found")
+        return {"content": f"source of {path}"}
+
+
+def test_fetch_sources(settings, mock_redis, mocker):
+    settings.PROVIDER_CACHE_ENABLED = True
+    cache = mocker.patch("services.provider_cache.provider_cache", ProviderCache())
+    cache.set_source(cache.source_key(1, "abc", "cached.py"), b"cached source")
+    adapter = MockSourceAdapter()
+
+    sources = async_to_sync(fetch_sources)(
+        adapter, 1, "abc", ["a.py", "cached.py", "missing.py"]
+    )
+
+    assert sorted(adapter.calls) == ["a.py", "missing.py"]
+    assert sources["a.py"] == b"source of a.py"
+    assert sources["cached.py"] == b"cached source"
+    assert isinstance(sources["missing.py"], TorngitObjectNotFoundError)
+    assert cache.get_source(cache.source_key(1, "abc", "a.py")) == b"source of a.py"
+
+
+def test_comparison_prefetch_sources(mocker, db):
+    adapter = MockSourceAdapter()
+    mocker.patch(
+        "services.comparison.RepoProviderService.get_adapter", return_value=adapter
+    )
+    owner = OwnerFactory()
+    repository = RepositoryFactory(author=owner)
+    base_commit = CommitFactory(repository=repository)
+    head_commit = CommitFactory(repository=repository)
+    comparison = Comparison(owner, base_commit, head_commit)
+
+    comparison.prefetch_sources(["a.py", "b.py", "missing.py"])
+    assert comparison._get_source("b.py") == b"source of b.py"
+    assert sorted(adapter.calls) == ["a.py", "b.py", "missing.py"]
+
+    assert comparison._get_source("a.py") == b"source of a.py"
+    with pytest.raises(TorngitObjectNotFoundError):
+        comparison._get_source("missing.py")
+    assert len(adapter.calls) == 3
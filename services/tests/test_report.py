@@ -1,10 +1,12 @@
 from decimal import Decimal
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, PropertyMock, patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from minio.error import S3Error
+from shared.reports.resources import ReportFile, ReportLine
 from shared.storage.exceptions import FileNotInStorageError
-from shared.utils.sessions import SessionType
+from shared.utils.sessions import Session, SessionType
 
 from core.tests.factories import CommitFactory, CommitWithReportFactory
 from reports.tests.factories import (
@@ -12,7 +14,20 @@ from reports.tests.factories import (
     UploadFlagMembershipFactory,
     UploadLevelTotalsFactory,
 )
-from services.report import build_report, build_report_from_commit
+from services.archive import ArchiveService
+from services.report import (
+    FileSummaryTable,
+    RangedChunks,
+    RangedChunksReport,
+    ReportRegistry,
+    SerializableReport,
+    build_files_table,
+    build_report,
+    build_report_from_commit,
+    build_sessions,
+    fetch_commit_report,
+    prefetch_commit_reports,
+)
 
 current_file = Path(__file__)
 
@@ -200,6 +215,23 @@ class ReportServiceTest(TestCase):
         assert tuple(file_3.totals) == (0, 7, 2, 5, 0, "28.57143", 0, 0, 0, 0, 0, 0, 0)
         read_chunks_mock.assert_called_with("abf6d4d")
         assert list(res.totals) == [3, 20, 3, 17, 0, "15.00000", 0, 0, 0, 1, 0, 0, 0]
+        # computed from the session totals, without filtering the report
+        assert list(report.flags["integrations"].totals) == list(res.totals)
+        assert list(report.flags_totals(["integrations", "unittests"])) == [
+            3,
+            20,
+            17,
+            3,
+            0,
+            "85.00000",
+            0,
+            0,
+            0,
+            2,
+            0,
+            0,
+            0,
+        ]
 
     @patch("services.archive.ArchiveService.read_chunks")
     def test_build_report_from_commit_with_non_carried_forward_flags(
@@ -232,6 +264,11 @@ class ReportServiceTest(TestCase):
         assert tuple(file_3.totals) == (0, 7, 2, 5, 0, "28.57143", 0, 0, 0, 0, 0, 0, 0)
         read_chunks_mock.assert_called_with("asdfbhasdf89")
         assert list(res.totals) == [3, 20, 3, 17, 0, "15.00000", 0, 0, 0, 1, 0, 0, 0]
+        assert list(report.flags["integrations"].totals) == list(res.totals)
+        assert (
+            report.flags_totals(["integrations"], include_carriedforward=False).lines
+            == 0
+        )
         cff_session = res.report.sessions[1]
         assert cff_session.session_type.value == "carriedforward"
         assert (
@@ -239,11 +276,112 @@ class ReportServiceTest(TestCase):
             == "56e05fced214c44a37759efa2dfc25a65d8ae98d"
         )
 
+    def test_flags_totals_match_filtered_report(self):
+        report = SerializableReport()
+        report_file = ReportFile("file.py")
+        report_file.append(1, ReportLine.create(coverage=1, sessions=[[0, 1]]))
+        report_file.append(
+            2,
+            ReportLine.create(
+                coverage=0,
+                sessions=[[0, 0], [1, 1]],
+                messages=["first", "second"],
+            ),
+        )
+        report_file.append(
+            3,
+            ReportLine.create(
+                coverage="1/2", type="b", sessions=[[0, "1/2"], [1, "2/2"]]
+            ),
+        )
+        report_file.append(
+            4, ReportLine.create(coverage=-1, type="b", sessions=[[1, -1]])
+        )
+        report_file.append(
+            5,
+            ReportLine.create(
+                coverage=None, type="m", sessions=[[0, None]], messages=["third"]
+            ),
+        )
+        report.append(report_file)
+        report.add_session(Session(flags=["unit"]))
+        report.add_session(Session(flags=["integration"]))
+
+        for flags in (["unit"], ["integration"], ["unit", "integration"]):
+            assert list(report.flags_totals(flags)) == list(
+                report.filter(flags=flags).totals
+            )
+        assert report.flags_totals(["integration"]).branches == 2
+        assert report.flags_totals(["unit"]).methods == 1
+        assert report.flags_totals(["unit"]).messages == 3
+
+    def test_build_sessions_query_count(self):
+        commit = CommitWithReportFactory.create()
+        commit_report = commit.reports.first()
+        flag = commit.repository.flags.get(flag_name="unittests")
+        for order_number in range(2, 52):
+            upload = UploadFactory(report=commit_report, order_number=order_number)
+            UploadLevelTotalsFactory(
+                report_session=upload,
+                files=3,
+                lines=20,
+                hits=17,
+                misses=3,
+                partials=0,
+                coverage=85.0,
+                branches=0,
+                methods=0,
+            )
+            UploadFlagMembershipFactory(report_session=upload, flag=flag)
+        UploadFactory(report=commit_report, order_number=52, state="error")
+
+        # commit report + sessions + flags, regardless of the number of sessions
+        with self.assertNumQueries(3):
+            sessions = build_sessions(fetch_commit_report(commit))
+
+        assert len(sessions) == 52
+        assert 52 not in sessions
+        assert sessions[51].flags == ["unittests"]
+        assert sessions[51].totals is not None
+
     def test_build_report_from_commit_no_report(self):
         commit = CommitFactory()
         report = build_report_from_commit(commit)
         assert report is None
 
+    @override_settings(REPORT_CACHE_ENABLED=False)
+    @patch("services.report._new_report_builder_enabled", return_value=False)
+    @patch("services.archive.ArchiveService.read_file")
+    def test_prefetch_commit_reports(self, read_file_mock, _):
+        read_file_mock.side_effect = lambda path: f'{{"files": {{}}, "path": "{path}"}}'
+        repository = CommitFactory().repository
+        commits = [
+            CommitFactory(repository=repository, _report_storage_path=path)
+            for path in ["report_1.json", "report_2.json"]
+        ]
+
+        with patch.object(
+            ArchiveService,
+            "read_files",
+            autospec=True,
+            side_effect=ArchiveService.read_files,
+        ) as read_files_mock:
+            prefetch_commit_reports([*commits, None])
+        assert read_files_mock.call_count == 1
+        assert read_file_mock.call_count == 2
+
+        assert [commit.report["path"] for commit in commits] == [
+            "report_1.json",
+            "report_2.json",
+        ]
+        assert read_file_mock.call_count == 2
+
+    @override_settings(REPORT_CACHE_ENABLED=True)
+    @patch("services.archive.ArchiveService.read_files")
+    def test_prefetch_commit_reports_cached(self, read_files_mock):
+        prefetch_commit_reports([CommitFactory(_report_storage_path="report.json")])
+        assert read_files_mock.call_count == 0
+
     @patch("services.archive.ArchiveService.read_chunks")
     def test_build_report_from_commit_fallback(self, read_chunks_mock):
         f = open(current_file.parent / "samples" / "chunks.txt", "r")
@@ -331,3 +469,185 @@ class ReportServiceTest(TestCase):
             0,
             [1, 2, 1, 1, 0, "50.00000", 0, 0, 0, 0, 0, 0, 0],
         ]
+
+    @patch("services.archive.ArchiveService.read_chunk")
+    @patch("services.archive.ArchiveService.read_chunks_index")
+    def test_build_report_from_commit_ranged_chunks(
+        self, read_chunks_index_mock, read_chunk_mock
+    ):
+        with open(current_file.parent / "samples" / "chunks.txt", "r") as f:
+            chunks = f.read().split("\n<<<<< end_of_chunk >>>>>\n")
+        read_chunks_index_mock.return_value = {
+            "etag": "etag",
+            "offsets": [[0, 0]] * len(chunks),
+        }
+        read_chunk_mock.side_effect = lambda sha, index, file_index: chunks[file_index]
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        res = build_report_from_commit(commit, report_class=RangedChunksReport)
+        file_report = res.get("tests/test_sample.py")
+
+        assert file_report.name == "tests/test_sample.py"
+        assert tuple(file_report.totals) == (
+            0,
+            7,
+            7,
+            0,
+            0,
+            "100",
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+        )
+        read_chunk_mock.assert_called_once()
+        assert read_chunk_mock.call_args[0][2] == 1
+
+    @patch("services.archive.ArchiveService.write_chunks_index")
+    @patch("services.archive.ArchiveService.read_chunk")
+    @patch("services.archive.ArchiveService.read_chunks_index")
+    def test_ranged_chunks_outdated_index(
+        self, read_chunks_index_mock, read_chunk_mock, write_chunks_index_mock
+    ):
+        read_chunks_index_mock.return_value = {"etag": "old", "offsets": [[0, 1]]}
+        write_chunks_index_mock.return_value = {
+            "etag": "new",
+            "offsets": [[0, 1], [2, 3]],
+        }
+        read_chunk_mock.side_effect = [
+            S3Error("PreconditionFailed", "", "", "", "", None),
+            "chunk",
+        ]
+        commit = CommitFactory()
+        chunks = RangedChunks(ArchiveService(commit.repository), commit.commitid)
+
+        assert chunks[0] == "chunk"
+        assert len(chunks) == 2
+        write_chunks_index_mock.assert_called_once_with(commit.commitid)
+
+
+class ReportRegistryTest(TestCase):
+    @patch("core.models.Commit.full_report", new_callable=PropertyMock)
+    def test_report_built_once(self, full_report_mock):
+        commit = CommitFactory()
+        full_report_mock.return_value = MagicMock()
+        reports = ReportRegistry()
+
+        report = reports.report(commit)
+        assert report is full_report_mock.return_value
+        assert reports.report(commit) is report
+
+        filtered = reports.report(commit, flags=["b", "a"], paths=["src/"])
+        assert reports.report(commit, flags=["a", "b"], paths=["src/"]) is filtered
+        report.filter.assert_called_once_with(flags=["a", "b"], paths=["src/"])
+        assert full_report_mock.call_count == 1
+
+    @patch("core.models.Commit.full_report", new_callable=PropertyMock)
+    @patch("services.report.build_report_from_commit")
+    def test_ranged_report(self, build_report_from_commit_mock, full_report_mock):
+        commit = CommitFactory()
+        build_report_from_commit_mock.return_value = MagicMock()
+        full_report_mock.return_value = MagicMock()
+        reports = ReportRegistry()
+
+        # only a ranged report has been asked for
+        ranged = reports.report(commit, ranged=True)
+        assert ranged is build_report_from_commit_mock.return_value
+        assert reports.report(commit, ranged=True) is ranged
+        build_report_from_commit_mock.assert_called_once_with(
+            commit, report_class=RangedChunksReport
+        )
+
+        # once built, the full report also serves ranged lookups
+        report = reports.report(commit)
+        assert report is full_report_mock.return_value
+        assert reports.report(commit, ranged=True) is report
+        filtered = reports.report(commit, flags=["a"], ranged=True)
+        assert reports.report(commit, flags=["a"]) is filtered
+        report.filter.assert_called_once_with(flags=["a"], paths=None)
+        assert build_report_from_commit_mock.call_count == 1
+        assert full_report_mock.call_count == 1
+
+
+class FileSummaryTableTest(TestCase):
+    def test_build_files_table(self):
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+        table = build_files_table(commit)
+
+        assert len(table) == 3
+        assert table.files == [
+            "tests/__init__.py",
+            "tests/test_sample.py",
+            "awesome/__init__.py",
+        ]
+        assert "awesome/__init__.py" in table
+        assert "missing.py" not in table
+
+        totals = table.totals()
+        assert (totals.files, totals.lines, totals.hits, totals.misses) == (
+            3,
+            20,
+            17,
+            3,
+        )
+        assert totals.coverage == "85.00000"
+
+        tests_totals = table.totals_under("tests")
+        assert (tests_totals.files, tests_totals.lines, tests_totals.hits) == (
+            2,
+            10,
+            9,
+        )
+        assert table.totals(table.rows_under("tests")) == tests_totals
+        assert table.rows_under("tests") == [0, 1]
+        assert table.rows_under("awesome/__init__.py") == [2]
+        assert table.rows_under("test") == []
+        assert table.totals_under("test").files == 0
+
+        assert tuple(table.file_totals("tests/__init__.py")) == (
+            0,
+            3,
+            2,
+            1,
+            0,
+            "66.66667",
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+        )
+        summary = table.summary("tests/__init__.py")
+        assert summary.file_index == 0
+        assert summary.session_totals == [
+            [0, 3, 2, 1, 0, "66.66667", 0, 0, 0, 0, 0, 0, 0]
+        ]
+        assert table.summary("missing.py") is None
+
+    def test_build_files_table_no_report(self):
+        assert build_files_table(CommitFactory()) is None
+
+    def test_from_files(self):
+        table = FileSummaryTable.from_files(
+            {
+                "a/b.py": [
+                    0,
+                    [0, 4, 3, 1, 0, "75.00000", 0, 0, 0, 0, 0, 0, 0],
+                    [],
+                    None,
+                ],
+                "c.py": [1, [0, 0, 0, 0, 0, None, 0, 0, 0, 0, 0, 0, 0], [], None],
+            }
+        )
+        assert table.totals().lines == 4
+        assert table.totals_under("c.py").coverage is None
+        assert table.totals_under("a").lines == 4
+        assert table.summary("a/b.py").file_index == 0
+        assert table.file_totals("a/b.py").lines == 4
+        assert table.file_totals("c.py").coverage is None
+        assert table.summary("a/b.py").file_totals.hits == 3
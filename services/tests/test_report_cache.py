@@ -0,0 +1,132 @@
+from pathlib import Path
+
+from core.tests.factories import CommitWithReportFactory
+from services.report import build_report_from_commit
+from services.report_cache import LRUCache, ReportCache, ReportData
+
+current_file = Path(__file__)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10, metrics_prefix="test")
+    cache.set("a", "aaaa", 4)
+    cache.set("b", "bbbb", 4)
+    assert cache.get("a") == "aaaa"
+
+    cache.set("c", "cccc", 4)
+    assert "b" not in cache
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+
+def test_lru_cache_skips_values_over_budget():
+    cache = LRUCache(max_bytes=10, metrics_prefix="test")
+    cache.set("a", "a" * 11, 11)
+    assert cache.get("a") is None
+    assert cache.misses == 1
+    assert cache.size == 0
+
+
+def test_report_cache_falls_back_to_redis(settings, mock_redis):
+    settings.REPORT_CACHE_ENABLED = True
+    cache = ReportCache()
+    data = ReportData(
+        chunks="{}\n[1, null, [[0, 1]]]",
+        files={"file.py": [0, [0, 1, 1, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0], [], None]},
+        sessions={"0": {"t": None, "f": ["unit"]}},
+        totals=[1, 1, 1, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0],
+    )
+    cache.set("key", data)
+    assert mock_redis.get("key") is not None
+
+    cache.memory.clear()
+    assert cache.get("key") == data
+    assert "key" in cache.memory
+
+
+def test_report_cache_directory_totals(settings, mock_redis):
+    settings.REPORT_CACHE_ENABLED = True
+    cache = ReportCache()
+    assert cache.get_directory_totals("key") is None
+
+    cache.set_directory_totals("key", {"": [2, 1, 0, 1], "dir": [1, 1, 0, 0]})
+    cache.memory.clear()
+    assert cache.get_directory_totals("key") == {
+        "": [2, 1, 0, 1],
+        "dir": [1, 1, 0, 0],
+    }
+    assert cache.get("key") is None
+    assert cache.get_directory_totals(None) is None
+
+
+def test_report_cache_disabled(settings, mock_redis):
+    settings.REPORT_CACHE_ENABLED = False
+    cache = ReportCache()
+    cache.set("key", ReportData("", {}, {}, None))
+    assert cache.get("key") is None
+    assert mock_redis.get("key") is None
+
+
+def test_build_report_from_commit_cached(settings, mock_redis, mocker, db):
+    settings.REPORT_CACHE_ENABLED = True
+    mocker.patch("services.report.report_cache", ReportCache())
+    read_chunks = mocker.patch("services.archive.ArchiveService.read_chunks")
+    with open(current_file.parent / "samples" / "chunks.txt", "r") as f:
+        read_chunks.return_value = f.read()
+    commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+    report = build_report_from_commit(commit)
+    cached_report = build_report_from_commit(commit)
+
+    assert read_chunks.call_count == 1
+    assert cached_report is not report
+    assert sorted(cached_report.files) == sorted(report.files)
+    assert list(cached_report.totals) == list(report.totals)
+    assert sorted(cached_report.sessions) == sorted(report.sessions)
+    for filename in report.files:
+        assert tuple(cached_report.get(filename).totals) == tuple(
+            report.get(filename).totals
+        )
+
+
+def test_build_report_from_commit_cache_invalidated_by_upload(
+    settings, mock_redis, mocker, db
+):
+    settings.REPORT_CACHE_ENABLED = True
+    mocker.patch("services.report.report_cache", ReportCache())
+    read_chunks = mocker.patch("services.archive.ArchiveService.read_chunks")
+    with open(current_file.parent / "samples" / "chunks.txt", "r") as f:
+        read_chunks.return_value = f.read()
+    commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+    build_report_from_commit(commit)
+    # the worker saves report details after processing every upload
+    commit.reports.first().reportdetails.save()
+    build_report_from_commit(commit)
+
+    assert read_chunks.call_count == 2
+
+
+def test_build_report_from_commit_built_by_other_worker(
+    settings, mock_redis, mocker, db
+):
+    settings.REPORT_CACHE_ENABLED = True
+    cache = ReportCache()
+    mocker.patch("services.report.report_cache", cache)
+    read_chunks = mocker.patch("services.archive.ArchiveService.read_chunks")
+    commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+    cache_key = cache.key(commit, commit.reports.first().reportdetails.updated_at)
+    with open(current_file.parent / "samples" / "chunks.txt", "r") as f:
+        data = ReportData(chunks=f.read(), files={}, sessions={}, totals=None)
+
+    lock = mocker.patch("services.report.distributed_lock")
+    # the report is cached by another worker while we wait for the lock
+    lock.return_value.__enter__.side_effect = lambda: cache.set(cache_key, data)
+
+    report = build_report_from_commit(commit)
+
+    assert lock.call_args.args == (f"report_build/{cache_key}",)
+    assert not read_chunks.called
+    assert report is not None
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from services.report import SerializableReport, build_report
+from services.report_parsing import (
+    ReportParser,
+    line_signatures,
+    parse_line_signatures,
+    raw_file_chunks,
+)
+
+current_file = Path(__file__)
+
+files = {
+    "awesome/__init__.py": [
+        2,
+        [0, 10, 8, 2, 0, "80.00000", 0, 0, 0, 0, 0, 0, 0],
+        [[0, 10, 8, 2, 0, "80.00000", 0, 0, 0, 0, 0, 0, 0]],
+        None,
+    ],
+    "tests/__init__.py": [
+        0,
+        [0, 3, 2, 1, 0, "66.66667", 0, 0, 0, 0, 0, 0, 0],
+        [[0, 3, 2, 1, 0, "66.66667", 0, 0, 0, 0, 0, 0, 0]],
+        None,
+    ],
+    "tests/test_sample.py": [
+        1,
+        [0, 7, 7, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0],
+        [[0, 7, 7, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0]],
+        None,
+    ],
+}
+
+
+def read_chunks():
+    with open(current_file.parent / "samples" / "chunks.txt", "r") as f:
+        return f.read()
+
+
+def sample_report():
+    return build_report(read_chunks(), files, {}, None)
+
+
+def test_parse_line_signatures():
+    report = sample_report()
+    chunks = raw_file_chunks(report)
+
+    assert len(chunks) == 3
+    signatures, file_sessions = parse_line_signatures(chunks)
+    assert (signatures, file_sessions) == line_signatures(report.file_reports())
+    assert sum(signatures.values()) == 20
+    assert file_sessions == [frozenset({0, 1})] * 3
+
+
+def test_raw_file_chunks_of_parsed_files():
+    report = sample_report()
+    report.get("tests/__init__.py", bind=True)
+    assert raw_file_chunks(report) is None
+    assert raw_file_chunks(SerializableReport(files=files)) is None
+
+
+def test_report_parser_offloads_large_chunks(settings, mocker):
+    settings.REPORT_PARSE_PROCESS_POOL_ENABLED = True
+    settings.REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES = 100
+    parser = ReportParser()
+    pool = ThreadPoolExecutor(max_workers=1)
+    submit = mocker.spy(pool, "submit")
+    parser._pool = pool
+
+    report = sample_report()
+    assert parser.line_signatures(report) == line_signatures(report.file_reports())
+    submit.assert_called_once_with(parse_line_signatures, raw_file_chunks(report))
+
+    submit.reset_mock()
+    settings.REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES = len(read_chunks()) + 1
+    parser.line_signatures(report)
+    assert not submit.called
+
+
+def test_report_parser_disabled(settings, mocker):
+    settings.REPORT_PARSE_PROCESS_POOL_ENABLED = False
+    settings.REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES = 0
+    parser = ReportParser()
+    pool = mocker.patch.object(ReportParser, "pool")
+
+    parser.line_signatures(sample_report())
+    assert not pool.submit.called
+
+
+def test_flags_totals_parsed_in_pool(settings, mocker):
+    settings.REPORT_PARSE_PROCESS_POOL_ENABLED = True
+    settings.REPORT_PARSE_PROCESS_POOL_THRESHOLD_BYTES = 0
+    parser = ReportParser()
+    parser._pool = ThreadPoolExecutor(max_workers=1)
+    mocker.patch("services.report.report_parser", parser)
+    submit = mocker.spy(parser._pool, "submit")
+
+    report = sample_report()
+    totals = report.session_totals.totals([0])
+    assert submit.called
+    assert (totals.files, totals.lines, totals.hits, totals.misses) == (3, 20, 17, 3)
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from services.single_flight import SingleFlight, distributed_lock
+
+
+def test_single_flight_coalesces_concurrent_calls(mocker):
+    metrics = mocker.patch("services.single_flight.metrics")
+    flights = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    results = []
+
+    def run():
+        results.append(flights.do("key", fn))
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=run) for _ in range(5)]
+    for follower in followers:
+        follower.start()
+    # followers record a metric right before waiting on the leader's call
+    while metrics.incr.call_count < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False)] + [("result", True)] * 5
+    assert flights._calls == {}
+
+
+def test_single_flight_does_not_cache():
+    flights = SingleFlight("test")
+    fn = MagicMock(side_effect=["first", "second"])
+    assert flights.do("key", fn) == ("first", False)
+    assert flights.do("key", fn) == ("second", False)
+
+
+def test_single_flight_propagates_errors():
+    flights = SingleFlight("test")
+    with pytest.raises(ValueError):
+        flights.do("key", MagicMock(side_effect=ValueError()))
+    assert flights._calls == {}
+
+
+def test_distributed_lock(mocker):
+    lock = mocker.patch("services.single_flight.redis_lock.Lock")
+    lock.return_value.acquire.return_value = True
+
+    with distributed_lock("name", timeout=5) as acquired:
+        assert acquired
+
+    lock.return_value.acquire.assert_called_once_with(timeout=5)
+    lock.return_value.release.assert_called_once()
+
+
+def test_distributed_lock_timeout(mocker):
+    lock = mocker.patch("services.single_flight.redis_lock.Lock")
+    lock.return_value.acquire.return_value = False
+
+    with distributed_lock("name", timeout=5) as acquired:
+        assert not acquired
+
+    lock.return_value.release.assert_not_called()
+
+
+def test_distributed_lock_redis_unavailable(mocker):
+    lock = mocker.patch("services.single_flight.redis_lock.Lock")
+    lock.return_value.acquire.side_effect = ConnectionError()
+
+    with distributed_lock("name", timeout=5) as acquired:
+        assert not acquired
@@ -0,0 +1,121 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from minio.error import S3Error
+from shared.storage.exceptions import FileNotInStorageError
+
+from services.storage import DiskCache, StorageService
+
+
+def test_disk_cache_get_set(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    assert cache.get("bucket", "path") is None
+
+    cache.set("bucket", "path", b"contents\nwith newlines", '"etag"')
+    assert cache.get("bucket", "path") == (b"contents\nwith newlines", '"etag"')
+    assert cache.get("other", "path") is None
+
+    cache.delete("bucket", "path")
+    assert cache.get("bucket", "path") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    cache.set("bucket", "a", b"a" * 40, "etag")
+    cache.set("bucket", "b", b"b" * 40, "etag")
+    # make "a" the most recently used entry
+    os.utime(cache._entry_path("bucket", "b"), (0, 0))
+    assert cache.get("bucket", "a") is not None
+
+    cache.set("bucket", "c", b"c" * 40, "etag")
+    assert cache.get("bucket", "b") is None
+    assert cache.get("bucket", "a") is not None
+    assert cache.get("bucket", "c") is not None
+    assert cache.size <= 100
+
+
+def test_disk_cache_size_tracks_overwrites_and_deletes(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    cache.set("bucket", "path", b"a" * 40, "etag")
+    assert cache.size == 45
+
+    cache.set("bucket", "path", b"a" * 20, "etag")
+    assert cache.size == 25
+    assert cache.size == cache._disk_usage()
+
+    cache.delete("bucket", "path")
+    assert cache.size == 0
+
+    cache.delete("bucket", "path")
+    assert cache.size == 0
+
+
+def test_disk_cache_skips_values_over_budget(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.set("bucket", "path", b"a" * 11, "etag")
+    assert cache.get("bucket", "path") is None
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def storage(tmp_path, mocker):
+    mocker.patch("services.storage.MINIO_CLIENT", MagicMock())
+    mocker.patch("services.storage.DISK_CACHE", None)
+    return StorageService(
+        in_config={"disk_cache": {"path": str(tmp_path), "max_bytes": 1000}}
+    )
+
+
+def _response(data: bytes, etag: str):
+    response = MagicMock()
+    response.read.return_value = data
+    response.headers = {"ETag": etag}
+    return response
+
+
+def test_read_file_served_from_disk_cache(storage):
+    storage.minio_client.get_object.return_value = _response(b"data", '"etag"')
+    storage.minio_client.stat_object.return_value = MagicMock(etag="etag")
+
+    assert storage.read_file("bucket", "path") == b"data"
+    assert storage.read_file("bucket", "path") == b"data"
+    assert storage.minio_client.get_object.call_count == 1
+    storage.minio_client.stat_object.assert_called_once_with("bucket", "path")
+
+
+def test_read_file_disk_cache_stale(storage):
+    storage.minio_client.get_object.side_effect = [
+        _response(b"old", '"etag1"'),
+        _response(b"new", '"etag2"'),
+    ]
+    storage.minio_client.stat_object.return_value = MagicMock(etag="etag2")
+
+    assert storage.read_file("bucket", "path") == b"old"
+    assert storage.read_file("bucket", "path") == b"new"
+    assert storage.disk_cache.get("bucket", "path") == (b"new", '"etag2"')
+
+
+def test_read_file_disk_cache_deleted_object(storage):
+    storage.minio_client.get_object.return_value = _response(b"data", '"etag"')
+    storage.minio_client.stat_object.side_effect = S3Error(
+        "NoSuchKey", "message", "resource", "request_id", "host_id", MagicMock()
+    )
+
+    storage.read_file("bucket", "path")
+    with pytest.raises(FileNotInStorageError):
+        storage.read_file("bucket", "path")
+    assert storage.disk_cache.get("bucket", "path") is None
+
+
+def test_write_and_delete_invalidate_disk_cache(storage, mocker):
+    mocker.patch("services.storage.MinioStorageService.write_file")
+    mocker.patch("services.storage.MinioStorageService.delete_file")
+
+    storage.disk_cache.set("bucket", "path", b"data", "etag")
+    storage.write_file("bucket", "path", "new data")
+    assert storage.disk_cache.get("bucket", "path") is None
+
+    storage.disk_cache.set("bucket", "path", b"data", "etag")
+    storage.delete_file("bucket", "path")
+    assert storage.disk_cache.get("bucket", "path") is None
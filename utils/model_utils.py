@@ -1,7 +1,8 @@
 import json
 import logging
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, List, Optional
 
+from django.db.models import QuerySet
 from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
@@ -93,14 +94,7 @@ class ArchiveField:
                 file_str = archive_service.read_file(archive_field)
                 return self.rehydrate_fn(obj, json.loads(file_str))
             except FileNotInStorageError:
-                log.error(
-                    "Archive enabled field not in storage",
-                    extra=dict(
-                        storage_path=archive_field,
-                        object_id=obj.id,
-                        commit=obj.get_commitid(),
-                    ),
-                )
+                self._log_not_in_storage(obj)
         else:
             log.debug(
                 "Both db_field and archive_field are None",
@@ -111,10 +105,63 @@ class ArchiveField:
             )
         return self.default_value_class()
 
+    def _log_not_in_storage(self, obj):
+        log.error(
+            "Archive enabled field not in storage",
+            extra=dict(
+                storage_path=getattr(obj, self.archive_field_name),
+                object_id=obj.id,
+                commit=obj.get_commitid(),
+            ),
+        )
+
+    def prefetch(self, objs: Iterable):
+        """
+        Loads the value of this field for many objects at once.  Values that live
+        in storage are read concurrently (instead of one blocking read per object
+        on first access) and cached on each object.
+        """
+        pending = [
+            obj
+            for obj in objs
+            if not self._is_cached(obj)
+            and getattr(obj, self.db_field_name) is None
+            and getattr(obj, self.archive_field_name)
+        ]
+
+        # anything touching the database happens on this thread - only the
+        # storage reads are concurrent
+        by_repository = {}
+        for obj in pending:
+            repository = obj.get_repository()
+            if repository.pk not in by_repository:
+                by_repository[repository.pk] = (
+                    ArchiveService(repository=repository),
+                    [],
+                )
+            by_repository[repository.pk][1].append(obj)
+
+        for archive_service, repository_objs in by_repository.values():
+            contents = archive_service.read_files(
+                getattr(obj, self.archive_field_name) for obj in repository_objs
+            )
+            for obj in repository_objs:
+                file_str = contents[getattr(obj, self.archive_field_name)]
+                if isinstance(file_str, FileNotInStorageError):
+                    self._log_not_in_storage(obj)
+                    value = self.default_value_class()
+                else:
+                    value = self.rehydrate_fn(obj, json.loads(file_str))
+                setattr(obj, self.cached_value_property_name, value)
+
+    def _is_cached(self, obj) -> bool:
+        return hasattr(obj, self.cached_value_property_name)
+
     def __get__(self, obj, objtype=None):
-        cached_value = getattr(obj, self.cached_value_property_name, None)
-        if cached_value:
-            return cached_value
+        if obj is None:
+            return self
+        if self._is_cached(obj):
+            return getattr(obj, self.cached_value_property_name)
         db_field = getattr(obj, self.db_field_name)
         if db_field is not None:
             value = self.rehydrate_fn(obj, db_field)
@@ -145,3 +192,52 @@ class ArchiveField:
         else:
             setattr(obj, self.db_field_name, value)
         setattr(obj, self.cached_value_property_name, value)
+
+
+def prefetch_archive_fields(objs: Iterable, *field_names: str) -> List:
+    """
+    Loads the given `ArchiveField`s for all `objs` with concurrent storage reads.
+    Returns the objects as a list.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    model_class = type(objs[0])
+    for field_name in field_names:
+        field = getattr(model_class, field_name)
+        assert isinstance(field, ArchiveField), f"{field_name} is not an ArchiveField"
+        field.prefetch(objs)
+    return objs
+
+
+class ArchiveFieldQuerySet(QuerySet):
+    """
+    QuerySet for models with `ArchiveField`s.  Adds `prefetch_archive_fields`,
+    which loads the given fields for all results once the queryset is evaluated:
+
+        Pull.objects.filter(...).prefetch_archive_fields("flare")
+    """
+
+    _archive_fields_to_prefetch = ()
+
+    def prefetch_archive_fields(self, *field_names: str) -> "ArchiveFieldQuerySet":
+        clone = self._chain()
+        clone._archive_fields_to_prefetch = (
+            *self._archive_fields_to_prefetch,
+            *field_names,
+        )
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._archive_fields_to_prefetch = self._archive_fields_to_prefetch
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        if not fetched and self._archive_fields_to_prefetch:
+            prefetch_archive_fields(
+                [obj for obj in self._result_cache if isinstance(obj, self.model)],
+                *self._archive_fields_to_prefetch,
+            )
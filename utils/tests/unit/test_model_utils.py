@@ -4,9 +4,14 @@ from unittest.mock import MagicMock
 from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
-from core.models import Commit
-from core.tests.factories import CommitFactory
-from utils.model_utils import ArchiveField, ArchiveFieldInterface
+from core.models import Commit, Pull
+from core.tests.factories import CommitFactory, PullFactory
+from services.archive import ArchiveService
+from utils.model_utils import (
+    ArchiveField,
+    ArchiveFieldInterface,
+    prefetch_archive_fields,
+)
 
 
 class TestArchiveField(object):
@@ -134,3 +139,73 @@ class TestArchiveField(object):
         mock_archive_service.return_value.delete_file.assert_called_with(
             "path/to/old/data"
         )
+
+    def test_archive_getter_caches_empty_values(self, db, mocker):
+        mock_read_file = mocker.MagicMock(return_value=json.dumps({}))
+        mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
+        mock_archive_service.return_value.read_file = mock_read_file
+        commit = CommitFactory()
+        test_class = self.ClassWithArchiveField(commit, None, "gcs_path")
+
+        assert test_class.archive_field == {}
+        assert test_class.archive_field == {}
+        assert mock_read_file.call_count == 1
+
+    def test_prefetch_archive_fields(self, db, mocker):
+        mock_read_file = mocker.patch.object(
+            ArchiveService,
+            "read_file",
+            side_effect=lambda path: json.dumps({"path": path}),
+        )
+        read_files = mocker.spy(ArchiveService, "read_files")
+        commit = CommitFactory()
+        objs = [
+            self.ClassWithArchiveField(commit, None, "path_1"),
+            self.ClassWithArchiveField(commit, None, "path_2"),
+            self.ClassWithArchiveField(commit, "db_value", None),
+            self.ClassWithArchiveField(commit, None, None),
+        ]
+
+        assert prefetch_archive_fields(objs, "archive_field") == objs
+        assert mock_read_file.call_count == 2
+        # objects from the same repository are read in a single batch
+        assert read_files.call_count == 1
+
+        assert objs[0].archive_field == {"path": "path_1"}
+        assert objs[1].archive_field == {"path": "path_2"}
+        assert objs[2].archive_field == "db_value"
+        assert objs[3].archive_field is None
+        assert mock_read_file.call_count == 2
+
+    def test_prefetch_archive_fields_file_not_in_storage(self, db, mocker):
+        mock_read_file = mocker.patch.object(
+            ArchiveService, "read_file", side_effect=FileNotInStorageError()
+        )
+        commit = CommitFactory()
+        obj = self.ClassWithArchiveField(commit, None, "gcs_path")
+
+        prefetch_archive_fields([obj], "archive_field")
+
+        assert obj.archive_field is None
+        assert mock_read_file.call_count == 1
+
+
+class TestArchiveFieldQuerySet(object):
+    def test_prefetch_archive_fields(self, db, mocker):
+        mock_read_file = mocker.patch.object(
+            ArchiveService, "read_file", return_value=json.dumps({"files": {}})
+        )
+        pulls = [PullFactory(), PullFactory()]
+        Pull.objects.filter(pk__in=[pull.pk for pull in pulls]).update(
+            _flare=None, _flare_storage_path="flare_path"
+        )
+
+        queryset = Pull.objects.filter(
+            pk__in=[pull.pk for pull in pulls]
+        ).prefetch_archive_fields("flare")
+
+        assert mock_read_file.call_count == 0
+        results = list(queryset)
+        assert mock_read_file.call_count == 2
+        assert [pull.flare for pull in results] == [{"files": {}}, {"files": {}}]
+        assert mock_read_file.call_count == 2